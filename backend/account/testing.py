@@ -0,0 +1,29 @@
+from datetime import date
+
+from account.models import CustomUser
+
+
+def make_user(role, index, password=None):
+    """
+    An active user of `role` for tests; the profile signal creates the
+    matching student/teacher profile. Without a password the user can only
+    be authenticated with force_authenticate, which skips hashing.
+    """
+    return CustomUser.objects.create_user(
+        name=f'{role} {index}',
+        email=f'{role}{index}@example.com',
+        password=password,
+        role=role,
+        dob=date(2010, 1, 1),
+        mobile=f'{role[0]}{index:09d}',
+        city='City',
+        is_active=True
+    )
+
+
+def make_student(index, classroom):
+    """A student profile in `classroom`."""
+    student = make_user('student', index).student_profile
+    student.classroom = classroom
+    student.save()
+    return student
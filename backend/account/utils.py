@@ -5,9 +5,6 @@ from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.conf import settings
 import os
 
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-
 
 class EmailActivationTokenGenerator(PasswordResetTokenGenerator):
     def _make_hash_value(self, user, timestamp):
@@ -25,6 +22,10 @@ def generate_activation_link(user, request):
 
 
 def send_activation_email(user, request):
+    # sendgrid is imported on first use so it is not loaded at startup.
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
+
     activation_link = generate_activation_link(user, request)
 
     html_content = render_to_string(
@@ -70,6 +71,9 @@ def generate_password_reset_link(user, request):
 
 
 def send_password_reset_email(user, request):
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
+
     reset_link = generate_password_reset_link(user, request)
 
     html_content = render_to_string(
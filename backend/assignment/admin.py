@@ -1,14 +1,14 @@
 from django.contrib import admin
-from assignment.models import Assignment, AssignmentSubmission
+from assignment.models import Assignment, AssignmentSubmission, AIFeedbackJob, AIFeedbackCache
 # Register your models here.
 
 
 
 @admin.register(Assignment)
 class AssignmentAdmin(admin.ModelAdmin):
-    list_display = ['id','title', 'subject', 'teacher', 'due_date', 'max_marks', 'is_active', 'created_at']
+    list_display = ['id','title', 'subject', 'teacher', 'due_date', 'max_marks', 'is_active', 'ai_pregrade', 'created_at']
     
-    list_filter = ['subject', 'is_active', 'due_date']
+    list_filter = ['subject', 'is_active', 'ai_pregrade', 'due_date']
     search_fields = ['title', 'subject', 'teacher__email']
     ordering = ['-created_at',]
     readonly_fields = ['teacher', 'created_at', 'updated_at']
@@ -24,4 +24,21 @@ class AssignmentSubmissionAdmin(admin.ModelAdmin):
     list_filter = ['submitted_at']
     search_fields = ['student__email', 'assignment__title']
     ordering = ['-submitted_at']
-    readonly_fields = ['student', 'assignment', 'submitted_at']
\ No newline at end of file
+    readonly_fields = ['student', 'assignment', 'submitted_at']
+
+
+
+@admin.register(AIFeedbackJob)
+class AIFeedbackJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'submission', 'requested_by', 'status', 'speculative', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'speculative']
+    ordering = ['-created_at']
+    readonly_fields = ['submission', 'requested_by', 'created_at', 'started_at', 'finished_at']
+
+
+
+@admin.register(AIFeedbackCache)
+class AIFeedbackCacheAdmin(admin.ModelAdmin):
+    list_display = ['key', 'model', 'size', 'hits', 'created_at', 'last_used_at']
+    list_filter = ['model']
+    ordering = ['-last_used_at']
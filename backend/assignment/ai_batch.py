@@ -0,0 +1,123 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from assignment.ai_cache import feedback_cache_key, get_cached_feedback, store_feedback
+from assignment.ai_jobs import submission_feedback_args
+from assignment.ai_utils import build_prompt_frame, generate_submission_feedback
+
+
+def grade_submissions(assignment, submissions, max_workers, timeout,
+                      refresh=False, use_cache=True, provider=None):
+    """
+    Generate AI feedback for many submissions of one assignment, yielding
+    each result as soon as it is ready.
+
+    Cached answers are yielded first. Submissions with identical inputs
+    share one model call. The rest are sent to the model from
+    a pool of at most `max_workers` threads, with the assignment's prompt
+    frame built once and shared. A call still running `timeout` seconds
+    after it started is reported as timed out. The same timeout is the
+    provider's deadline for that call, retries included, so its thread
+    gives up at about the same time instead of running on unseen. Only
+    the model calls run in the pool; all database access stays on the
+    caller's thread.
+
+    Args:
+        assignment (Assignment): Assignment the submissions belong to
+        submissions (iterable): AssignmentSubmission instances
+        max_workers (int): Concurrency cap
+        timeout (float): Per-call timeout in seconds
+        refresh (bool): Ignore cached feedback
+        use_cache (bool): Read and write the feedback cache at all
+        provider: ResilientProvider override (e.g. around a StubProvider)
+
+    Yields:
+        dict: submission_id, status (cached/done/failed/timeout),
+            suggestion and error
+    """
+    frame = build_prompt_frame(
+        assignment.title,
+        assignment.description or "No specific criteria provided",
+        assignment.max_marks
+    )
+
+    groups = {}
+    for submission in submissions:
+        key = feedback_cache_key(submission) if use_cache else submission.id
+        if key in groups:
+            groups[key].append(submission)
+            continue
+
+        cached = get_cached_feedback(key) if use_cache and not refresh else None
+        if cached is not None:
+            yield batch_result(submission, 'cached', suggestion=cached)
+        else:
+            groups[key] = [submission]
+
+    pending = list(groups.items())
+
+    if not pending:
+        return
+
+    started = {}
+
+    def call(index, kwargs):
+        started[index] = time.monotonic()
+        return generate_submission_feedback(
+            **kwargs, frame=frame, provider=provider, timeout=timeout)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(call, index, submission_feedback_args(group[0])): index
+            for index, (_, group) in enumerate(pending)
+        }
+
+        while futures:
+            running = [started[index] for index in futures.values() if index in started]
+            wait_for = max(0.0, min(running) + timeout - time.monotonic()) if running else timeout
+
+            done, _ = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = futures.pop(future)
+                key, group = pending[index]
+                try:
+                    suggestion, size = future.result()
+                except Exception as e:
+                    # The provider gives up at the deadline it was passed.
+                    if time.monotonic() - started[index] >= timeout:
+                        status, error = 'timeout', f'No response within {timeout} seconds.'
+                    else:
+                        status, error = 'failed', str(e)
+                    for submission in group:
+                        yield batch_result(submission, status, error=error)
+                    continue
+
+                if use_cache:
+                    store_feedback(key, suggestion)
+                for submission in group:
+                    yield batch_result(submission, 'done', suggestion=suggestion, prompt_size=size)
+
+            now = time.monotonic()
+            for future, index in list(futures.items()):
+                if index in started and now - started[index] >= timeout:
+                    future.cancel()
+                    del futures[future]
+                    for submission in pending[index][1]:
+                        yield batch_result(
+                            submission, 'timeout',
+                            error=f'No response within {timeout} seconds.'
+                        )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def batch_result(submission, status, suggestion='', error='', prompt_size=None):
+    return {
+        'submission_id': submission.id,
+        'status': status,
+        'suggestion': suggestion,
+        'error': error,
+        'prompt_size': prompt_size,
+    }
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from assignment.ai_files import open_file_chunks
+from assignment.models.ai_feedback import AIFeedbackCache
+from assignment.models.submission import AssignmentSubmission
+
+
+def file_digest(file):
+    """sha256 hex digest of a Django File, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def submission_file_digest(submission):
+    """
+    Digest of the submission's file. Submissions uploaded before digests
+    were recorded get theirs computed and stored on first use.
+    """
+    if not submission.answer_file:
+        return ''
+
+    if not submission.answer_file_digest:
+        digest = hashlib.sha256()
+        with open_file_chunks(submission.answer_file) as (_, chunks):
+            for chunk in chunks:
+                digest.update(chunk)
+        submission.answer_file_digest = digest.hexdigest()
+
+        AssignmentSubmission.objects.filter(id=submission.id).update(
+            answer_file_digest=submission.answer_file_digest)
+
+    return submission.answer_file_digest
+
+
+def feedback_cache_key(submission, model=None):
+    """
+    Hash of every input that shapes the feedback: the assignment's title,
+    description and max marks, the answer text, the file content (and
+    extension, which decides how it is sent) and the model name.
+    """
+    assignment = submission.assignment
+    extension = os.path.splitext(submission.answer_file.name)[1].lower() \
+        if submission.answer_file else ''
+
+    payload = json.dumps([
+        assignment.title,
+        assignment.description,
+        assignment.max_marks,
+        submission.answer_text,
+        submission_file_digest(submission),
+        extension,
+        model or settings.AI_FEEDBACK_MODEL,
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached_feedback(key):
+    """Return the cached feedback for `key`, or None if missing or expired."""
+    entry = AIFeedbackCache.objects.filter(
+        key=key,
+        created_at__gte=timezone.now() - timedelta(seconds=settings.AI_FEEDBACK_CACHE_MAX_AGE)
+    ).values_list('id', 'result').first()
+
+    if entry is None:
+        return None
+
+    AIFeedbackCache.objects.filter(id=entry[0]).update(
+        hits=F('hits') + 1,
+        last_used_at=timezone.now()
+    )
+    return entry[1]
+
+
+def store_feedback(key, result, model=None):
+    now = timezone.now()
+    AIFeedbackCache.objects.update_or_create(
+        key=key,
+        defaults={
+            'model': model or settings.AI_FEEDBACK_MODEL,
+            'result': result,
+            'size': len(result.encode()),
+            'created_at': now,
+            'last_used_at': now,
+        }
+    )
+    evict_feedback_cache()
+
+
+def evict_feedback_cache():
+    """
+    Delete expired entries, then the least recently used ones until the
+    cache fits in AI_FEEDBACK_CACHE_MAX_BYTES.
+
+    Returns:
+        int: Number of entries deleted
+    """
+    deleted, _ = AIFeedbackCache.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=settings.AI_FEEDBACK_CACHE_MAX_AGE)
+    ).delete()
+
+    total = AIFeedbackCache.objects.aggregate(total=Sum('size'))['total'] or 0
+    excess = total - settings.AI_FEEDBACK_CACHE_MAX_BYTES
+    if excess <= 0:
+        return deleted
+
+    evicted = []
+    for entry_id, size in AIFeedbackCache.objects.order_by(
+        'last_used_at', 'id'
+    ).values_list('id', 'size').iterator():
+        evicted.append(entry_id)
+        excess -= size
+        if excess <= 0:
+            break
+
+    AIFeedbackCache.objects.filter(id__in=evicted).delete()
+    return deleted + len(evicted)
@@ -0,0 +1,187 @@
+import io
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+
+# Rough size of a token for English text and code, used to turn the
+# token budget into characters without calling the model's tokenizer.
+CHARS_PER_TOKEN = 4
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def budget_chars(token_budget=None):
+    return (token_budget or settings.AI_FILE_TOKEN_BUDGET) * CHARS_PER_TOKEN
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_to_budget(text, token_budget=None):
+    """Cut text to the token budget, saying how much was left out."""
+    limit = budget_chars(token_budget)
+    if len(text) <= limit:
+        return text
+    return (
+        text[:limit]
+        + f"\n[... {len(text) - limit} more characters truncated to fit the "
+        f"{token_budget or settings.AI_FILE_TOKEN_BUDGET}-token budget ...]"
+    )
+
+
+def pdf_text(data, limit):
+    # Imported here so only PDF submissions pay for loading pypdf.
+    from pypdf import PdfReader
+
+    pages = []
+    size = 0
+    for page in PdfReader(io.BytesIO(data)).pages:
+        text = page.extract_text() or ''
+        pages.append(text)
+        size += len(text)
+        if size > limit:
+            break
+    return '\n\n'.join(pages)
+
+
+def iter_part(archive, name, tag):
+    """
+    Yield each `tag` element of an archive part as soon as it is parsed,
+    clearing it afterwards, so the part is never decompressed or held in
+    memory whole. Parts whose declared size is over AI_FILE_MAX_PART_BYTES
+    are refused; zipfile never reads past the declared size.
+    """
+    info = archive.getinfo(name)
+    if info.file_size > settings.AI_FILE_MAX_PART_BYTES:
+        raise ValueError(f'{name} is {info.file_size} bytes uncompressed.')
+
+    with archive.open(info) as part:
+        for _, element in ElementTree.iterparse(part):
+            if element.tag == tag:
+                yield element
+                element.clear()
+
+
+def docx_text(data, limit):
+    paragraphs = []
+    size = 0
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for paragraph in iter_part(archive, 'word/document.xml', f'{WORD_NS}p'):
+            text = ''.join(
+                '\t' if node.tag == f'{WORD_NS}tab' else node.text or ''
+                for node in paragraph.iter()
+                if node.tag in (f'{WORD_NS}t', f'{WORD_NS}tab')
+            )
+            paragraphs.append(text)
+            size += len(text)
+            if size > limit:
+                break
+    return '\n'.join(paragraphs)
+
+
+def xlsx_text(data, limit):
+    """
+    Every sheet as tab-separated rows, in workbook order. Shared strings
+    are read up to the budget; cells pointing past them come out empty,
+    as they could not fit in the budget anyway.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = set(archive.namelist())
+
+        shared = []
+        if 'xl/sharedStrings.xml' in names:
+            size = 0
+            for item in iter_part(archive, 'xl/sharedStrings.xml', f'{SHEET_NS}si'):
+                shared.append(''.join(node.text or '' for node in item.iter(f'{SHEET_NS}t')))
+                size += len(shared[-1])
+                if size > limit:
+                    break
+
+        targets = {
+            rel.get('Id'): posixpath.normpath(posixpath.join('xl', rel.get('Target')))
+            for rel in iter_part(
+                archive, 'xl/_rels/workbook.xml.rels', f'{PACKAGE_REL_NS}Relationship')
+        }
+        sheets = [
+            (sheet.get('name'), targets.get(sheet.get(f'{REL_NS}id')))
+            for sheet in iter_part(archive, 'xl/workbook.xml', f'{SHEET_NS}sheet')
+        ]
+
+        lines = []
+        size = 0
+        for name, path in sheets:
+            if path not in names:
+                continue
+            lines.append(f'Sheet: {name}')
+            for row in iter_part(archive, path, f'{SHEET_NS}row'):
+                values = []
+                for cell in row.iter(f'{SHEET_NS}c'):
+                    if cell.get('t') == 'inlineStr':
+                        values.append(''.join(node.text or '' for node in cell.iter(f'{SHEET_NS}t')))
+                        continue
+                    value = cell.findtext(f'{SHEET_NS}v') or ''
+                    if cell.get('t') == 's' and value:
+                        index = int(value)
+                        value = shared[index] if index < len(shared) else ''
+                    values.append(value)
+                line = '\t'.join(values).rstrip('\t')
+                lines.append(line)
+                size += len(line)
+                if size > limit:
+                    return '\n'.join(lines)
+    return '\n'.join(lines)
+
+
+EXTRACTORS = {
+    '.pdf': pdf_text,
+    '.docx': docx_text,
+    '.xlsx': xlsx_text,
+}
+
+
+def extract_text(data, ext, token_budget=None):
+    """
+    Extract the text of a PDF, DOCX or XLSX file locally, cut to the token
+    budget. Reading stops once the budget is exceeded; DOCX and XLSX parts
+    are parsed as they are decompressed, and refused past
+    AI_FILE_MAX_PART_BYTES.
+
+    Args:
+        data (bytes): File content
+        ext (str): Lower-case extension, e.g. ".pdf"
+        token_budget (int): Defaults to AI_FILE_TOKEN_BUDGET
+
+    Returns:
+        str: Extracted text, or None for other formats, unreadable files
+            and documents without text (such as scanned PDFs)
+    """
+    extractor = EXTRACTORS.get(ext)
+    if extractor is None:
+        return None
+
+    try:
+        text = extractor(data, budget_chars(token_budget)).strip()
+    except Exception:
+        return None
+
+    return truncate_to_budget(text, token_budget) if text else None
+
+
+def prompt_size(content_parts):
+    """Characters, estimated tokens and inline bytes of model contents."""
+    text = ''.join(part for part in content_parts if isinstance(part, str))
+    return {
+        'chars': len(text),
+        'tokens': estimate_tokens(text),
+        'inline_bytes': sum(
+            len(part['inline_data']['data'])
+            for part in content_parts if isinstance(part, dict)
+        ),
+    }
@@ -0,0 +1,118 @@
+import os
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+
+
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+
+
+class FileTooLarge(Exception):
+    pass
+
+
+def get_session():
+    """Shared requests.Session, so URL downloads reuse pooled connections."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(
+            pool_maxsize=max(settings.AI_BATCH_MAX_WORKERS, 10),
+            max_retries=1
+        )
+        _session = requests.Session()
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+def file_name(source):
+    """Base name of a stored file, URL or local path, without query string."""
+    name = source.name if isinstance(source, File) else source
+    return os.path.basename(name).split('?')[0]
+
+
+def _s3_chunks(obj):
+    # The GET is only sent once iteration starts, after the size check.
+    body = obj.get()['Body']
+    try:
+        yield from body.iter_chunks(CHUNK_SIZE)
+    finally:
+        body.close()
+
+
+@contextmanager
+def open_file_chunks(source):
+    """
+    Open a submission file for streaming, without loading it whole.
+
+    Args:
+        source: Stored file (e.g. submission.answer_file), URL or local path
+
+    Yields:
+        tuple: (size in bytes or None if unknown, iterator of byte chunks)
+    """
+    if isinstance(source, File) and hasattr(source, 'storage'):
+        stored = source.storage.open(source.name, 'rb')
+        try:
+            if hasattr(stored, 'obj'):
+                # S3: stream the object body instead of letting S3File
+                # download it into a temporary file first.
+                yield stored.obj.content_length, _s3_chunks(stored.obj)
+            else:
+                yield stored.size, stored.chunks(CHUNK_SIZE)
+        finally:
+            stored.close()
+
+    elif isinstance(source, File):
+        source.open('rb')
+        yield source.size, source.chunks(CHUNK_SIZE)
+
+    elif source.startswith('http'):
+        with get_session().get(
+            source,
+            stream=True,
+            timeout=(settings.AI_FILE_CONNECT_TIMEOUT, settings.AI_FILE_READ_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            length = response.headers.get('Content-Length')
+            yield int(length) if length else None, response.iter_content(CHUNK_SIZE)
+
+    else:
+        with open(source, 'rb') as local_file:
+            yield os.path.getsize(source), iter(partial(local_file.read, CHUNK_SIZE), b'')
+
+
+def read_submission_file(source, max_bytes=None):
+    """
+    Read a submission file through open_file_chunks, refusing it as soon
+    as it is known to exceed `max_bytes` (AI_FILE_MAX_BYTES by default).
+
+    Returns:
+        bytes: File content
+
+    Raises:
+        FileTooLarge: The file is over the limit
+    """
+    max_bytes = max_bytes or settings.AI_FILE_MAX_BYTES
+    too_large = FileTooLarge(f"file exceeds {max_bytes // 1024} KB limit")
+
+    with open_file_chunks(source) as (size, chunks):
+        if size is not None and size > max_bytes:
+            raise too_large
+
+        parts = []
+        total = 0
+        for chunk in chunks:
+            total += len(chunk)
+            if total > max_bytes:
+                raise too_large
+            parts.append(chunk)
+
+    return b''.join(parts)
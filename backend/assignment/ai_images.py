@@ -0,0 +1,112 @@
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from assignment.ai_files import read_submission_file
+
+
+# Resized images are stored next to the submissions they come from.
+PREPARED_IMAGE_DIR = 'assignments/submissions/ai-images/'
+
+JPEG_QUALITIES = (85, 75, 65, 55)
+MIN_SIDE = 512
+
+
+def encode_jpeg(image, target_bytes):
+    """Re-encode at falling quality until the JPEG fits target_bytes."""
+    for quality in JPEG_QUALITIES:
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=quality, optimize=True)
+        if buffer.tell() <= target_bytes:
+            break
+    return buffer.getvalue()
+
+
+def prepare_image(data, mime_type, max_side=None, target_bytes=None):
+    """
+    Turn a photo into what the model needs: upright (EXIF orientation
+    applied), no longer than `max_side` on either side and re-encoded as
+    JPEG under `target_bytes`, shrinking further if quality alone is not
+    enough. Images already within both limits are returned unchanged.
+
+    Args:
+        data (bytes): Uploaded image
+        mime_type (str): Its MIME type
+        max_side (int): Defaults to AI_IMAGE_MAX_SIDE
+        target_bytes (int): Defaults to AI_IMAGE_TARGET_BYTES
+
+    Returns:
+        tuple: (bytes, mime type); the original data if it cannot be decoded
+    """
+    # Pillow is only loaded once an image submission is evaluated.
+    from PIL import Image, ImageOps
+
+    max_side = max_side or settings.AI_IMAGE_MAX_SIDE
+    target_bytes = target_bytes or settings.AI_IMAGE_TARGET_BYTES
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        rotated = image.getexif().get(0x0112, 1) != 1
+
+        if not rotated and max(image.size) <= max_side and len(data) <= target_bytes:
+            return data, mime_type
+
+        # Let the JPEG decoder scale down while decoding, far cheaper than
+        # decoding every pixel of a phone photo and resizing afterwards.
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        side = max_side
+        while True:
+            image.thumbnail((side, side), Image.LANCZOS)
+            encoded = encode_jpeg(image, target_bytes)
+            if len(encoded) <= target_bytes or side <= MIN_SIDE:
+                return encoded, 'image/jpeg'
+            side = max(int(side * 0.75), MIN_SIDE)
+
+    except Exception:
+        return data, mime_type
+
+
+def prepared_image_name(source):
+    """Storage name of the resized variant of `source` at the current limits."""
+    name = source.name if isinstance(source, File) else source.split('?')[0]
+    payload = f'{name}:{settings.AI_IMAGE_MAX_SIDE}:{settings.AI_IMAGE_TARGET_BYTES}'
+    return PREPARED_IMAGE_DIR + hashlib.sha256(payload.encode()).hexdigest() + '.jpg'
+
+
+def load_model_image(source, mime_type):
+    """
+    The prepare_image() variant of an image submission. Resized images are
+    saved to the submission's storage (default_storage for URLs and
+    paths), shared by the web and feedback workers, so repeat suggestions
+    for the same submission neither download the original nor resize it
+    again. Images that need no resizing are read as they are.
+
+    Returns:
+        tuple: (bytes, mime type)
+    """
+    name = prepared_image_name(source)
+    storage = getattr(source, 'storage', None) or default_storage
+
+    if storage.exists(name):
+        with storage.open(name, 'rb') as prepared:
+            return prepared.read(), 'image/jpeg'
+
+    data = read_submission_file(source)
+    prepared = prepare_image(data, mime_type)
+    if prepared[0] is not data:
+        storage.save(name, ContentFile(prepared[0]))
+    return prepared
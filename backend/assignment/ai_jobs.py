@@ -0,0 +1,240 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from assignment.ai_cache import feedback_cache_key, get_cached_feedback, store_feedback
+from assignment.ai_utils import generate_submission_feedback, parse_feedback
+from assignment.models.ai_feedback import AIFeedbackJob
+from assignment.models.submission import AssignmentSubmission
+
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (AIFeedbackJob.STATUS_QUEUED, AIFeedbackJob.STATUS_RUNNING)
+
+
+def submission_feedback_args(submission):
+    """
+    Keyword arguments for get_submission_feedback for a submission. The
+    file is passed as the stored file so it is streamed from the storage
+    backend rather than downloaded through its presigned URL.
+    """
+    return {
+        'assignment_title': submission.assignment.title,
+        'assignment_desc': submission.assignment.description or "No specific criteria provided",
+        'student_answer': submission.answer_text or "",
+        'assignment_max_marks': submission.assignment.max_marks,
+        'file_path': submission.answer_file or None,
+    }
+
+
+def enqueue_feedback_job(submission, teacher, bypass_cache=False):
+    """
+    Queue AI feedback for a submission. A job that is already queued or
+    running for the same submission is reused instead of queueing a
+    duplicate.
+
+    Returns:
+        tuple: (AIFeedbackJob, created)
+    """
+    job = submission.ai_feedback_jobs.filter(
+        status__in=ACTIVE_STATUSES
+    ).order_by('-created_at').first()
+
+    if job:
+        return job, False
+
+    return AIFeedbackJob.objects.create(
+        submission=submission,
+        requested_by=teacher,
+        bypass_cache=bypass_cache
+    ), True
+
+
+def enqueue_pregrade_job(submission_id):
+    """
+    Queue speculative feedback for a new submission of an ai_pregrade
+    assignment, charged to the assignment's teacher. Nothing is queued
+    when the feedback is already cached (it is stored straight away), a
+    job is already active, or the teacher has used up
+    AI_PREGRADE_DAILY_BUDGET speculative jobs today.
+
+    Returns:
+        AIFeedbackJob: The queued job, or None
+    """
+    submission = AssignmentSubmission.objects.select_related(
+        'assignment__teacher').get(id=submission_id)
+    teacher = submission.assignment.teacher
+
+    cached = get_cached_feedback(feedback_cache_key(submission))
+    if cached is not None:
+        store_submission_feedback(submission, cached)
+        return None
+
+    if submission.ai_feedback_jobs.filter(status__in=ACTIVE_STATUSES).exists():
+        return None
+
+    used = AIFeedbackJob.objects.filter(
+        requested_by=teacher,
+        speculative=True,
+        created_at__gte=timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    ).count()
+
+    if used >= settings.AI_PREGRADE_DAILY_BUDGET:
+        logger.info(
+            f"Pre-grading skipped for submission {submission.id}: teacher "
+            f"{teacher.id} used {used} of {settings.AI_PREGRADE_DAILY_BUDGET} today"
+        )
+        return None
+
+    return AIFeedbackJob.objects.create(
+        submission=submission,
+        requested_by=teacher,
+        speculative=True
+    )
+
+
+def claim_next_job():
+    """
+    Move the oldest queued job to running and return it, or None when the
+    queue is empty. Teacher requests are claimed before speculative jobs,
+    and speculative jobs only while fewer than AI_PREGRADE_MAX_CONCURRENT
+    of them are running. Concurrent workers never pick up the same job.
+    """
+    job_id = claim_teacher_job() or claim_speculative_job()
+    if job_id is None:
+        return None
+
+    return AIFeedbackJob.objects.select_related(
+        'submission__assignment'
+    ).get(id=job_id)
+
+
+def claim_teacher_job():
+    """Start the oldest queued teacher request, skipping rows another worker holds."""
+    with transaction.atomic():
+        job_id = AIFeedbackJob.objects.select_for_update(skip_locked=True).filter(
+            status=AIFeedbackJob.STATUS_QUEUED,
+            speculative=False
+        ).order_by('created_at', 'id').values_list('id', flat=True).first()
+
+        if job_id is not None:
+            start_job(job_id)
+    return job_id
+
+
+def claim_speculative_job():
+    """
+    Start the oldest queued speculative job if the cap allows. Every active
+    speculative job is locked first, so claims are serialised and the
+    running count cannot change between the check and the claim.
+    """
+    with transaction.atomic():
+        active = list(
+            AIFeedbackJob.objects.select_for_update().filter(
+                speculative=True,
+                status__in=ACTIVE_STATUSES
+            ).order_by('id').values_list('id', 'status', 'created_at')
+        )
+
+        running = sum(status == AIFeedbackJob.STATUS_RUNNING for _, status, _ in active)
+        queued = sorted(
+            (created_at, job_id)
+            for job_id, status, created_at in active
+            if status == AIFeedbackJob.STATUS_QUEUED
+        )
+        if not queued or running >= settings.AI_PREGRADE_MAX_CONCURRENT:
+            return None
+
+        job_id = queued[0][1]
+        start_job(job_id)
+    return job_id
+
+
+def start_job(job_id):
+    AIFeedbackJob.objects.filter(id=job_id).update(
+        status=AIFeedbackJob.STATUS_RUNNING,
+        started_at=timezone.now(),
+        attempts=F('attempts') + 1
+    )
+
+
+def run_feedback_job(job):
+    """
+    Answer a claimed job from the feedback cache, or call the model and
+    cache the result. Failed jobs are queued again until
+    AI_FEEDBACK_JOB_MAX_ATTEMPTS is reached.
+    """
+    try:
+        key = feedback_cache_key(job.submission)
+        result = None if job.bypass_cache else get_cached_feedback(key)
+
+        if result is None:
+            result, job.prompt_size = generate_submission_feedback(
+                **submission_feedback_args(job.submission))
+            store_feedback(key, result)
+
+        store_submission_feedback(job.submission, result)
+        job.result = result
+        job.status = AIFeedbackJob.STATUS_DONE
+        job.error = ''
+    except Exception as e:
+        logger.error(f"AI feedback job {job.id} failed (attempt {job.attempts}): {e}")
+        job.error = str(e)
+        job.status = (
+            AIFeedbackJob.STATUS_FAILED
+            if job.attempts >= settings.AI_FEEDBACK_JOB_MAX_ATTEMPTS
+            else AIFeedbackJob.STATUS_QUEUED
+        )
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'prompt_size', 'finished_at'])
+    return job
+
+
+def store_submission_feedback(submission, result):
+    """Save the parsed sections of `result` on the submission."""
+    parsed = parse_feedback(result, submission.assignment.max_marks)
+
+    submission.ai_feedback = parsed['feedback']
+    submission.ai_score = parsed['score']
+    submission.ai_issues = parsed['issues']
+    submission.ai_suggestions = parsed['suggestions']
+    submission.ai_feedback_at = timezone.now()
+
+    AssignmentSubmission.objects.filter(id=submission.id).update(
+        ai_feedback=submission.ai_feedback,
+        ai_score=submission.ai_score,
+        ai_issues=submission.ai_issues,
+        ai_suggestions=submission.ai_suggestions,
+        ai_feedback_at=submission.ai_feedback_at
+    )
+
+
+def requeue_stale_jobs():
+    """
+    Recover jobs left running by a worker that died: queue them again, or
+    fail them once they are out of attempts.
+
+    Returns:
+        int: Number of jobs recovered
+    """
+    stale = AIFeedbackJob.objects.filter(
+        status=AIFeedbackJob.STATUS_RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=settings.AI_FEEDBACK_JOB_TIMEOUT)
+    )
+
+    failed = stale.filter(
+        attempts__gte=settings.AI_FEEDBACK_JOB_MAX_ATTEMPTS
+    ).update(
+        status=AIFeedbackJob.STATUS_FAILED,
+        error='Timed out waiting for the worker.',
+        finished_at=timezone.now()
+    )
+    requeued = stale.update(status=AIFeedbackJob.STATUS_QUEUED)
+
+    return failed + requeued
@@ -0,0 +1,277 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+PROVIDERS = {
+    'gemini': 'assignment.ai_providers.GeminiProvider',
+    'stub': 'assignment.ai_providers.StubProvider',
+}
+
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+class ProviderError(Exception):
+    pass
+
+
+class ProviderUnavailable(ProviderError):
+    """Raised without calling the provider: breaker open or no free slot."""
+
+
+class GeminiProvider:
+    """
+    Google Gemini through google-genai. The SDK client is created on
+    first use, and every request carries its own timeout.
+    """
+
+    def __init__(self):
+        self.client = None
+
+    def get_client(self):
+        if self.client is None:
+            import google.genai as genai
+            self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        return self.client
+
+    def config(self, timeout):
+        return {'http_options': {'timeout': int(timeout * 1000)}}
+
+    def generate(self, contents, timeout):
+        response = self.get_client().models.generate_content(
+            model=settings.AI_FEEDBACK_MODEL,
+            contents=contents,
+            config=self.config(timeout)
+        )
+        return response.text
+
+    def stream(self, contents, timeout):
+        for chunk in self.get_client().models.generate_content_stream(
+            model=settings.AI_FEEDBACK_MODEL,
+            contents=contents,
+            config=self.config(timeout)
+        ):
+            if chunk.text:
+                yield chunk.text
+
+    def is_retryable(self, error):
+        import httpx
+        from google.genai import errors
+
+        if isinstance(error, errors.APIError):
+            return error.code in RETRYABLE_STATUS_CODES
+        return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+class StubProvider:
+    """
+    Deterministic local provider (AI_FEEDBACK_PROVIDER = "stub").
+
+    Answers every prompt with the same text in the format the evaluation
+    prompt asks for, after `latency` seconds (AI_STUB_LATENCY by
+    default), without any network access. A latency beyond the call's
+    timeout raises TimeoutError, as a slow upstream would. Used for
+    development, tests and offline load tests.
+    """
+
+    text = (
+        "Feedback: The submission addresses the main requirements.\n"
+        "Score: 7\n"
+        "Issues: None\n"
+        "Suggestions: Add more detail to the explanation."
+    )
+
+    def __init__(self, latency=None):
+        self.latency = settings.AI_STUB_LATENCY if latency is None else latency
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def wait(self, seconds, timeout):
+        if seconds > timeout:
+            time.sleep(max(timeout, 0))
+            raise TimeoutError(f'No response within {timeout:.1f} seconds.')
+        if seconds:
+            time.sleep(seconds)
+
+    def generate(self, contents, timeout):
+        with self.lock:
+            self.calls.append(contents)
+        self.wait(self.latency, timeout)
+        return self.text
+
+    def stream(self, contents, timeout):
+        """Yield the answer line by line, spreading the latency."""
+        with self.lock:
+            self.calls.append(contents)
+        lines = self.text.splitlines(keepends=True)
+        started = time.monotonic()
+        for line in lines:
+            self.wait(self.latency / len(lines), timeout - (time.monotonic() - started))
+            yield line
+
+    def is_retryable(self, error):
+        return isinstance(error, TimeoutError)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive retryable failures. While open,
+    calls fail at once; after `reset_after` seconds a single trial call
+    is let through, which closes the breaker on success or re-opens it.
+    """
+
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self, claim=True):
+        """
+        Raise ProviderUnavailable while open or while another call is the
+        half-open trial. Otherwise a half-open breaker makes this call the
+        trial when `claim` is set, and record() must follow it.
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return
+
+            remaining = self.reset_after - (time.monotonic() - self.opened_at)
+            if remaining > 0 or self.probing:
+                raise ProviderUnavailable(
+                    f'AI provider unavailable after repeated failures; '
+                    f'retrying in {max(remaining, 0):.0f}s.'
+                )
+            if claim:
+                self.probing = True
+
+    def record(self, success):
+        with self.lock:
+            self.probing = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class ResilientProvider:
+    """
+    Wraps a provider with what a remote model needs:
+
+    - a deadline per call (`deadline` seconds, retries included), passed
+      down as each attempt's timeout;
+    - up to `max_retries` retries of retryable errors, sleeping a random
+      0..backoff * 2^attempt seconds (full jitter) in between;
+    - a CircuitBreaker shared by all calls in the process;
+    - at most `max_concurrency` calls in flight in the process; callers
+      wait for a slot until their deadline.
+
+    Streams are only retried before their first chunk.
+    """
+
+    def __init__(self, provider, deadline=None, max_retries=None, backoff=None,
+                 max_concurrency=None, breaker=None):
+        self.provider = provider
+        self.deadline = deadline or settings.AI_PROVIDER_DEADLINE
+        self.max_retries = settings.AI_PROVIDER_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.AI_PROVIDER_BACKOFF if backoff is None else backoff
+        self.slots = threading.BoundedSemaphore(
+            max_concurrency or settings.AI_PROVIDER_MAX_CONCURRENCY)
+        self.breaker = breaker or CircuitBreaker(
+            settings.AI_PROVIDER_BREAKER_THRESHOLD,
+            settings.AI_PROVIDER_BREAKER_RESET
+        )
+
+    def available(self):
+        return self.breaker.state != 'open'
+
+    def generate(self, contents, timeout=None):
+        deadline_at = time.monotonic() + (self.deadline if timeout is None else timeout)
+        self.acquire(deadline_at)
+        try:
+            return self.attempt(
+                lambda remaining: self.provider.generate(contents, remaining), deadline_at)
+        finally:
+            self.slots.release()
+
+    def stream(self, contents, timeout=None):
+        deadline_at = time.monotonic() + (self.deadline if timeout is None else timeout)
+        self.acquire(deadline_at)
+        try:
+            def first_chunk(remaining):
+                chunks = self.provider.stream(contents, remaining)
+                return chunks, next(chunks, None)
+
+            chunks, chunk = self.attempt(first_chunk, deadline_at)
+            while chunk is not None:
+                yield chunk
+                if time.monotonic() > deadline_at:
+                    raise ProviderError(f'AI provider did not finish within {self.deadline}s.')
+                chunk = next(chunks, None)
+        finally:
+            self.slots.release()
+
+    def acquire(self, deadline_at):
+        # Fail fast while open, but leave the half-open trial to attempt():
+        # a call that never gets a slot must not hold it.
+        self.breaker.before_call(claim=False)
+        if not self.slots.acquire(timeout=max(deadline_at - time.monotonic(), 0)):
+            raise ProviderUnavailable('Too many AI requests in progress; try again shortly.')
+
+    def attempt(self, call, deadline_at):
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise ProviderError('AI provider deadline exceeded.')
+
+            # Nothing may raise between claiming the trial and record().
+            self.breaker.before_call()
+            try:
+                result = call(remaining)
+            except Exception as e:
+                retryable = self.provider.is_retryable(e)
+                # Client errors (bad request, auth) mean the provider is up.
+                self.breaker.record(not retryable)
+
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                if (not retryable or attempt == self.max_retries
+                        or time.monotonic() + delay >= deadline_at):
+                    raise ProviderError(
+                        f'AI provider failed after {attempt + 1} attempt(s): {e}') from e
+                time.sleep(delay)
+            else:
+                self.breaker.record(True)
+                return result
+
+
+def get_provider():
+    """
+    The process-wide ResilientProvider around AI_FEEDBACK_PROVIDER, which
+    is "gemini", "stub" or the dotted path of a provider class.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            name = settings.AI_FEEDBACK_PROVIDER
+            _provider = ResilientProvider(import_string(PROVIDERS.get(name, name))())
+    return _provider
@@ -1,12 +1,24 @@
+import logging
 import os
-import google.genai as genai
-from django.conf import settings
+import re
+import time
+from collections import namedtuple
 import mimetypes
-import requests
-import base64
 
+from assignment.ai_extract import extract_text, prompt_size, truncate_to_budget
+from assignment.ai_files import file_name, read_submission_file
+from assignment.ai_images import load_model_image
+from assignment.ai_providers import get_provider
 
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
+
+logger = logging.getLogger(__name__)
+
+PromptFrame = namedtuple('PromptFrame', ['header', 'instructions'])
+
+FEEDBACK_SECTION = re.compile(
+    r'^[\s*#-]*(Feedback|Score|Issues|Suggestions)\s*\**\s*:\s*\**\s*(.*)$',
+    re.IGNORECASE
+)
 
 
 def get_submission_feedback(assignment_title, assignment_desc, student_answer, assignment_max_marks=100, file_path=None):
@@ -18,13 +30,87 @@ def get_submission_feedback(assignment_title, assignment_desc, student_answer, a
         assignment_desc (str): Assignment requirements/criteria
         student_answer (str): Student's text answer (optional)
         assignment_max_marks (int): Maximum marks for the assignment (default: 100)
-        file_path (str): Path to student's uploaded file (optional)
+        file_path (str or File): Student's uploaded file, as a stored file,
+            URL or local path (optional)
     
     Returns:
         str: AI-generated feedback with score, issues, and suggestions
     """
+    try:
+        feedback, _ = generate_submission_feedback(
+            assignment_title, assignment_desc, student_answer,
+            assignment_max_marks, file_path
+        )
+        return feedback
+
+    except Exception as e:
+        return f"AI Feedback unavailable: {str(e)}"
+
+
+def generate_submission_feedback(assignment_title, assignment_desc, student_answer, assignment_max_marks=100, file_path=None, frame=None, provider=None, timeout=None):
+    """
+    Same as get_submission_feedback, but model errors are raised instead
+    of being returned as feedback text. `frame` is a prebuilt PromptFrame
+    and `provider` a ResilientProvider overriding get_provider().
+    `timeout` bounds the whole call in seconds, file reading included;
+    what is left of it is the model call's deadline (AI_PROVIDER_DEADLINE
+    when not given).
+
+    Returns:
+        tuple: (feedback text, prompt size dict as returned by prompt_size)
+    """
+    started = time.monotonic()
+    content_parts = build_feedback_contents(
+        assignment_title, assignment_desc, student_answer,
+        assignment_max_marks, file_path, frame
+    )
+
+    size = log_prompt_size(content_parts)
+
+    if timeout is not None:
+        timeout = max(timeout - (time.monotonic() - started), 0)
+    return (provider or get_provider()).generate(content_parts, timeout=timeout), size
+
+
+def stream_submission_feedback(assignment_title, assignment_desc, student_answer, assignment_max_marks=100, file_path=None, frame=None, provider=None):
+    """
+    Streaming form of generate_submission_feedback. The prompt is built
+    straight away; the model is only called once the chunks are iterated.
+    Model errors are raised.
+
+    Returns:
+        tuple: (prompt size dict, iterator of text chunks as the model
+            produces them)
+    """
+    content_parts = build_feedback_contents(
+        assignment_title, assignment_desc, student_answer,
+        assignment_max_marks, file_path, frame
+    )
+
+    size = log_prompt_size(content_parts)
 
-    prompt = f"""
+    return size, (provider or get_provider()).stream(content_parts)
+
+
+def log_prompt_size(content_parts):
+    size = prompt_size(content_parts)
+    logger.info(
+        "AI feedback prompt: %(chars)d chars (~%(tokens)d tokens), "
+        "%(inline_bytes)d inline bytes", size
+    )
+    return size
+
+
+def build_prompt_frame(assignment_title, assignment_desc, assignment_max_marks=100):
+    """
+    The assignment-level parts of the prompt, identical for every
+    submission of an assignment, so batch grading builds them once.
+
+    Returns:
+        PromptFrame: Header placed before the student's work and the
+            evaluation instructions placed after it
+    """
+    header = f"""
 You are an expert teacher evaluating student work across multiple subjects.
 **Assignment Details:**
 - Title: {assignment_title}
@@ -34,6 +120,72 @@ You are an expert teacher evaluating student work across multiple subjects.
 **Student's Work:**
 """
 
+    instructions = f"""
+**Your Task:**
+1. Evaluate work against the assignment criteria.
+2. For code: check logic, bugs, efficiency, and suggest improvements.
+3. For text: check accuracy, grammar, structure, and depth of understanding.
+4. For documents/PDFs: summarize key points and evaluate relevance and quality.
+5. For images: analyze content and evaluate against assignment requirements.
+
+**Response Format (STRICTLY FOLLOW):**
+Feedback: [2-3 specific sentences about the submission]
+Score: [Suggested score out of {assignment_max_marks}]
+Issues: [List specific issues found, or "None" if submission is good]
+Suggestions: [1-2 specific actionable points for improvement]
+"""
+
+    return PromptFrame(header, instructions)
+
+
+def parse_feedback(text, max_marks=None):
+    """
+    Split model output in the "Response Format" of build_prompt_frame into
+    its sections. Text outside any section is kept as feedback, so
+    unexpected answers are not lost.
+
+    Args:
+        text (str): Model output
+        max_marks (int): Scores are clamped to this when given
+
+    Returns:
+        dict: feedback, score (int or None), issues and suggestions
+    """
+    sections = {'feedback': [], 'score': [], 'issues': [], 'suggestions': []}
+    current = 'feedback'
+
+    for line in text.splitlines():
+        match = FEEDBACK_SECTION.match(line)
+        if match:
+            current = match.group(1).lower()
+            line = match.group(2)
+        sections[current].append(line)
+
+    parsed = {key: '\n'.join(lines).strip() for key, lines in sections.items()}
+
+    number = re.search(r'\d+(?:\.\d+)?', parsed['score'])
+    score = round(float(number.group())) if number else None
+    if score is not None and max_marks is not None:
+        score = min(score, max_marks)
+
+    if parsed['issues'].rstrip('.').lower() == 'none':
+        parsed['issues'] = ''
+
+    return {**parsed, 'score': score}
+
+
+def build_feedback_contents(assignment_title, assignment_desc, student_answer, assignment_max_marks=100, file_path=None, frame=None):
+    """
+    Build the prompt and inline file parts sent to the model.
+
+    Returns:
+        list: Content parts, the prompt text first
+    """
+    frame = frame or build_prompt_frame(
+        assignment_title, assignment_desc, assignment_max_marks)
+
+    prompt = frame.header
+
     if student_answer and student_answer.strip():
         prompt += f"\n**Text Answer:**\n{student_answer}\n"
 
@@ -41,28 +193,25 @@ You are an expert teacher evaluating student work across multiple subjects.
 
     if file_path:
         try:
-            is_url = file_path.startswith('http')
-            filename = os.path.basename(file_path).split('?')[0]
+            filename = file_name(file_path)
             mime_type, _ = mimetypes.guess_type(filename)
             ext = os.path.splitext(filename)[1].lower()
 
-            file_data = None
-            if is_url:
-                response = requests.get(file_path)
-                if response.status_code == 200:
-                    file_data = response.content
+            if mime_type and mime_type.startswith('image/'):
+                file_data, mime_type = load_model_image(file_path, mime_type)
             else:
-                if os.path.exists(file_path):
-                    with open(file_path, 'rb') as f:
-                        file_data = f.read()
+                file_data = read_submission_file(file_path)
 
             if file_data:
+                extracted = extract_text(file_data, ext)
+
                 text_extensions = ('.py', '.java', '.cpp',
                                    '.c', '.js', '.html', '.css', '.txt', '.md')
 
                 # TEXT FILES (code, markdown, plain text)
                 if (mime_type and mime_type.startswith('text/')) or filename.endswith(text_extensions):
-                    decoded_text = file_data.decode('utf-8', errors='ignore')
+                    decoded_text = truncate_to_budget(
+                        file_data.decode('utf-8', errors='ignore'))
                     prompt += f"\n**Uploaded File Content ({ext}):**\n```\n{decoded_text}\n```\n"
                     content_parts = [prompt]
 
@@ -70,27 +219,28 @@ You are an expert teacher evaluating student work across multiple subjects.
                 elif mime_type and mime_type.startswith('image/'):
                     prompt += f"\n**[Image file attached: {filename}]**\n"
 
-                    encoded_image = base64.standard_b64encode(
-                        file_data).decode('utf-8')
-
+                    # Raw bytes: the SDK base64-encodes them once when it
+                    # serializes the request.
                     content_parts = [
                         prompt,
                         {
                             "inline_data": {
                                 "mime_type": mime_type,
-                                "data": encoded_image
+                                "data": file_data
                             }
                         }
                     ]
 
-                # PDF & DOCS (PDF, Word documents)
+                # PDF, WORD & EXCEL with text extracted locally
+                elif extracted is not None:
+                    prompt += f"\n**Extracted Document Content ({filename}):**\n```\n{extracted}\n```\n"
+                    content_parts = [prompt]
+
+                # PDF & DOCS the text could not be extracted from (scans,
+                # old .doc files), sent to the model as they are
                 elif ext in ['.pdf', '.doc', '.docx'] or (mime_type and mime_type in ['application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']):
                     prompt += f"\n**[Document attached: {filename}]**\n"
 
-                    # Encode PDF/Doc as base64
-                    encoded_file = base64.standard_b64encode(
-                        file_data).decode('utf-8')
-
                     # Determine correct MIME type
                     if ext == '.pdf':
                         file_mime = "application/pdf"
@@ -104,7 +254,7 @@ You are an expert teacher evaluating student work across multiple subjects.
                         {
                             "inline_data": {
                                 "mime_type": file_mime,
-                                "data": encoded_file
+                                "data": file_data
                             }
                         }
                     ]
@@ -117,21 +267,7 @@ You are an expert teacher evaluating student work across multiple subjects.
             prompt += f"\n**[Error processing file: {str(e)}]**\n"
             content_parts = [prompt]
 
-    # Evaluation prompt with dynamic max marks
-    evaluation_prompt = f"""
-**Your Task:**
-1. Evaluate work against the assignment criteria.
-2. For code: check logic, bugs, efficiency, and suggest improvements.
-3. For text: check accuracy, grammar, structure, and depth of understanding.
-4. For documents/PDFs: summarize key points and evaluate relevance and quality.
-5. For images: analyze content and evaluate against assignment requirements.
-
-**Response Format (STRICTLY FOLLOW):**
-Feedback: [2-3 specific sentences about the submission]
-Score: [Suggested score out of {assignment_max_marks}]
-Issues: [List specific issues found, or "None" if submission is good]
-Suggestions: [1-2 specific actionable points for improvement]
-"""
+    evaluation_prompt = frame.instructions
 
     # Append evaluation prompt to first content part
     if isinstance(content_parts[0], str):
@@ -139,13 +275,4 @@ Suggestions: [1-2 specific actionable points for improvement]
     else:
         content_parts[0] = content_parts[0] + evaluation_prompt
 
-    try:
-        # Generate content using Gemini API
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=content_parts
-        )
-        return response.text
-
-    except Exception as e:
-        return f"AI Feedback unavailable: {str(e)}"
+    return content_parts
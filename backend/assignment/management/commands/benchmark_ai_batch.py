@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assignment.ai_batch import grade_submissions
+from assignment.ai_providers import ResilientProvider, StubProvider
+from assignment.models import Assignment, AssignmentSubmission
+
+
+class Command(BaseCommand):
+    help = (
+        'Time batch AI grading against the local stub provider, simulating '
+        'model latency, for several concurrency caps. Touches no database '
+        'rows and makes no network calls.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=40)
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.5,
+            help='Simulated seconds per model call.'
+        )
+        parser.add_argument(
+            '--workers',
+            default='1,2,4,8',
+            help='Comma-separated concurrency caps to compare.'
+        )
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        assignment = Assignment(
+            id=1,
+            title='Benchmark assignment',
+            description='Explain the water cycle in your own words.',
+            max_marks=10
+        )
+        submissions = [
+            AssignmentSubmission(
+                id=index,
+                assignment=assignment,
+                answer_text=f'Answer {index}: ' + 'evaporation, condensation, precipitation. ' * 20
+            )
+            for index in range(1, options['submissions'] + 1)
+        ]
+
+        serial = options['latency'] * len(submissions)
+        self.stdout.write(
+            f"{len(submissions)} submissions, {options['latency']}s simulated latency "
+            f"(serial estimate {serial:.2f}s)"
+        )
+
+        for workers in [int(value) for value in options['workers'].split(',')]:
+            provider = ResilientProvider(
+                StubProvider(latency=options['latency']),
+                max_concurrency=workers
+            )
+
+            started = time.perf_counter()
+            first = None
+            statuses = {}
+            for result in grade_submissions(
+                assignment, submissions,
+                max_workers=workers,
+                timeout=options['timeout'],
+                use_cache=False,
+                provider=provider
+            ):
+                first = first or time.perf_counter() - started
+                statuses[result['status']] = statuses.get(result['status'], 0) + 1
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f"workers={workers:<3} total={elapsed:.2f}s first_result={first:.2f}s "
+                f"speedup={serial / elapsed:.1f}x {statuses}"
+            )
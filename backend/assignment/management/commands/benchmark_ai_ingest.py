@@ -0,0 +1,112 @@
+import base64
+import os
+import resource
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from google.genai import types
+
+from assignment.ai_files import FileTooLarge, read_submission_file
+from assignment.models import AssignmentSubmission
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Refused downloads close the connection mid-transfer.
+        pass
+
+
+def legacy_read(url):
+    """The previous ingestion: un-pooled GET, whole body, base64 copy."""
+    response = requests.get(url)
+    return base64.standard_b64encode(response.content).decode('utf-8')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare peak memory and latency of reading submission files for AI '
+        'feedback: the old requests.get + base64 path against streaming from '
+        'a pooled URL session and from a local file storage standing in for '
+        'S3. Files are served from a temporary directory on localhost.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='0.5,2,5,20',
+            help='Comma-separated file sizes in MB; sizes over the cap are refused.'
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        storage = FileSystemStorage(location=directory)
+        field = AssignmentSubmission._meta.get_field('answer_file')
+
+        server = QuietServer(
+            ('127.0.0.1', 0), partial(QuietHandler, directory=directory))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}/'
+
+        try:
+            for size_mb in [float(value) for value in options['sizes'].split(',')]:
+                name = f'submission-{size_mb}mb.pdf'
+                with open(os.path.join(directory, name), 'wb') as handle:
+                    handle.write(os.urandom(int(size_mb * 1024 * 1024)))
+
+                stored = field.attr_class(None, field, name)
+                stored.storage = storage
+
+                self.stdout.write(f'{size_mb} MB file')
+                for label, read in (
+                    ('legacy  ', partial(legacy_read, base_url + name)),
+                    ('url     ', partial(read_submission_file, base_url + name)),
+                    ('storage ', partial(read_submission_file, stored)),
+                ):
+                    self.stdout.write(f'  {label}{self.measure(read, options["repeat"])}')
+        finally:
+            server.shutdown()
+            server.server_close()
+            shutil.rmtree(directory)
+
+        self.stdout.write(
+            f'process max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB')
+
+    def measure(self, read, repeat):
+        timings = []
+        peaks = []
+        outcome = 'ok'
+
+        for _ in range(repeat):
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                data = read()
+                # Build the part as the SDK does before sending it.
+                types.Part.model_validate(
+                    {'inline_data': {'mime_type': 'application/pdf', 'data': data}})
+                del data
+            except FileTooLarge:
+                outcome = 'refused'
+            timings.append(time.perf_counter() - started)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        return (
+            f'median={statistics.median(timings) * 1000:7.1f}ms '
+            f'peak={max(peaks) / (1024 * 1024):6.1f}MB {outcome}'
+        )
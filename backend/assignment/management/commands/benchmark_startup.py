@@ -0,0 +1,118 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Run in a fresh interpreter: boots the WSGI application the way a worker
+# does, then serves a single request.
+BOOT_SCRIPT = '''
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+booted = time.perf_counter()
+
+from wsgiref.util import setup_testing_defaults
+environ = {"PATH_INFO": sys.argv[1], "HTTP_HOST": sys.argv[2]}
+setup_testing_defaults(environ)
+statuses = []
+response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b"".join(response)
+response.close()
+served = time.perf_counter()
+
+print(json.dumps({
+    "boot": booted - started,
+    "first_request": served - started,
+    "status": statuses[0],
+    "modules": [name for name in sys.argv[3].split(",") if name in sys.modules],
+}))
+'''
+
+# SDKs that should only be imported by the code paths that use them.
+WATCHED_MODULES = ('boto3', 'google.genai', 'sendgrid', 'requests', 'PIL', 'pypdf', 'numpy')
+
+
+def parse_importtime(stderr):
+    """Self time in microseconds of every import, keyed by module name."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(self_us)
+    return timings
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure worker startup: total `python -X importtime` import time, '
+        'the heaviest top-level packages and time-to-first-request for a '
+        'freshly booted WSGI application, each in a new interpreter.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--path',
+            default='/',
+            help='Request path of the first request.'
+        )
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'core.settings'))
+
+        runs = []
+        packages = defaultdict(list)
+        for _ in range(options['repeat']):
+            process = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT,
+                 options['path'], host, ','.join(WATCHED_MODULES)],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True
+            )
+            if process.returncode:
+                raise CommandError(process.stderr.strip().splitlines()[-1])
+
+            run = json.loads(process.stdout.strip().splitlines()[-1])
+            timings = parse_importtime(process.stderr)
+            run['imports'] = sum(timings.values()) / 1e6
+            runs.append(run)
+
+            totals = defaultdict(int)
+            for name, self_us in timings.items():
+                totals[name.split('.')[0]] += self_us
+            for name, self_us in totals.items():
+                packages[name].append(self_us / 1000)
+
+        def median(key):
+            return statistics.median(run[key] for run in runs) * 1000
+
+        self.stdout.write(
+            f"{options['repeat']} runs, first request GET {options['path']} -> {runs[0]['status']}")
+        self.stdout.write(f"  import time      median={median('imports'):7.1f}ms")
+        self.stdout.write(f"  boot             median={median('boot'):7.1f}ms")
+        self.stdout.write(f"  first request    median={median('first_request'):7.1f}ms")
+
+        self.stdout.write(f"heaviest packages (self time, median):")
+        ranked = sorted(
+            ((statistics.median(values), name) for name, values in packages.items()),
+            reverse=True
+        )
+        for elapsed, name in ranked[:options['top']]:
+            self.stdout.write(f'  {name:<24}{elapsed:7.1f}ms')
+
+        self.stdout.write(
+            'loaded at first request: ' + (', '.join(runs[0]['modules']) or 'none'))
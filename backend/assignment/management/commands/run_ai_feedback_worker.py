@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from assignment.ai_jobs import claim_next_job, requeue_stale_jobs, run_feedback_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued AI feedback jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls of an empty queue.'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            help='Exit after processing this many jobs.'
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+
+        while options['max_jobs'] is None or processed < options['max_jobs']:
+            close_old_connections()
+            requeue_stale_jobs()
+
+            job = claim_next_job()
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            job = run_feedback_job(job)
+            processed += 1
+            self.stdout.write(f'Job {job.id} (submission {job.submission_id}): {job.status}')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0002_alter_teacher_id'),
+        ('assignment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIFeedbackJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('result', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_feedback_jobs', to='teacher.teacher')),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_feedback_jobs', to='assignment.assignmentsubmission')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='assignment__status_17445d_idx'), models.Index(fields=['submission', 'status'], name='assignment__submiss_fb8b81_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0002_aifeedbackjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aifeedbackjob',
+            name='bypass_cache',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='answer_file_digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='AIFeedbackCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model', models.CharField(max_length=100)),
+                ('result', models.TextField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='assignment__last_us_fa0f33_idx'), models.Index(fields=['created_at'], name='assignment__created_2a91d1_idx')],
+            },
+        ),
+    ]
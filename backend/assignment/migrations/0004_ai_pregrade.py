@@ -0,0 +1,52 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0003_aifeedbackcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aifeedbackjob',
+            name='speculative',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='ai_pregrade',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='ai_feedback',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='ai_feedback_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='ai_issues',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='ai_score',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='ai_suggestions',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='aifeedbackjob',
+            index=models.Index(fields=['requested_by', 'speculative', 'created_at'], name='assignment__request_13aa03_idx'),
+        ),
+    ]
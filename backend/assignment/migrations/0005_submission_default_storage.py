@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0004_ai_pregrade'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignmentsubmission',
+            name='answer_file',
+            field=models.FileField(blank=True, null=True, upload_to='assignments/submissions/'),
+        ),
+    ]
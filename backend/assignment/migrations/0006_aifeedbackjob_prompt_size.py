@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0005_submission_default_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aifeedbackjob',
+            name='prompt_size',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -1,2 +1,3 @@
 from .assignment import Assignment
-from .submission import AssignmentSubmission
\ No newline at end of file
+from .submission import AssignmentSubmission
+from .ai_feedback import AIFeedbackJob, AIFeedbackCache
\ No newline at end of file
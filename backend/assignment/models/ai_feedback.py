@@ -0,0 +1,91 @@
+from django.db import models
+
+
+class AIFeedbackJob(models.Model):
+    """
+    A queued request for AI feedback on a submission.
+
+    Created by AISuggestionView and processed outside the request cycle by
+    the `run_ai_feedback_worker` command, so request workers never wait on
+    the model.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    submission = models.ForeignKey(
+        'assignment.AssignmentSubmission',
+        on_delete=models.CASCADE,
+        related_name='ai_feedback_jobs'
+    )
+    requested_by = models.ForeignKey(
+        'teacher.Teacher',
+        on_delete=models.CASCADE,
+        related_name='ai_feedback_jobs'
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED
+    )
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    # chars, tokens and inline_bytes of the prompt sent to the model (see
+    # prompt_size); empty when the job was answered from the cache.
+    prompt_size = models.JSONField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Set for ?refresh=1 requests: call the model even on a cache hit.
+    bypass_cache = models.BooleanField(default=False)
+    # Queued on submission for an ai_pregrade assignment rather than by a
+    # teacher; claimed after teacher requests and under their own caps.
+    speculative = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['submission', 'status']),
+            models.Index(fields=['requested_by', 'speculative', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} - submission {self.submission_id} ({self.status})"
+
+
+
+class AIFeedbackCache(models.Model):
+    """
+    Stored model output keyed by a hash of everything that went into the
+    prompt (see assignment.ai_cache.feedback_cache_key), so identical
+    requests are answered without calling the model again.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    result = models.TextField()
+    size = models.PositiveIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_used_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.key[:12]} ({self.model}, {self.hits} hits)"
@@ -23,6 +23,9 @@ class Assignment(models.Model):
     max_marks = models.PositiveIntegerField()
     
     is_active = models.BooleanField(default=True)
+    # Queue AI feedback for every new submission, so it is ready when the
+    # teacher opens the grading screen.
+    ai_pregrade = models.BooleanField(default=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
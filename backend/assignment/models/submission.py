@@ -1,10 +1,7 @@
 from django.db import models
-from storages.backends.s3boto3 import S3Boto3Storage
 
 
 class AssignmentSubmission(models.Model):
-    s3_storage = S3Boto3Storage()
-    
     assignment = models.ForeignKey(
         'assignment.Assignment',
         on_delete= models.CASCADE,
@@ -17,18 +14,28 @@ class AssignmentSubmission(models.Model):
     )
     
     answer_text = models.TextField(blank=True)
+    # Stored on default_storage (S3Boto3Storage, see DEFAULT_FILE_STORAGE),
+    # which is only set up, and boto3 imported, when a file is accessed.
     answer_file = models.FileField(
         upload_to="assignments/submissions/",
-        storage=s3_storage,
         blank=True,
         null=True
     )
+    # sha256 of the uploaded file, part of the AI feedback cache key.
+    answer_file_digest = models.CharField(max_length=64, blank=True)
     
     marks_obtained = models.PositiveIntegerField(
         blank=True,
         null=True
     )
     teacher_feedback = models.TextField(blank=True)
+
+    # Latest AI feedback, split into the sections of the evaluation prompt.
+    ai_feedback = models.TextField(blank=True)
+    ai_score = models.PositiveIntegerField(blank=True, null=True)
+    ai_issues = models.TextField(blank=True)
+    ai_suggestions = models.TextField(blank=True)
+    ai_feedback_at = models.DateTimeField(blank=True, null=True)
     
     submitted_at = models.DateTimeField(auto_now_add=True)
     evaluated_at = models.DateTimeField(blank=True, null=True)
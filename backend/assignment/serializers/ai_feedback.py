@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from assignment.models.ai_feedback import AIFeedbackJob
+
+
+class AIFeedbackJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source='id', read_only=True)
+    suggestion = serializers.CharField(source='result', read_only=True)
+
+    class Meta:
+        model = AIFeedbackJob
+        fields = [
+            'job_id',
+            'submission_id',
+            'status',
+            'suggestion',
+            'error',
+            'prompt_size',
+            'attempts',
+            'speculative',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
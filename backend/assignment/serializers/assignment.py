@@ -14,6 +14,7 @@ class AssignmentCreateSerializer(serializers.ModelSerializer):
             'description',
             'due_date',
             'max_marks',
+            'ai_pregrade',
         ]
     
     def validate(self, attrs):
@@ -94,8 +95,9 @@ class StudentAssignmentListSerializer(serializers.ModelSerializer):
     subject_name = serializers.CharField(source='subject.name', read_only=True)
     classroom_name = serializers.CharField(source='classroom.name', read_only=True)
     
-    is_submitted = serializers.SerializerMethodField()
-    marks_obtained = serializers.SerializerMethodField()
+    # Annotated on the queryset by AssignmentListView.
+    is_submitted = serializers.BooleanField(read_only=True)
+    marks_obtained = serializers.IntegerField(read_only=True, allow_null=True)
 
     class Meta:
         model = Assignment
@@ -111,12 +113,3 @@ class StudentAssignmentListSerializer(serializers.ModelSerializer):
             'is_submitted',
             'marks_obtained',
         ]
-
-    def get_is_submitted(self, obj):
-        user = self.context['request'].user
-        return obj.submissions.filter(student=user.student_profile).exists()
-
-    def get_marks_obtained(self, obj):
-        user = self.context['request'].user
-        submission = obj.submissions.filter(student=user.student_profile).first()
-        return submission.marks_obtained if submission else None
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from assignment.models.submission import AssignmentSubmission
+from assignment.ai_cache import file_digest
 from django.utils import timezone
 from django.conf import settings
 import os
@@ -64,6 +65,10 @@ class AssignmentSubmissionCreateSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
+        answer_file = validated_data.get('answer_file')
+        if answer_file:
+            validated_data['answer_file_digest'] = file_digest(answer_file)
+
         return AssignmentSubmission.objects.create(
             assignment=self.context['assignment'],
             student=self.context['student'],
@@ -125,6 +130,19 @@ class AssignmentSubmissionListSerializer(serializers.ModelSerializer):
         return None
 
 
+class TeacherSubmissionListSerializer(AssignmentSubmissionListSerializer):
+    """Submission list for teachers, with any pre-generated AI feedback."""
+
+    class Meta(AssignmentSubmissionListSerializer.Meta):
+        fields = AssignmentSubmissionListSerializer.Meta.fields + [
+            'ai_feedback',
+            'ai_score',
+            'ai_issues',
+            'ai_suggestions',
+            'ai_feedback_at',
+        ]
+
+
 class AssignmentSubmissionEvaluateSerializer(serializers.ModelSerializer):
     class Meta:
         model = AssignmentSubmission
@@ -1,11 +1,20 @@
+import logging
+from functools import partial
+
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models.assignment import Assignment
 from .models.submission import AssignmentSubmission
+from .ai_jobs import enqueue_pregrade_job
 from student.models import Student
+from student.risk import refresh_student_risk_after_commit
 from notifications.models import Notification
 
 
+logger = logging.getLogger(__name__)
+
+
 @receiver(post_save, sender=Assignment)
 def notify_students_new_assignment(sender, instance, created, **kwargs):
     if created:
@@ -39,4 +48,27 @@ def notify_teacher_new_assignment_submission(sender, instance, created, **kwargs
                 f"at {instance.submitted_at.strftime('%Y-%m-%d %H:%M')}. "
                 "Waiting for your evaluation."
             )            
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=AssignmentSubmission)
+def refresh_risk_on_evaluation(sender, instance, created, **kwargs):
+
+    if not created and instance.marks_obtained is not None:
+        transaction.on_commit(partial(refresh_student_risk_after_commit, [instance.student_id]))
+
+
+@receiver(post_save, sender=AssignmentSubmission)
+def queue_ai_pregrade(sender, instance, created, **kwargs):
+
+    if created and instance.assignment.ai_pregrade:
+        transaction.on_commit(partial(pregrade_after_commit, instance.id))
+
+
+def pregrade_after_commit(submission_id):
+    # The submission is already saved; failing to queue its pre-grading
+    # must not turn the student's upload into an error response.
+    try:
+        enqueue_pregrade_job(submission_id)
+    except Exception as e:
+        logger.error(f"Failed to queue pre-grading for submission {submission_id}: {e}")
@@ -0,0 +1,550 @@
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import CustomUser
+from account.testing import make_student, make_user
+from assignment.ai_batch import grade_submissions
+from assignment.ai_cache import feedback_cache_key, get_cached_feedback, store_feedback
+from assignment.ai_extract import WORD_NS, extract_text
+from assignment.ai_images import load_model_image
+from assignment.ai_jobs import claim_next_job, run_feedback_job
+from assignment.ai_providers import (
+    CircuitBreaker,
+    ProviderError,
+    ProviderUnavailable,
+    ResilientProvider,
+    StubProvider,
+    get_provider,
+)
+from assignment.models import AIFeedbackCache, AIFeedbackJob, Assignment, AssignmentSubmission
+from assignment.signals import pregrade_after_commit
+from classroom.models import ClassRoom
+from subject.models import Subject
+from teacher.models import TeacherSubject
+
+
+class SchoolDataMixin:
+    """A classroom with one subject, its teacher, students and an assignment."""
+    student_count = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.classroom = ClassRoom.objects.create(grade=5, section='A')
+        cls.subject = Subject.objects.create(name='Science', classroom=cls.classroom)
+
+        cls.teacher_user = make_user('teacher', 0)
+        cls.teacher = cls.teacher_user.teacher_profile
+        TeacherSubject.objects.create(
+            teacher=cls.teacher, classroom=cls.classroom, subject=cls.subject)
+
+        cls.students = [make_student(index, cls.classroom) for index in range(cls.student_count)]
+
+        cls.assignment = cls.make_assignment('Water cycle')
+
+    @classmethod
+    def make_assignment(cls, title, **fields):
+        return Assignment.objects.create(
+            teacher=cls.teacher,
+            classroom=cls.classroom,
+            subject=cls.subject,
+            title=title,
+            description='Explain the water cycle.',
+            due_date=timezone.now() + timedelta(days=3),
+            max_marks=10,
+            **fields
+        )
+
+    def make_submission(self, student, assignment=None, **fields):
+        return AssignmentSubmission.objects.create(
+            assignment=assignment or self.assignment,
+            student=student,
+            answer_text=fields.pop('answer_text', f'Answer by {student.id}'),
+            **fields
+        )
+
+
+class ResilientProviderTests(SimpleTestCase):
+    def make_provider(self, latency=0):
+        return ResilientProvider(
+            StubProvider(latency=latency),
+            max_retries=0,
+            max_concurrency=1,
+            breaker=CircuitBreaker(threshold=1, reset_after=0.05)
+        )
+
+    def open_breaker(self, provider):
+        provider.provider.latency = 10
+        with self.assertRaises(ProviderError):
+            provider.generate(['prompt'], timeout=0.01)
+        self.assertEqual(provider.breaker.state, 'open')
+
+        time.sleep(0.06)
+        self.assertEqual(provider.breaker.state, 'half-open')
+        provider.provider.latency = 0
+
+    def test_open_breaker_fails_fast(self):
+        provider = self.make_provider()
+        provider.provider.latency = 10
+        with self.assertRaises(ProviderError):
+            provider.generate(['prompt'], timeout=0.01)
+
+        with self.assertRaises(ProviderUnavailable):
+            provider.generate(['prompt'], timeout=1)
+        self.assertEqual(len(provider.provider.calls), 1)
+
+    def test_trial_call_closes_breaker(self):
+        provider = self.make_provider()
+        self.open_breaker(provider)
+
+        self.assertEqual(provider.generate(['prompt'], timeout=1), StubProvider.text)
+        self.assertEqual(provider.breaker.state, 'closed')
+
+    def test_trial_without_slot_does_not_hold_half_open(self):
+        provider = self.make_provider()
+        self.open_breaker(provider)
+
+        provider.slots.acquire()
+        try:
+            with self.assertRaises(ProviderUnavailable):
+                provider.generate(['prompt'], timeout=0.01)
+        finally:
+            provider.slots.release()
+
+        self.assertFalse(provider.breaker.probing)
+        self.assertEqual(provider.generate(['prompt'], timeout=1), StubProvider.text)
+        self.assertEqual(provider.breaker.state, 'closed')
+
+    def test_deadline_before_trial_does_not_hold_half_open(self):
+        provider = self.make_provider()
+        self.open_breaker(provider)
+
+        with self.assertRaises(ProviderError):
+            provider.attempt(lambda remaining: 'unused', time.monotonic() - 1)
+
+        self.assertFalse(provider.breaker.probing)
+        self.assertEqual(provider.generate(['prompt'], timeout=1), StubProvider.text)
+
+    def test_stream_yields_every_line(self):
+        provider = self.make_provider()
+        self.assertEqual(''.join(provider.stream(['prompt'], timeout=1)), StubProvider.text)
+
+
+class BatchGradingTests(SimpleTestCase):
+    def grade(self, provider, count, timeout):
+        assignment = Assignment(id=1, title='Essay', description='Explain.', max_marks=10)
+        submissions = [
+            AssignmentSubmission(id=index, assignment=assignment, answer_text=f'Answer {index}')
+            for index in range(1, count + 1)
+        ]
+        return list(grade_submissions(
+            assignment, submissions,
+            max_workers=2,
+            timeout=timeout,
+            use_cache=False,
+            provider=provider
+        ))
+
+    def test_results_for_every_submission(self):
+        provider = ResilientProvider(StubProvider(latency=0), max_concurrency=2)
+        results = self.grade(provider, 3, timeout=5)
+
+        self.assertEqual(sorted(result['submission_id'] for result in results), [1, 2, 3])
+        self.assertEqual({result['status'] for result in results}, {'done'})
+        self.assertTrue(all(result['prompt_size']['tokens'] for result in results))
+        self.assertEqual(len(provider.provider.calls), 3)
+
+    def test_timeout_is_the_provider_deadline(self):
+        provider = ResilientProvider(
+            StubProvider(latency=2), max_retries=0, max_concurrency=1)
+        results = self.grade(provider, 1, timeout=0.1)
+        self.assertEqual(results[0]['status'], 'timeout')
+
+        # The timed-out call gives its slot back at its deadline rather
+        # than after the full simulated latency.
+        self.assertTrue(provider.slots.acquire(timeout=0.5))
+        provider.slots.release()
+
+
+
+class DocumentExtractionTests(SimpleTestCase):
+    def docx(self, paragraphs):
+        body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+        data = io.BytesIO()
+        with zipfile.ZipFile(data, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(
+                'word/document.xml',
+                f'<w:document xmlns:w="{WORD_NS[1:-1]}"><w:body>{body}</w:body></w:document>'
+            )
+        return data.getvalue()
+
+    def test_docx_paragraphs(self):
+        self.assertEqual(extract_text(self.docx(['First', 'Second']), '.docx'), 'First\nSecond')
+
+    def test_docx_reading_stops_at_the_budget(self):
+        text = extract_text(self.docx(['x' * 100] * 1000), '.docx', token_budget=10)
+        self.assertTrue(text.startswith('x' * 40))
+        self.assertIn('truncated to fit the 10-token budget', text)
+        self.assertLess(len(text), 400)
+
+    @override_settings(AI_FILE_MAX_PART_BYTES=10 * 1024)
+    def test_oversized_parts_are_refused(self):
+        # Compresses to a few hundred bytes, expands past the part limit.
+        data = self.docx(['x' * 1000] * 100)
+        self.assertLess(len(data), 10 * 1024)
+        self.assertIsNone(extract_text(data, '.docx'))
+
+
+
+class ModelImageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        patcher = mock.patch(
+            'assignment.ai_images.default_storage', FileSystemStorage(location=self.directory))
+        self.storage = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, size):
+        from PIL import Image
+
+        path = os.path.join(self.directory, 'upload.png')
+        Image.new('RGB', size, 'white').save(path, 'PNG')
+        return path
+
+    def test_resized_image_is_stored_for_every_process(self):
+        path = self.upload((3000, 2000))
+        data, mime_type = load_model_image(path, 'image/png')
+        self.assertEqual(mime_type, 'image/jpeg')
+
+        # Another process finds the stored variant without the original.
+        os.remove(path)
+        self.assertEqual(load_model_image(path, 'image/png'), (data, 'image/jpeg'))
+
+    def test_stored_files_keep_the_resized_copy_in_their_storage(self):
+        storage = FileSystemStorage(location=os.path.join(self.directory, 'uploads'))
+        with open(self.upload((3000, 2000)), 'rb') as upload:
+            name = storage.save('photo.png', upload)
+
+        field = AssignmentSubmission._meta.get_field('answer_file')
+        stored = field.attr_class(None, field, name)
+        stored.storage = storage
+
+        data, _ = load_model_image(stored, 'image/png')
+        storage.delete(name)
+        self.assertEqual(load_model_image(stored, 'image/png'), (data, 'image/jpeg'))
+        self.assertEqual(len(storage.listdir('assignments/submissions/ai-images/')[1]), 1)
+        self.assertFalse(self.storage.exists('assignments/submissions/ai-images/'))
+
+    def test_images_within_the_limits_are_not_stored(self):
+        path = self.upload((100, 100))
+        with open(path, 'rb') as upload:
+            self.assertEqual(load_model_image(path, 'image/png'), (upload.read(), 'image/png'))
+        self.assertFalse(self.storage.exists('assignments/submissions/ai-images/'))
+
+
+class FeedbackJobClaimTests(SchoolDataMixin, TestCase):
+    def make_job(self, student, speculative=False):
+        return AIFeedbackJob.objects.create(
+            submission=self.make_submission(student),
+            requested_by=self.teacher,
+            speculative=speculative
+        )
+
+    def test_teacher_requests_are_claimed_first(self):
+        speculative = self.make_job(self.students[0], speculative=True)
+        requested = self.make_job(self.students[1])
+
+        self.assertEqual(claim_next_job().id, requested.id)
+        job = claim_next_job()
+        self.assertEqual(job.id, speculative.id)
+        self.assertEqual((job.status, job.attempts), (AIFeedbackJob.STATUS_RUNNING, 1))
+        self.assertIsNone(claim_next_job())
+
+    @override_settings(AI_PREGRADE_MAX_CONCURRENT=1)
+    def test_speculative_jobs_respect_the_cap(self):
+        first = self.make_job(self.students[0], speculative=True)
+        second = self.make_job(self.students[1], speculative=True)
+
+        self.assertEqual(claim_next_job().id, first.id)
+        self.assertIsNone(claim_next_job())
+
+        AIFeedbackJob.objects.filter(id=first.id).update(status=AIFeedbackJob.STATUS_DONE)
+        self.assertEqual(claim_next_job().id, second.id)
+
+    def test_pregrade_failure_after_commit_is_logged(self):
+        with self.assertLogs('assignment.signals', 'ERROR'):
+            pregrade_after_commit(0)
+
+
+class StudentAssignmentListQueryTests(SchoolDataMixin, TestCase):
+    # The student's submission state is annotated on each row, so the list
+    # costs the same number of queries however many assignments it holds:
+    # the student profile, then the list itself.
+    LIST_QUERIES = 2
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def authenticate(self):
+        # A freshly loaded user, as authentication provides, without a
+        # profile cached from the test data or an earlier request.
+        self.client.force_authenticate(CustomUser.objects.get(id=self.students[0].user_id))
+
+    def list_assignments(self):
+        response = self.client.get('/sms/assignments/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_listing_runs_a_constant_number_of_queries(self):
+        for count in (3, 20):
+            Assignment.objects.exclude(id=self.assignment.id).delete()
+            for index in range(1, count):
+                assignment = self.make_assignment(f'Assignment {index}')
+                if index % 2:
+                    self.make_submission(self.students[0], assignment, marks_obtained=index % 10)
+
+            self.authenticate()
+            with self.assertNumQueries(self.LIST_QUERIES):
+                rows = self.list_assignments()
+            self.assertEqual(len(rows), count)
+
+    def test_rows_carry_the_students_own_submission(self):
+        self.make_submission(self.students[0], marks_obtained=7)
+        self.make_submission(self.students[1], self.make_assignment('Other'), marks_obtained=4)
+
+        self.authenticate()
+        rows = {row['title']: row for row in self.list_assignments()}
+        self.assertEqual(
+            (rows['Water cycle']['is_submitted'], rows['Water cycle']['marks_obtained']), (True, 7))
+        self.assertEqual(
+            (rows['Other']['is_submitted'], rows['Other']['marks_obtained']), (False, None))
+
+
+class StubFeedbackMixin(SchoolDataMixin):
+    """
+    Serves AI feedback from a StubProvider in place of the configured
+    provider. `stub_latency` beyond `stub_deadline` makes every call time
+    out, as a slow upstream would.
+    """
+    stub_latency = 0
+    stub_deadline = 0.05
+
+    def setUp(self):
+        cache.clear()
+        self.provider = ResilientProvider(
+            StubProvider(latency=self.stub_latency),
+            deadline=self.stub_deadline,
+            max_retries=0,
+            breaker=CircuitBreaker(threshold=5, reset_after=60)
+        )
+        patcher = mock.patch('assignment.ai_providers._provider', self.provider)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher_user)
+        self.submission = self.make_submission(self.students[0])
+
+    def request_feedback(self, submission=None, refresh=False):
+        return self.client.post(
+            f'/sms/assignments/ai-suggestion/{(submission or self.submission).id}/'
+            + ('?refresh=1' if refresh else '')
+        )
+
+    def stream_feedback(self, submission=None, refresh=False):
+        return self.client.get(
+            f'/sms/assignments/ai-suggestion/{(submission or self.submission).id}/stream/'
+            + ('?refresh=1' if refresh else ''),
+            HTTP_ACCEPT='text/event-stream'
+        )
+
+    def read_events(self, response):
+        """(event, data) pairs of a server-sent event stream."""
+        events = []
+        for block in b''.join(response.streaming_content).decode().split('\n\n'):
+            if not block:
+                continue
+            fields = dict(line.split(': ', 1) for line in block.splitlines())
+            events.append((fields['event'], json.loads(fields['data'])))
+        return events
+
+    def run_worker(self):
+        call_command('run_ai_feedback_worker', '--once', stdout=StringIO())
+
+    def assertPromptSize(self, size):
+        """The reported size is that of the prompt the stub was sent."""
+        prompt = ''.join(part for part in self.provider.provider.calls[-1] if isinstance(part, str))
+        self.assertEqual(size['chars'], len(prompt))
+        self.assertGreater(size['tokens'], 0)
+        self.assertEqual(size['inline_bytes'], 0)
+
+
+class StubProviderSettingTests(SimpleTestCase):
+    @override_settings(AI_FEEDBACK_PROVIDER='stub')
+    def test_stub_setting_selects_the_local_provider(self):
+        with mock.patch('assignment.ai_providers._provider', None):
+            provider = get_provider()
+            self.assertIsInstance(provider.provider, StubProvider)
+            self.assertIs(get_provider(), provider)
+
+
+class FeedbackCacheTests(StubFeedbackMixin, TestCase):
+    def test_miss_then_hit(self):
+        key = feedback_cache_key(self.submission)
+        self.assertIsNone(get_cached_feedback(key))
+
+        store_feedback(key, StubProvider.text)
+        self.assertEqual(get_cached_feedback(key), StubProvider.text)
+        self.assertEqual(AIFeedbackCache.objects.get(key=key).hits, 1)
+
+    def test_key_follows_the_inputs(self):
+        other = self.make_submission(self.students[1], answer_text=self.submission.answer_text)
+        self.assertEqual(feedback_cache_key(other), feedback_cache_key(self.submission))
+
+        other.answer_text = 'A different answer'
+        self.assertNotEqual(feedback_cache_key(other), feedback_cache_key(self.submission))
+        self.assertNotEqual(
+            feedback_cache_key(self.submission, model='other-model'),
+            feedback_cache_key(self.submission)
+        )
+
+    @override_settings(AI_FEEDBACK_CACHE_MAX_AGE=0)
+    def test_expired_entries_are_misses(self):
+        key = feedback_cache_key(self.submission)
+        store_feedback(key, StubProvider.text)
+        self.assertIsNone(get_cached_feedback(key))
+
+    def test_cached_feedback_skips_the_model(self):
+        self.assertEqual(self.request_feedback().status_code, 202)
+        self.run_worker()
+
+        response = self.request_feedback()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['cached'], response.data['suggestion']), (True, StubProvider.text))
+        self.assertEqual(len(self.provider.provider.calls), 1)
+
+    def test_refresh_bypasses_the_cache(self):
+        store_feedback(feedback_cache_key(self.submission), 'Old feedback')
+
+        response = self.request_feedback(refresh=True)
+        self.assertEqual(response.status_code, 202)
+        self.run_worker()
+
+        job = AIFeedbackJob.objects.get(id=response.data['job_id'])
+        self.assertEqual(job.result, StubProvider.text)
+        self.assertEqual(len(self.provider.provider.calls), 1)
+
+
+class FeedbackJobLifecycleTests(StubFeedbackMixin, TestCase):
+    def poll(self, job_id):
+        response = self.client.get(f'/sms/assignments/ai-suggestion/jobs/{job_id}/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_queued_job_is_answered_by_the_worker(self):
+        response = self.request_feedback()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], AIFeedbackJob.STATUS_QUEUED)
+
+        # Asking again while the job is queued reuses it.
+        self.assertEqual(self.request_feedback().data['job_id'], response.data['job_id'])
+
+        self.run_worker()
+
+        job = self.poll(response.data['job_id'])
+        self.assertEqual((job['status'], job['suggestion'], job['attempts']),
+                         (AIFeedbackJob.STATUS_DONE, StubProvider.text, 1))
+        self.assertPromptSize(job['prompt_size'])
+
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.ai_score, 7)
+        self.assertEqual(self.submission.ai_suggestions, 'Add more detail to the explanation.')
+
+    @override_settings(AI_FEEDBACK_JOB_MAX_ATTEMPTS=2)
+    def test_failed_attempts_are_retried_then_failed(self):
+        job_id = self.request_feedback().data['job_id']
+        self.provider.provider.latency = 1
+
+        run_feedback_job(claim_next_job())
+        job = self.poll(job_id)
+        self.assertEqual((job['status'], job['attempts']), (AIFeedbackJob.STATUS_QUEUED, 1))
+        self.assertTrue(job['error'])
+
+        run_feedback_job(claim_next_job())
+        job = self.poll(job_id)
+        self.assertEqual((job['status'], job['attempts']), (AIFeedbackJob.STATUS_FAILED, 2))
+        self.assertIsNone(claim_next_job())
+
+        self.submission.refresh_from_db()
+        self.assertIsNone(self.submission.ai_feedback_at)
+
+    def test_retry_succeeds_after_a_failed_attempt(self):
+        job_id = self.request_feedback().data['job_id']
+
+        self.provider.provider.latency = 1
+        run_feedback_job(claim_next_job())
+        self.provider.provider.latency = 0
+        run_feedback_job(claim_next_job())
+
+        job = self.poll(job_id)
+        self.assertEqual((job['status'], job['attempts'], job['error']),
+                         (AIFeedbackJob.STATUS_DONE, 2, ''))
+
+
+class FeedbackStreamTests(StubFeedbackMixin, TestCase):
+    def test_chunks_then_done(self):
+        response = self.stream_feedback()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        events = self.read_events(response)
+        self.assertEqual([event for event, _ in events],
+                         ['chunk'] * len(StubProvider.text.splitlines()) + ['done'])
+        self.assertEqual(''.join(data['text'] for event, data in events[:-1]), StubProvider.text)
+        self.assertFalse(events[-1][1]['cached'])
+        self.assertPromptSize(events[-1][1]['prompt_size'])
+
+        self.assertEqual(get_cached_feedback(feedback_cache_key(self.submission)), StubProvider.text)
+
+    def test_cached_feedback_is_one_chunk(self):
+        store_feedback(feedback_cache_key(self.submission), StubProvider.text)
+
+        events = self.read_events(self.stream_feedback())
+        self.assertEqual(events, [
+            ('chunk', {'text': StubProvider.text}),
+            ('done', {'cached': True, 'prompt_size': None}),
+        ])
+        self.assertEqual(self.provider.provider.calls, [])
+
+    def test_provider_failure_is_an_error_event(self):
+        self.provider.provider.latency = 1
+
+        events = self.read_events(self.stream_feedback())
+        self.assertEqual([event for event, _ in events], ['error'])
+        self.assertTrue(events[0][1]['detail'])
+        self.assertIsNone(get_cached_feedback(feedback_cache_key(self.submission)))
+
+    def test_open_breaker_returns_503(self):
+        self.provider.breaker = CircuitBreaker(threshold=1, reset_after=60)
+        self.provider.provider.latency = 1
+        self.read_events(self.stream_feedback())
+
+        response = self.stream_feedback()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.provider.provider.calls), 1)
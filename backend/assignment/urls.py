@@ -10,6 +10,9 @@ from assignment.views.submission import (
     TeacherAssignmentSubmissionListView,
     AssignmentSubmissionEvaluateView,
     AISuggestionView,
+    AIFeedbackJobDetailView,
+    AssignmentAIFeedbackBatchView,
+    AISuggestionStreamView,
 )
 
 urlpatterns = [
@@ -27,4 +30,10 @@ urlpatterns = [
          name="submission-evaluate"),
     path('ai-suggestion/<int:pk>/',
          AISuggestionView.as_view(), name='ai-suggestion'),
+    path('<int:pk>/ai-feedback/',
+         AssignmentAIFeedbackBatchView.as_view(), name='assignment-ai-feedback'),
+    path('ai-suggestion/<int:pk>/stream/',
+         AISuggestionStreamView.as_view(), name='ai-suggestion-stream'),
+    path('ai-suggestion/jobs/<int:pk>/',
+         AIFeedbackJobDetailView.as_view(), name='ai-feedback-job'),
 ]
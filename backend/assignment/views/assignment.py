@@ -1,5 +1,7 @@
+from django.db.models import Exists, OuterRef, Subquery
 from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveUpdateDestroyAPIView
 from assignment.models.assignment import Assignment
+from assignment.models.submission import AssignmentSubmission
 from assignment.serializers.assignment import (
     AssignmentCreateSerializer,
     AssignmentListSerializer,
@@ -32,10 +34,19 @@ class AssignmentListView(ListAPIView):
             'teacher', 'subject', 'classroom')
 
         if user.role == 'student':
-            student_classroom = user.student_profile.classroom
+            student = user.student_profile
+            # The student's own submission state comes with each row, so
+            # the list runs the same number of queries however long it is.
+            own_submission = AssignmentSubmission.objects.filter(
+                assignment=OuterRef('pk'),
+                student=student
+            )
             return qs.filter(
-                classroom=student_classroom,
+                classroom_id=student.classroom_id,
                 is_active=True
+            ).annotate(
+                is_submitted=Exists(own_submission),
+                marks_obtained=Subquery(own_submission.values('marks_obtained')[:1])
             ).order_by('-created_at')
 
         if user.role == 'teacher':
@@ -55,9 +66,8 @@ class AssignmentDetailView(RetrieveUpdateDestroyAPIView):
         qs = Assignment.objects.select_related('teacher', 'classroom')
 
         if user.role == 'student':
-            student_classroom = user.student_profile.classroom
             return qs.filter(
-                classroom=student_classroom,
+                classroom_id=user.student_profile.classroom_id,
                 is_active=True
             )
 
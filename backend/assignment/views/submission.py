@@ -1,21 +1,33 @@
-from rest_framework.generics import CreateAPIView, ListAPIView, UpdateAPIView
+import json
+from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.throttling import ScopedRateThrottle
 from assignment.models.assignment import Assignment
 from assignment.models.submission import AssignmentSubmission
+from assignment.models.ai_feedback import AIFeedbackJob
 from assignment.serializers.submission import (
     AssignmentSubmissionCreateSerializer,
     AssignmentSubmissionListSerializer,
-    AssignmentSubmissionEvaluateSerializer
+    AssignmentSubmissionEvaluateSerializer,
+    TeacherSubmissionListSerializer
 )
+from assignment.serializers.ai_feedback import AIFeedbackJobSerializer
 from assignment.permissions import IsStudent, IsTeacher
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from assignment.ai_utils import get_submission_feedback
+from assignment.ai_batch import grade_submissions
+from assignment.ai_cache import feedback_cache_key, get_cached_feedback, store_feedback
+from assignment.ai_jobs import enqueue_feedback_job, submission_feedback_args
+from assignment.ai_providers import get_provider
+from assignment.ai_utils import stream_submission_feedback
+from assignment.sse import EventStreamRenderer, sse_event
 
 
 
@@ -52,7 +64,7 @@ class StudentSubmissionListView(ListAPIView):
 
 
 class TeacherAssignmentSubmissionListView(ListAPIView):
-    serializer_class = AssignmentSubmissionListSerializer
+    serializer_class = TeacherSubmissionListSerializer
     permission_classes = [IsAuthenticated, IsTeacher]
 
     def get_queryset(self):
@@ -90,46 +102,184 @@ class AssignmentSubmissionEvaluateView(UpdateAPIView):
 
 
 class AISuggestionView(APIView):
+    """
+    AI feedback for a submission. Identical inputs are answered from the
+    feedback cache straight away (200); otherwise a job is queued and
+    returned immediately (202) to be polled on AIFeedbackJobDetailView.
+    `?refresh=1` skips the cache.
+    """
+    permission_classes = [IsTeacher]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'ai_limit'
+
+    def check_throttles(self, request):
+        # Cache hits never reach the model, so ai_limit is only applied
+        # in post() when a job is about to be queued.
+        pass
+
+    def post(self, request, pk):
+        submission = get_object_or_404(
+            AssignmentSubmission.objects.select_related('assignment'),
+            pk=pk,
+            assignment__teacher=request.user.teacher_profile
+        )
+        refresh = request.query_params.get('refresh') == '1'
+
+        if not refresh:
+            cached = get_cached_feedback(feedback_cache_key(submission))
+            if cached is not None:
+                return Response({
+                    'job_id': None,
+                    'submission_id': submission.id,
+                    'status': AIFeedbackJob.STATUS_DONE,
+                    'suggestion': cached,
+                    'prompt_size': None,
+                    'cached': True,
+                })
+
+        super().check_throttles(request)
+
+        job, _ = enqueue_feedback_job(
+            submission,
+            request.user.teacher_profile,
+            bypass_cache=refresh
+        )
+
+        return Response(
+            {**AIFeedbackJobSerializer(job).data, 'cached': False},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+
+class AISuggestionStreamView(APIView):
+    """
+    Streaming variant of AISuggestionView: the feedback is forwarded as
+    server-sent events while the model is still generating it.
+
+    Events are `chunk` ({"text"}) as text arrives, then `done`
+    ({"cached", "prompt_size"}, the size of the prompt sent; null when
+    cached), or `error` ({"detail"}). Cached feedback is sent as a
+    single chunk. `?refresh=1` skips the cache. While the provider's
+    circuit breaker is open, 503 is returned instead of a stream.
+    """
     permission_classes = [IsTeacher]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
     throttle_classes = [ScopedRateThrottle]
     throttle_scope = 'ai_limit'
 
+    def check_throttles(self, request):
+        # As in AISuggestionView, only requests that reach the model count.
+        pass
+
     def get(self, request, pk):
         submission = get_object_or_404(
-            AssignmentSubmission,
+            AssignmentSubmission.objects.select_related('assignment'),
             pk=pk,
             assignment__teacher=request.user.teacher_profile
         )
 
-        try:
-            file_location = None
-            if submission.answer_file:
-                try:
-                    file_location = submission.answer_file.url
-                except ValueError:
-                    file_location = submission.answer_file.path if hasattr(
-                        submission.answer_file, 'path') else None
-
-            suggestion = get_submission_feedback(
-                assignment_title=submission.assignment.title,
-                assignment_desc=submission.assignment.description or "No specific criteria provided",
-                student_answer=submission.answer_text or "",
-                assignment_max_marks=submission.assignment.max_marks,
-                file_path=file_location
-            )
+        key = feedback_cache_key(submission)
+        cached = None
+        if request.query_params.get('refresh') != '1':
+            cached = get_cached_feedback(key)
 
-            return Response({
-                'suggestion': suggestion,
-                'submission_id': submission.id,
-                'has_file': bool(submission.answer_file),
-                'has_text': bool(submission.answer_text)
-            })
+        if cached is None:
+            super().check_throttles(request)
 
+            if not get_provider().available():
+                return Response(
+                    {'detail': 'AI feedback is temporarily unavailable. Please try again shortly.'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+
+        response = StreamingHttpResponse(
+            self.events(submission, key, cached),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def events(self, submission, key, cached):
+        if cached is not None:
+            yield sse_event('chunk', {'text': cached})
+            yield sse_event('done', {'cached': True, 'prompt_size': None})
+            return
+
+        chunks = []
+        try:
+            size, stream = stream_submission_feedback(**submission_feedback_args(submission))
+            for text in stream:
+                chunks.append(text)
+                yield sse_event('chunk', {'text': text})
         except Exception as e:
+            yield sse_event('error', {'detail': str(e)})
+            return
+
+        store_feedback(key, ''.join(chunks))
+        yield sse_event('done', {'cached': False, 'prompt_size': size})
+
+
+
+class AssignmentAIFeedbackBatchView(APIView):
+    """
+    AI feedback for every submission of an assignment, streamed back as
+    NDJSON lines in completion order (see grade_submissions).
+
+    `workers` and `timeout` tune the fan-out, capped by
+    AI_BATCH_MAX_WORKERS and AI_BATCH_CALL_TIMEOUT. `ungraded=1` skips
+    evaluated submissions and `refresh=1` ignores cached feedback. The
+    whole batch counts as one request against ai_limit.
+    """
+    permission_classes = [IsTeacher]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'ai_limit'
+
+    def post(self, request, pk):
+        assignment = get_object_or_404(
+            Assignment,
+            pk=pk,
+            teacher=request.user.teacher_profile
+        )
+
+        try:
+            workers = int(request.query_params.get('workers', settings.AI_BATCH_MAX_WORKERS))
+            timeout = float(request.query_params.get('timeout', settings.AI_BATCH_CALL_TIMEOUT))
+        except ValueError:
             return Response(
-                {
-                    'error': 'Failed to generate AI suggestion',
-                    'detail': str(e)
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'detail': 'workers and timeout must be numbers.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+
+        workers = min(max(workers, 1), settings.AI_BATCH_MAX_WORKERS)
+        timeout = min(max(timeout, 1), settings.AI_BATCH_CALL_TIMEOUT)
+
+        submissions = assignment.submissions.select_related('assignment').order_by('id')
+        if request.query_params.get('ungraded') == '1':
+            submissions = submissions.filter(marks_obtained__isnull=True)
+
+        results = grade_submissions(
+            assignment,
+            list(submissions),
+            max_workers=workers,
+            timeout=timeout,
+            refresh=request.query_params.get('refresh') == '1'
+        )
+
+        return StreamingHttpResponse(
+            (json.dumps(result) + '\n' for result in results),
+            content_type='application/x-ndjson'
+        )
+
+
+
+class AIFeedbackJobDetailView(RetrieveAPIView):
+    serializer_class = AIFeedbackJobSerializer
+    permission_classes = [IsTeacher]
+
+    def get_queryset(self):
+        return AIFeedbackJob.objects.filter(
+            submission__assignment__teacher=self.request.user.teacher_profile
+        )
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Attendance, AttendanceRecord
+from .models import (
+    Attendance, AttendanceRecord, AttendanceSummary, AttendanceSyncKey,
+    AttendanceTerm, AttendanceArchive
+)
 # Register your models here.
 
 
@@ -12,4 +15,29 @@ class AttendanceAdmin(admin.ModelAdmin):
 @admin.register(AttendanceRecord)
 class AttendanceRecordAdmin(admin.ModelAdmin):
     list_display = ['attendance', 'student', 'status', 'created_at']
-    list_filter = ['status', 'attendance__date']
\ No newline at end of file
+    list_filter = ['status', 'attendance__date']
+
+
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'classroom', 'subject', 'total_days', 'present_days', 'absent_days', 'leave_days']
+    list_filter = ['classroom', 'subject']
+
+
+
+@admin.register(AttendanceSyncKey)
+class AttendanceSyncKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'teacher', 'attendance', 'status', 'modified_at', 'created_at']
+    list_filter = ['status']
+
+
+
+@admin.register(AttendanceTerm)
+class AttendanceTermAdmin(admin.ModelAdmin):
+    list_display = ['name', 'start_date', 'end_date', 'archived_at']
+
+
+@admin.register(AttendanceArchive)
+class AttendanceArchiveAdmin(admin.ModelAdmin):
+    list_display = ['term', 'student', 'classroom', 'subject', 'total_days', 'present_days', 'absent_days', 'leave_days']
+    list_filter = ['term', 'classroom', 'subject']
@@ -0,0 +1,208 @@
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from attendance.archive import archived_records
+from attendance.models import Attendance, AttendanceRecord
+from attendance.utils import MATRIX_CODES
+
+
+PRESENT = MATRIX_CODES['P']
+ABSENT = MATRIX_CODES['A']
+LEAVE = MATRIX_CODES['L']
+
+CACHE_TIMEOUT = 60 * 60
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+class ClassroomAttendanceMatrix:
+    """
+    A classroom's full attendance history as NumPy arrays.
+
+    `status` is an int8 matrix of students x sessions holding the
+    MATRIX_CODES values (0 = not marked, 1 = P, 2 = A, 3 = L). Sessions are
+    sorted by (date, id). `student_ids`, `session_dates` and
+    `session_subjects` map row and column positions back to the database.
+    """
+
+    def __init__(self, student_ids, session_ids, session_dates, session_subjects, status):
+        self.student_ids = student_ids
+        self.session_ids = session_ids
+        self.session_dates = session_dates
+        self.session_subjects = session_subjects
+        self.status = status
+
+    @classmethod
+    def load(cls, classroom_id):
+        """
+        Build the matrix from one scan of the classroom's records plus its
+        archived terms.
+        """
+        rows = list(
+            AttendanceRecord.objects.filter(
+                attendance__classroom_id=classroom_id
+            ).values_list(
+                'student_id',
+                'attendance_id',
+                'attendance__date',
+                'attendance__subject_id',
+                'status'
+            ).order_by()
+        )
+        rows.extend(
+            (record.student_id, record.attendance_id, record.date, record.subject_id, record.status)
+            for record in archived_records(classroom_id=classroom_id)
+        )
+
+        if not rows:
+            empty = np.array([], dtype=np.int64)
+            return cls(empty, empty, np.array([], dtype='datetime64[D]'), empty,
+                       np.zeros((0, 0), dtype=np.int8))
+
+        students, attendances, dates, subjects, statuses = zip(*rows)
+
+        student_ids, student_pos = np.unique(
+            np.array(students, dtype=np.int64), return_inverse=True)
+
+        sessions = {}
+        for attendance_id, session_date, subject_id in zip(attendances, dates, subjects):
+            sessions[attendance_id] = (session_date, subject_id)
+        ordered = sorted(sessions, key=lambda attendance_id: (sessions[attendance_id][0], attendance_id))
+
+        session_ids = np.array(ordered, dtype=np.int64)
+        session_dates = np.array(
+            [sessions[attendance_id][0] for attendance_id in ordered], dtype='datetime64[D]')
+        session_subjects = np.array(
+            [sessions[attendance_id][1] for attendance_id in ordered], dtype=np.int64)
+        session_index = {attendance_id: pos for pos, attendance_id in enumerate(ordered)}
+        session_pos = np.fromiter(
+            (session_index[attendance_id] for attendance_id in attendances),
+            dtype=np.int64, count=len(attendances))
+
+        codes = np.array([MATRIX_CODES[status] for status in statuses], dtype=np.int8)
+        status = np.zeros((len(student_ids), len(session_ids)), dtype=np.int8)
+        status[student_pos, session_pos] = codes
+
+        return cls(student_ids, session_ids, session_dates, session_subjects, status)
+
+    def columns(self, subject_id=None):
+        if subject_id is None:
+            return self.status
+        return self.status[:, self.session_subjects == int(subject_id)]
+
+    def percentages(self, subject_id=None):
+        """Per-student total/present/absent/leave counts and present %."""
+        status = self.columns(subject_id)
+        present = (status == PRESENT).sum(axis=1)
+        absent = (status == ABSENT).sum(axis=1)
+        leave = (status == LEAVE).sum(axis=1)
+        total = present + absent + leave
+        percentage = np.divide(
+            present * 100.0, total,
+            out=np.zeros(len(total), dtype=np.float64),
+            where=total > 0
+        )
+        return {
+            'total_days': total,
+            'present_days': present,
+            'absent_days': absent,
+            'leave_days': leave,
+            'attendance_percentage': percentage,
+        }
+
+    def subject_comparison(self):
+        """Per-subject session count and present/absent/leave totals."""
+        subject_ids = np.unique(self.session_subjects)
+        result = []
+        for subject_id in subject_ids:
+            status = self.columns(subject_id)
+            marked = (status > 0).sum()
+            present = (status == PRESENT).sum()
+            result.append({
+                'subject_id': int(subject_id),
+                'sessions': int(status.shape[1]),
+                'total': int(marked),
+                'present': int(present),
+                'absent': int((status == ABSENT).sum()),
+                'leave': int((status == LEAVE).sum()),
+                'attendance_percentage': float(present * 100.0 / marked) if marked else 0.0,
+            })
+        return result
+
+    def absence_streaks(self, subject_id=None):
+        """
+        Longest and current run of consecutive absences per student, over
+        the sessions in date order. Unmarked sessions break a run.
+        """
+        absent = self.columns(subject_id) == ABSENT
+        n_students, n_sessions = absent.shape
+
+        padded = np.zeros((n_students, n_sessions + 2), dtype=np.int8)
+        padded[:, 1:-1] = absent
+        edges = np.diff(padded, axis=1)
+
+        start_rows, start_cols = np.nonzero(edges == 1)
+        _, end_cols = np.nonzero(edges == -1)
+        lengths = end_cols - start_cols
+
+        longest = np.zeros(n_students, dtype=np.int64)
+        np.maximum.at(longest, start_rows, lengths)
+
+        current = np.zeros(n_students, dtype=np.int64)
+        trailing = end_cols == n_sessions
+        current[start_rows[trailing]] = lengths[trailing]
+
+        return {'longest': longest, 'current': current}
+
+    def weekday_pattern(self, subject_id=None):
+        """Present/absent/leave totals per day of the week."""
+        status = self.columns(subject_id)
+        dates = self.session_dates if subject_id is None else \
+            self.session_dates[self.session_subjects == int(subject_id)]
+        # 1970-01-01 was a Thursday, so shift by 3 to make Monday 0.
+        weekdays = (dates.astype(np.int64) + 3) % 7
+
+        result = []
+        for weekday in range(7):
+            cells = status[:, weekdays == weekday]
+            if cells.shape[1] == 0:
+                continue
+            result.append({
+                'weekday': WEEKDAYS[weekday],
+                'sessions': int(cells.shape[1]),
+                'present': int((cells == PRESENT).sum()),
+                'absent': int((cells == ABSENT).sum()),
+                'leave': int((cells == LEAVE).sum()),
+            })
+        return result
+
+
+def classroom_fingerprint(classroom_id):
+    """
+    Cheap marker that changes whenever a session of the classroom is
+    created, deleted or re-marked (marking bumps Attendance.updated_at).
+    """
+    state = Attendance.objects.filter(classroom_id=classroom_id).aggregate(
+        sessions=Count('id'),
+        last_change=Max('updated_at')
+    )
+    last_change = state['last_change'].isoformat() if state['last_change'] else ''
+    return f"{state['sessions']}:{last_change}"
+
+
+def get_classroom_matrix(classroom_id):
+    """
+    Return the cached ClassroomAttendanceMatrix for a classroom, rebuilding
+    it when the classroom's fingerprint no longer matches.
+    """
+    key = f'attendance:analytics:{classroom_id}'
+    fingerprint = classroom_fingerprint(classroom_id)
+
+    cached = cache.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    matrix = ClassroomAttendanceMatrix.load(classroom_id)
+    cache.set(key, (fingerprint, matrix), CACHE_TIMEOUT)
+    return matrix
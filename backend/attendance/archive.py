@@ -0,0 +1,278 @@
+import heapq
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from itertools import groupby
+
+import numpy as np
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from attendance.models import Attendance, AttendanceArchive, AttendanceRecord, AttendanceTerm
+from attendance.utils import STATUS_SUMMARY_FIELDS, pack_statuses, unpack_status
+
+
+ArchivedRecord = namedtuple(
+    'ArchivedRecord',
+    ['attendance_id', 'teacher_id', 'student_id', 'classroom_id', 'subject_id', 'date', 'status']
+)
+
+ARCHIVE_BUCKETS = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1),
+}
+
+
+def closed_term_ranges():
+    """(start_date, end_date) of every archived term."""
+    return list(AttendanceTerm.objects.values_list('start_date', 'end_date'))
+
+
+def in_closed_term(day, ranges):
+    return any(start <= day <= end for start, end in ranges)
+
+
+def build_archive(term, classroom_id, student_id, subject_id, cells):
+    """
+    Pack one student's (date, status) cells for a classroom/subject, in
+    date order, into an unsaved AttendanceArchive.
+    """
+    statuses = [status for _, status in cells]
+    counters = {field: 0 for field in STATUS_SUMMARY_FIELDS.values()}
+    for status in statuses:
+        counters[STATUS_SUMMARY_FIELDS[status]] += 1
+
+    return AttendanceArchive(
+        term=term,
+        student_id=student_id,
+        classroom_id=classroom_id,
+        subject_id=subject_id,
+        dates=np.array(
+            [(day - term.start_date).days for day, _ in cells], dtype='<u2'
+        ).tobytes(),
+        statuses=pack_statuses(statuses),
+        total_days=len(statuses),
+        **counters
+    )
+
+
+def archive_term(term, dry_run=False):
+    """
+    Compact the AttendanceRecord rows dated inside `term` into
+    AttendanceArchive, one classroom per transaction, and delete them from
+    the live table. Attendance sessions and summaries are left as they are.
+
+    Args:
+        term (AttendanceTerm): Term to archive (unsaved when dry_run)
+        dry_run (bool): Only count what would be archived
+
+    Returns:
+        dict: Number of classrooms, archive rows and records processed
+    """
+    result = {'classrooms': 0, 'archives': 0, 'records': 0}
+    term_range = (term.start_date, term.end_date)
+
+    classroom_ids = list(
+        Attendance.objects.filter(date__range=term_range)
+        .values_list('classroom_id', flat=True)
+        .distinct()
+        .order_by('classroom_id')
+    )
+
+    for classroom_id in classroom_ids:
+        with transaction.atomic():
+            records = AttendanceRecord.objects.filter(
+                attendance__classroom_id=classroom_id,
+                attendance__date__range=term_range
+            )
+            rows = records.values_list(
+                'student_id', 'attendance__subject_id', 'attendance__date', 'status'
+            ).order_by('student_id', 'attendance__subject_id', 'attendance__date')
+
+            archives = [
+                build_archive(
+                    term, classroom_id, student_id, subject_id,
+                    [(day, status) for _, _, day, status in cells]
+                )
+                for (student_id, subject_id), cells in groupby(
+                    rows.iterator(chunk_size=2000), key=lambda row: row[:2])
+            ]
+
+            if not archives:
+                continue
+
+            result['classrooms'] += 1
+            result['archives'] += len(archives)
+            result['records'] += sum(archive.total_days for archive in archives)
+
+            if not dry_run:
+                AttendanceArchive.objects.bulk_create(archives, batch_size=1000)
+                records.delete()
+
+    return result
+
+
+def archived_records(date_from=None, date_to=None, teacher_id=None, before=None,
+                     newest_first=False, **filters):
+    """
+    Expand archived terms back into record-like tuples, one term at a time.
+
+    Only archive rows of terms overlapping [date_from, date_to] and
+    matching `filters` (AttendanceArchive lookups such as classroom_id or
+    student_id; None values are ignored) are read.
+    Each cell is matched to its Attendance session, which is kept when a
+    term is archived, so callers see the same attendance and teacher ids
+    the live records had. Archived and live records never share a date.
+
+    Args:
+        before (tuple): Keyset cursor; only records whose
+            (date, attendance_id) is below it are returned
+        newest_first (bool): Yield in descending instead of ascending order
+
+    Yields:
+        ArchivedRecord: Ordered by (date, attendance_id, student_id), the
+            order of the live queries. Terms are read one at a time and
+            cells are unpacked as they are yielded, so memory stays at the
+            packed size of one term and a caller that stops early never
+            reads the remaining terms.
+    """
+    if before:
+        date_to = min(date_to, before[0]) if date_to else before[0]
+
+    archives = AttendanceArchive.objects.filter(
+        **{lookup: value for lookup, value in filters.items() if value is not None})
+
+    terms = AttendanceTerm.objects.filter(id__in=archives.values('term_id'))
+    if date_from:
+        terms = terms.filter(end_date__gte=date_from)
+    if date_to:
+        terms = terms.filter(start_date__lte=date_to)
+
+    for term_id, start_date in terms.values_list('id', 'start_date').order_by(
+        '-start_date' if newest_first else 'start_date'
+    ):
+        records = expand_term(
+            archives.filter(term_id=term_id), start_date,
+            date_from, date_to, teacher_id, newest_first
+        )
+        if before:
+            records = (
+                record for record in records
+                if (record.date, record.attendance_id) < before
+            )
+        yield from records
+
+
+def expand_term(archives, start_date, date_from, date_to, teacher_id, newest_first=False):
+    """
+    Yield the ArchivedRecords of one term's archive rows in (date,
+    attendance_id, student_id) order. The rows stay packed; each one is
+    unpacked a cell at a time while they are merged.
+    """
+    first = (date_from - start_date).days if date_from else 0
+    last = (date_to - start_date).days if date_to else None
+
+    rows = []
+    for student, classroom, subject, count, dates, statuses in archives.values_list(
+        'student_id', 'classroom_id', 'subject_id', 'total_days', 'dates', 'statuses'
+    ).order_by():
+        offsets = np.frombuffer(bytes(dates), dtype='<u2')[:count]
+        low = int(np.searchsorted(offsets, first, side='left'))
+        high = count if last is None else int(np.searchsorted(offsets, last, side='right'))
+        if low < high:
+            rows.append((student, classroom, subject, offsets, bytes(statuses), low, high))
+
+    if not rows:
+        return
+
+    sessions = {
+        (classroom, subject, day): (attendance_id, teacher)
+        for classroom, subject, day, attendance_id, teacher in Attendance.objects.filter(
+            classroom_id__in={row[1] for row in rows},
+            subject_id__in={row[2] for row in rows},
+            date__range=(
+                start_date + timedelta(days=min(int(row[3][row[5]]) for row in rows)),
+                start_date + timedelta(days=max(int(row[3][row[6] - 1]) for row in rows))
+            )
+        ).values_list('classroom_id', 'subject_id', 'date', 'id', 'teacher_id').order_by()
+    }
+
+    def cells(student, classroom, subject, offsets, statuses, low, high):
+        indexes = range(high - 1, low - 1, -1) if newest_first else range(low, high)
+        for index in indexes:
+            day = start_date + timedelta(days=int(offsets[index]))
+            session = sessions.get((classroom, subject, day))
+            if session is None or (teacher_id and session[1] != int(teacher_id)):
+                continue
+            yield ArchivedRecord(
+                session[0], session[1], student, classroom, subject, day,
+                unpack_status(statuses, index)
+            )
+
+    yield from heapq.merge(
+        *(cells(*row) for row in rows),
+        key=lambda record: (record.date, record.attendance_id, record.student_id),
+        reverse=newest_first
+    )
+
+
+def filter_archived_records(params):
+    """
+    archived_records() for the classroom/subject/date/date_from/date_to
+    query params accepted by filter_attendance_queryset.
+    """
+    try:
+        day = parse_date(params.get('date') or '')
+        date_from = parse_date(params.get('date_from') or '')
+        date_to = parse_date(params.get('date_to') or '')
+    except ValueError:
+        return []
+
+    return archived_records(
+        date_from=max(filter(None, [day, date_from]), default=None),
+        date_to=min(filter(None, [day, date_to]), default=None),
+        classroom_id=params.get('classroom') or None,
+        subject_id=params.get('subject') or None,
+    )
+
+
+def count_statuses(records, counts=None):
+    """Add records to a total/present/absent/leave dict (new if None)."""
+    counts = counts or {'total': 0, 'present': 0, 'absent': 0, 'leave': 0}
+    keys = {'P': 'present', 'A': 'absent', 'L': 'leave'}
+    for record in records:
+        counts['total'] += 1
+        counts[keys[record.status]] += 1
+    return counts
+
+
+def archived_time_series(records, bucket):
+    """Python counterpart of attendance_time_series for archived records."""
+    truncate = ARCHIVE_BUCKETS[bucket]
+    periods = defaultdict(list)
+    for record in records:
+        periods[truncate(record.date)].append(record)
+
+    return [
+        {
+            'period': period,
+            'sessions': len({record.attendance_id for record in rows}),
+            **count_statuses(rows),
+        }
+        for period, rows in sorted(periods.items())
+    ]
+
+
+def merge_time_series(series, archived):
+    """Merge live and archived series rows by period, in period order."""
+    merged = {}
+    for row in [*series, *archived]:
+        period = row['period'].isoformat()[:10]
+        current = merged.get(period)
+        if current is None:
+            merged[period] = {**row, 'period': period}
+            continue
+        for key in ('sessions', 'total', 'present', 'absent', 'leave'):
+            current[key] += row[key]
+
+    return [merged[period] for period in sorted(merged)]
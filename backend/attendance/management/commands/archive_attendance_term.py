@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from attendance.archive import archive_term
+from attendance.models import AttendanceTerm
+
+
+class Command(BaseCommand):
+    help = (
+        'Close an academic term: pack its AttendanceRecord rows into '
+        'AttendanceArchive and prune them from the live table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Term name, e.g. 2025-T1.')
+        parser.add_argument('start', help='First day of the term (YYYY-MM-DD).')
+        parser.add_argument('end', help='Last day of the term (YYYY-MM-DD).')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be archived without writing any changes.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = parse_date(options['start'])
+            end = parse_date(options['end'])
+        except ValueError:
+            start = end = None
+
+        if not start or not end or start > end:
+            raise CommandError('start and end must be YYYY-MM-DD dates with start <= end.')
+
+        if end >= timezone.now().date():
+            raise CommandError('Only terms that have already ended can be archived.')
+
+        if (end - start).days > 0xFFFF:
+            raise CommandError('A term cannot span more than 65535 days.')
+
+        term = AttendanceTerm.objects.filter(name=options['name']).first()
+
+        if term and (term.start_date, term.end_date) != (start, end):
+            raise CommandError(
+                f'Term {term.name} already exists with dates {term.start_date} - {term.end_date}.')
+
+        overlapping = AttendanceTerm.objects.filter(
+            start_date__lte=end,
+            end_date__gte=start
+        ).exclude(name=options['name'])
+        if overlapping.exists():
+            raise CommandError(f'Term overlaps {overlapping.first()}.')
+
+        if term is None:
+            term = AttendanceTerm(name=options['name'], start_date=start, end_date=end)
+            if not options['dry_run']:
+                term.save()
+
+        result = archive_term(term, dry_run=options['dry_run'])
+
+        message = (
+            f"classrooms={result['classrooms']} "
+            f"archives={result['archives']} "
+            f"records={result['records']}"
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'Would archive (dry run): {message}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Term {term.name} archived: {message}'))
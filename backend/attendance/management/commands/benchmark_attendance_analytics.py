@@ -0,0 +1,157 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractWeekDay
+
+from account.models import CustomUser
+from attendance.analytics import ClassroomAttendanceMatrix
+from attendance.models import Attendance, AttendanceRecord
+from classroom.models import ClassRoom, CLASS_GRADE_CHOICES, SECTION_CHOICES
+from student.models import Student
+from subject.models import Subject
+from teacher.models import Teacher
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the NumPy attendance analytics engine with the equivalent '
+        'ORM aggregations on a synthetic term. All data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=60)
+        parser.add_argument('--subjects', type=int, default=6)
+        parser.add_argument('--days', type=int, default=180,
+                            help='School days in the synthetic term.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            classroom = self.seed(options)
+            self.run(classroom.id, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        used = set(ClassRoom.objects.values_list('grade', 'section'))
+        free = [
+            (grade, section)
+            for grade, _ in CLASS_GRADE_CHOICES
+            for section, _ in SECTION_CHOICES
+            if (grade, section) not in used
+        ]
+        if not free:
+            raise CommandError('No free grade/section left for the benchmark classroom.')
+
+        grade, section = free[0]
+        classroom = ClassRoom.objects.create(grade=grade, section=section)
+
+        def user(index, role):
+            return CustomUser(
+                name=f'Bench {role} {index}',
+                email=f'bench-{role}-{index}@benchmark.invalid',
+                role=role,
+                dob=date(2010, 1, 1),
+                mobile=f'B{role[0]}{index:08d}',
+                city='Benchmark',
+            )
+
+        users = CustomUser.objects.bulk_create(
+            [user(index, 'student') for index in range(options['students'])]
+            + [user(0, 'teacher')]
+        )
+        students = Student.objects.bulk_create([
+            Student(user=u, classroom=classroom, registration_id=f'BEN{index:07d}')
+            for index, u in enumerate(users[:-1])
+        ])
+        teacher = Teacher.objects.bulk_create([
+            Teacher(user=users[-1], registration_id='BENT0000001')
+        ])[0]
+        subjects = Subject.objects.bulk_create([
+            Subject(name=f'Bench {index}', classroom=classroom)
+            for index in range(options['subjects'])
+        ])
+
+        school_days = []
+        day = date.today()
+        while len(school_days) < options['days']:
+            if day.weekday() < 5:
+                school_days.append(day)
+            day -= timedelta(days=1)
+
+        sessions = Attendance.objects.bulk_create(
+            [
+                Attendance(date=day, classroom=classroom, subject=subject, teacher=teacher)
+                for day in school_days
+                for subject in subjects
+            ],
+            batch_size=1000
+        )
+
+        rng = np.random.default_rng(0)
+        statuses = rng.choice(
+            ['P', 'A', 'L'], p=[0.85, 0.1, 0.05],
+            size=(len(sessions), len(students)))
+        AttendanceRecord.objects.bulk_create(
+            (
+                AttendanceRecord(
+                    attendance=session, student=student, date=session.date, status=statuses[i, j])
+                for i, session in enumerate(sessions)
+                for j, student in enumerate(students)
+            ),
+            batch_size=5000
+        )
+
+        self.stdout.write(
+            f'Seeded {len(students)} students x {len(sessions)} sessions '
+            f'= {len(students) * len(sessions)} records'
+        )
+        return classroom
+
+    def run(self, classroom_id, repeat):
+        records = AttendanceRecord.objects.filter(attendance__classroom_id=classroom_id)
+        counts = dict(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='P')),
+            absent=Count('id', filter=Q(status='A')),
+            leave=Count('id', filter=Q(status='L')),
+        )
+
+        def orm():
+            list(records.values('student_id').annotate(**counts))
+            list(records.values('attendance__subject_id').annotate(**counts))
+            list(
+                records.annotate(weekday=ExtractWeekDay('attendance__date'))
+                .values('weekday').annotate(**counts)
+            )
+
+        matrix = ClassroomAttendanceMatrix.load(classroom_id)
+
+        def compute(m):
+            m.percentages()
+            m.absence_streaks()
+            m.subject_comparison()
+            m.weekday_pattern()
+
+        timings = {
+            'ORM aggregations (3 GROUP BYs)': self.measure(orm, repeat),
+            'Engine cold (load + compute)': self.measure(
+                lambda: compute(ClassroomAttendanceMatrix.load(classroom_id)), repeat),
+            'Engine warm (cached matrix)': self.measure(lambda: compute(matrix), repeat),
+        }
+
+        for label, seconds in timings.items():
+            self.stdout.write(f'{label:<34} {seconds * 1000:10.2f} ms')
+
+    @staticmethod
+    def measure(func, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
@@ -0,0 +1,161 @@
+import statistics
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from account.models import CustomUser
+from attendance.models import Attendance, AttendanceRecord
+from attendance.utils import mark_attendance_sessions
+from classroom.models import ClassRoom, CLASS_GRADE_CHOICES, SECTION_CHOICES
+from student.models import Student
+from subject.models import Subject
+from teacher.models import Teacher
+
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the write volume of re-marking one attendance session with '
+        'the diff-based upsert against the old delete-and-recreate, for '
+        'several numbers of changed students. All data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=60)
+        parser.add_argument(
+            '--changes',
+            default='1,5,30',
+            help='Comma-separated numbers of students whose status changes.'
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            teacher, session = self.seed(options['students'])
+
+            self.stdout.write(
+                f"Re-marking a {options['students']}-student session "
+                f"(rows written = records inserted + updated + deleted)"
+            )
+            for changed in [int(value) for value in options['changes'].split(',')]:
+                for label, remark in (
+                    ('delete+recreate', self.recreate),
+                    ('diff upsert    ', lambda s: mark_attendance_sessions(teacher, [s])),
+                ):
+                    self.stdout.write(
+                        f'  changes={changed:<4}{label} '
+                        f'{self.measure(remark, session, changed, options["repeat"])}'
+                    )
+
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        used = set(ClassRoom.objects.values_list('grade', 'section'))
+        free = [
+            (grade, section)
+            for grade, _ in CLASS_GRADE_CHOICES
+            for section, _ in SECTION_CHOICES
+            if (grade, section) not in used
+        ]
+        if not free:
+            raise CommandError('No free grade/section left for the benchmark classroom.')
+
+        grade, section = free[0]
+        classroom = ClassRoom.objects.create(grade=grade, section=section)
+        subject = Subject.objects.create(name='Bench marking', classroom=classroom)
+
+        users = CustomUser.objects.bulk_create([
+            CustomUser(
+                name=f'Bench {role} {index}',
+                email=f'bench-{role}-{index}@benchmark.invalid',
+                role=role,
+                dob=date(2010, 1, 1),
+                mobile=f'M{role[0]}{index:08d}',
+                city='Benchmark',
+            )
+            for index, role in [(index, 'student') for index in range(count)] + [(0, 'teacher')]
+        ])
+        students = Student.objects.bulk_create([
+            Student(user=u, classroom=classroom, registration_id=f'BMK{index:07d}')
+            for index, u in enumerate(users[:-1])
+        ])
+        teacher = Teacher.objects.create(user=users[-1], registration_id='BMKT0000001')
+
+        session = {
+            'date': date.today(),
+            'classroom': classroom.id,
+            'subject': subject.id,
+            'records': [{'student': student, 'status': 'P'} for student in students],
+        }
+        mark_attendance_sessions(teacher, [session])
+        return teacher, session
+
+    def recreate(self, session):
+        """The previous re-marking: drop every record and insert them again."""
+        attendance = Attendance.objects.get(
+            date=session['date'],
+            classroom_id=session['classroom'],
+            subject_id=session['subject']
+        )
+        AttendanceRecord.objects.filter(attendance=attendance).delete()
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(
+                attendance=attendance,
+                student=record['student'],
+                date=attendance.date,
+                status=record['status']
+            )
+            for record in session['records']
+        ])
+
+    def measure(self, remark, session, changed, repeat):
+        records = AttendanceRecord.objects.filter(
+            attendance__date=session['date'],
+            attendance__classroom_id=session['classroom'],
+            attendance__subject_id=session['subject']
+        )
+        flipped = {'P': 'A', 'A': 'P', 'L': 'P'}
+
+        timings = []
+        for _ in range(repeat):
+            stored = dict(records.values_list('student_id', 'status'))
+            edited = {
+                **session,
+                'records': [
+                    {
+                        'student': record['student'],
+                        'status': (
+                            flipped[stored[record['student'].id]] if position < changed
+                            else stored[record['student'].id]
+                        ),
+                    }
+                    for position, record in enumerate(session['records'])
+                ],
+            }
+
+            before = dict(records.values_list('id', 'status'))
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                remark(edited)
+                timings.append(time.perf_counter() - started)
+            after = dict(records.values_list('id', 'status'))
+
+        inserted = len(after.keys() - before.keys())
+        deleted = len(before.keys() - after.keys())
+        updated = sum(before[pk] != after[pk] for pk in before.keys() & after.keys())
+        writes = sum(
+            query['sql'].lstrip().upper().startswith(WRITE_STATEMENTS)
+            for query in queries.captured_queries
+        )
+
+        return (
+            f'median={statistics.median(timings) * 1000:6.1f}ms '
+            f'queries={len(queries.captured_queries):<3} write statements={writes:<3} '
+            f'rows written={inserted + updated + deleted} '
+            f'(+{inserted} ~{updated} -{deleted})'
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from attendance.utils import rebuild_attendance_summary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the AttendanceSummary rollup from raw AttendanceRecord rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--classroom',
+            type=int,
+            help='Only rebuild summaries for this classroom id.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing any changes.'
+        )
+
+    def handle(self, *args, **options):
+        result = rebuild_attendance_summary(
+            classroom_id=options['classroom'],
+            dry_run=options['dry_run']
+        )
+
+        message = (
+            f"created={result['created']} "
+            f"updated={result['updated']} "
+            f"deleted={result['deleted']}"
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'Drift found (dry run): {message}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Attendance summary rebuilt: {message}'))
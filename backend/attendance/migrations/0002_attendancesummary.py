@@ -0,0 +1,73 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:12
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def populate_attendance_summary(apps, schema_editor):
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    AttendanceSummary = apps.get_model('attendance', 'AttendanceSummary')
+
+    rows = (
+        AttendanceRecord.objects.values(
+            'student_id',
+            'attendance__classroom_id',
+            'attendance__subject_id'
+        )
+        .annotate(
+            total_days=Count('id'),
+            present_days=Count('id', filter=Q(status='P')),
+            absent_days=Count('id', filter=Q(status='A')),
+            leave_days=Count('id', filter=Q(status='L'))
+        )
+        .order_by()
+    )
+
+    AttendanceSummary.objects.bulk_create(
+        [
+            AttendanceSummary(
+                student_id=row['student_id'],
+                classroom_id=row['attendance__classroom_id'],
+                subject_id=row['attendance__subject_id'],
+                total_days=row['total_days'],
+                present_days=row['present_days'],
+                absent_days=row['absent_days'],
+                leave_days=row['leave_days'],
+            )
+            for row in rows
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0001_initial'),
+        ('student', '0002_alter_student_id'),
+        ('subject', '0001_initial'),
+        ('attendance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('absent_days', models.PositiveIntegerField(default=0)),
+                ('leave_days', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='classroom.classroom')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='student.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='subject.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['classroom', 'subject'], name='attendance__classro_194185_idx')],
+                'unique_together': {('student', 'classroom', 'subject')},
+            },
+        ),
+        migrations.RunPython(populate_attendance_summary, migrations.RunPython.noop),
+    ]
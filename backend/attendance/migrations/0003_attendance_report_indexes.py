@@ -0,0 +1,33 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='attendancerecord',
+            options={},
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['classroom', 'subject', '-date'], name='attendance__classro_dc1c9a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['teacher', 'date'], name='attendance__teacher_26db48_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['attendance', 'status'], name='attendance__attenda_e37222_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['student', 'status'], name='attendance__student_fb4d40_idx'),
+        ),
+    ]
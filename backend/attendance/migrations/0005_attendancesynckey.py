@@ -0,0 +1,31 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0002_alter_teacher_id'),
+        ('attendance', '0004_attendance_date_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSyncKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('modified_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('applied', 'Applied'), ('stale', 'Stale'), ('superseded', 'Superseded')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('attendance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sync_keys', to='attendance.attendance')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teacher.teacher')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['attendance', 'modified_at'], name='attendance__attenda_f5ea32_idx')],
+                'unique_together': {('teacher', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0001_initial'),
+        ('student', '0003_studentrisk'),
+        ('subject', '0001_initial'),
+        ('attendance', '0005_attendancesynckey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['start_date'],
+                'indexes': [models.Index(fields=['start_date', 'end_date'], name='attendance__start_d_8709e0_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dates', models.BinaryField()),
+                ('statuses', models.BinaryField()),
+                ('total_days', models.PositiveIntegerField(default=0)),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('absent_days', models.PositiveIntegerField(default=0)),
+                ('leave_days', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='classroom.classroom')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='subject.subject')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archives', to='attendance.attendanceterm')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['classroom', 'subject'], name='attendance__classro_95767f_idx'), models.Index(fields=['student'], name='attendance__student_2eea8e_idx')],
+                'unique_together': {('term', 'student', 'classroom', 'subject')},
+            },
+        ),
+    ]
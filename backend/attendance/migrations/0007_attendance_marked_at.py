@@ -0,0 +1,27 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:06
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_marked_at(apps, schema_editor):
+    # Existing sessions were last marked when they were last saved.
+    Attendance = apps.get_model('attendance', 'Attendance')
+    Attendance.objects.update(marked_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='marked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_marked_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:22
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_date(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    AttendanceRecord.objects.update(date=Subquery(
+        Attendance.objects.filter(id=OuterRef('attendance_id')).values('date')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_attendance_marked_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(backfill_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['student', '-date', '-attendance'], name='attendance__student_734bca_idx'),
+        ),
+    ]
@@ -12,6 +12,10 @@ class Attendance(models.Model):
     classroom = models.ForeignKey(ClassRoom, on_delete=models.CASCADE)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    # When the current records were marked: the request time for online
+    # markings, the client's edit time for offline ones. Offline markings
+    # older than this are stale.
+    marked_at = models.DateTimeField(default=timezone.now)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -19,6 +23,11 @@ class Attendance(models.Model):
     class Meta:
         unique_together = ('date', 'classroom', 'subject')
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['classroom', 'subject', '-date']),
+            models.Index(fields=['teacher', 'date']),
+            models.Index(fields=['-date', '-id']),
+        ]
 
     def __str__(self):
         return f'{self.subject} - {self.classroom} - {self.date}'
@@ -37,14 +46,150 @@ class AttendanceRecord(models.Model):
         related_name='records'
     )
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    # Copy of attendance.date, which never changes, so a student's history
+    # is read newest first straight off the (student, date, attendance)
+    # index instead of being sorted across the join.
+    date = models.DateField()
     status = models.CharField(max_length=1, choices=STATUS_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('attendance', 'student')
-        ordering = ['student__user__name']
+        indexes = [
+            models.Index(fields=['attendance', 'status']),
+            models.Index(fields=['student', 'status']),
+            models.Index(fields=['student', '-date', '-attendance']),
+        ]
 
     def __str__(self):
         return f'{self.student} - {self.attendance.date} - {self.status}'
 
+
+
+class AttendanceSummary(models.Model):
+    """
+    Running attendance counters per (student, classroom, subject).
+
+    Kept in step with AttendanceRecord by the marking serializers so that
+    percentage reports read one row per student instead of re-aggregating
+    the full record history. `rebuild_attendance_summary` reconciles it
+    from the raw records.
+    """
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='attendance_summaries'
+    )
+    classroom = models.ForeignKey(ClassRoom, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+
+    total_days = models.PositiveIntegerField(default=0)
+    present_days = models.PositiveIntegerField(default=0)
+    absent_days = models.PositiveIntegerField(default=0)
+    leave_days = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'classroom', 'subject')
+        indexes = [
+            models.Index(fields=['classroom', 'subject']),
+        ]
+
+    def __str__(self):
+        return f'{self.student} - {self.subject} ({self.present_days}/{self.total_days})'
+
+
+class AttendanceSyncKey(models.Model):
+    """
+    Idempotency key of a marking pushed by an offline client.
+
+    A retried marking finds its key here and is acknowledged with the
+    stored outcome without touching the attendance tables again.
+    """
+    STATUS_CHOICES = (
+        ('applied', 'Applied'),
+        ('stale', 'Stale'),
+        ('superseded', 'Superseded'),
+    )
+
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    attendance = models.ForeignKey(
+        Attendance,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sync_keys'
+    )
+    modified_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('teacher', 'key')
+        indexes = [
+            models.Index(fields=['attendance', 'modified_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.teacher} - {self.key} ({self.status})'
+
+
+class AttendanceTerm(models.Model):
+    """
+    A closed academic term. Its AttendanceRecord rows have been compacted
+    into AttendanceArchive and it no longer accepts new markings.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['start_date']
+        indexes = [
+            models.Index(fields=['start_date', 'end_date']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.start_date} - {self.end_date})'
+
+
+class AttendanceArchive(models.Model):
+    """
+    One student's attendance for one classroom/subject over a closed term,
+    stored column-wise. `dates` holds little-endian uint16 day offsets
+    from the term start, in date order, and `statuses` the matching
+    statuses packed 2 bits each (see pack_statuses). The counters keep the
+    original totals so summaries can be rebuilt without unpacking.
+    """
+    term = models.ForeignKey(
+        AttendanceTerm,
+        on_delete=models.CASCADE,
+        related_name='archives'
+    )
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    classroom = models.ForeignKey(ClassRoom, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+
+    dates = models.BinaryField()
+    statuses = models.BinaryField()
+
+    total_days = models.PositiveIntegerField(default=0)
+    present_days = models.PositiveIntegerField(default=0)
+    absent_days = models.PositiveIntegerField(default=0)
+    leave_days = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('term', 'student', 'classroom', 'subject')
+        indexes = [
+            models.Index(fields=['classroom', 'subject']),
+            models.Index(fields=['student']),
+        ]
+
+    def __str__(self):
+        return f'{self.student} - {self.subject} - {self.term.name}'
@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import date as date_type
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DateKeysetPagination(BasePagination):
+    """
+    Keyset pagination over (date, id), newest first.
+
+    The cursor stores the (date, id) of the last row on the page and the
+    next page is fetched with `WHERE (date, id) < cursor`, so every page
+    is an index range scan no matter how deep it is. Views set
+    `cursor_fields` to the lookup paths of the date and id columns.
+
+    Views may also define `get_archived_rows(cursor, limit)` returning up
+    to `limit` objects from archived terms, newest first and strictly
+    before the cursor; they are merged into the page.
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.date_field, self.id_field = getattr(
+            view, 'cursor_fields', ('date', 'id'))
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(f'-{self.date_field}', f'-{self.id_field}')
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            cursor_date, cursor_id = cursor
+            queryset = queryset.filter(
+                Q(**{f'{self.date_field}__lt': cursor_date})
+                | Q(**{self.date_field: cursor_date, f'{self.id_field}__lt': cursor_id})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+
+        get_archived_rows = getattr(view, 'get_archived_rows', None)
+        if get_archived_rows is not None:
+            results = sorted(
+                results + get_archived_rows(cursor, self.page_size + 1),
+                key=self.position,
+                reverse=True
+            )[:self.page_size + 1]
+
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        cursor_date, cursor_id = self.position(self.page[-1])
+        position = [cursor_date.isoformat(), cursor_id]
+        token = base64.urlsafe_b64encode(
+            json.dumps(position).encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            cursor_date, cursor_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+            return date_type.fromisoformat(cursor_date), int(cursor_id)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def position(self, instance):
+        return (
+            self.resolve_field(instance, self.date_field),
+            self.resolve_field(instance, self.id_field),
+        )
+
+    @staticmethod
+    def resolve_field(instance, path):
+        for attr in path.split('__'):
+            instance = getattr(instance, attr)
+        return instance
@@ -1,14 +1,19 @@
+from collections import Counter
 from rest_framework import serializers
-from .models import Attendance, AttendanceRecord
+from .models import Attendance, AttendanceRecord, AttendanceSyncKey
 from django.utils import timezone
 from django.db import transaction
 from teacher.models import TeacherSubject
 from student.models import Student
+from attendance.archive import closed_term_ranges, in_closed_term
+from attendance.utils import mark_attendance_sessions
+
+
+CLOSED_TERM_MESSAGE = 'This date belongs to a closed term and can no longer be marked.'
 
 
 class AttendanceRecordInputSerializer(serializers.Serializer):
-    student = serializers.PrimaryKeyRelatedField(
-        queryset=Student.objects.all(),
+    student = serializers.IntegerField(
         help_text="Student ID"
     )
     status = serializers.CharField(
@@ -25,6 +30,102 @@ class AttendanceRecordInputSerializer(serializers.Serializer):
         return value
 
 
+def load_students(student_ids):
+    """Fetch the students referenced by a marking payload in one query."""
+    return {
+        student.id: student
+        for student in Student.objects.filter(
+            id__in=set(student_ids)
+        ).select_related('user').only('id', 'classroom_id', 'user__name')
+    }
+
+
+def check_session_records(records, classroom_id, students):
+    """
+    Check one session's records against the preloaded `students` map.
+
+    Returns:
+        str: Description of the first problem found, or None if valid
+    """
+    if not records:
+        return 'At least one attendance record is required.'
+
+    student_ids = [record['student'] for record in records]
+
+    duplicates = sorted(
+        student_id
+        for student_id, count in Counter(student_ids).items()
+        if count > 1
+    )
+    if duplicates:
+        return f'Duplicate records for student(s): {duplicates}.'
+
+    missing = [
+        student_id for student_id in student_ids if student_id not in students
+    ]
+    if missing:
+        return f'Invalid student id(s): {missing}.'
+
+    for student_id in student_ids:
+        student = students[student_id]
+        if student.classroom_id != classroom_id:
+            return f'Student {student.user.name} does not belong to this classroom.'
+
+    return None
+
+
+def validate_attendance_sessions(teacher, sessions):
+    """
+    Check a list of sessions for `teacher` with a fixed number of queries.
+    Valid sessions get their record student ids replaced by Student
+    instances.
+
+    Returns:
+        dict: session index -> error message for every invalid session
+    """
+    today = timezone.now().date()
+    closed_terms = closed_term_ranges()
+
+    assigned = set(
+        TeacherSubject.objects.filter(
+            teacher=teacher
+        ).values_list('classroom_id', 'subject_id')
+    )
+    students = load_students(
+        record['student']
+        for session in sessions
+        for record in session['records']
+    )
+
+    errors = {}
+    seen = set()
+
+    for index, session in enumerate(sessions):
+        key = (session['date'], session['classroom'], session['subject'])
+
+        if session['date'] > today:
+            error = 'Cannot mark attendance for future dates.'
+        elif in_closed_term(session['date'], closed_terms):
+            error = CLOSED_TERM_MESSAGE
+        elif (session['classroom'], session['subject']) not in assigned:
+            error = 'You are not assigned to teach this subject in this classroom.'
+        elif key in seen:
+            error = 'This session appears more than once in the batch.'
+        else:
+            error = check_session_records(
+                session['records'], session['classroom'], students)
+
+        seen.add(key)
+        if error:
+            errors[index] = error
+            continue
+
+        for record in session['records']:
+            record['student'] = students[record['student']]
+
+    return errors
+
+
 class BulkAttendanceSerializer(serializers.Serializer):
     date = serializers.DateField()
     classroom = serializers.IntegerField()
@@ -42,6 +143,9 @@ class BulkAttendanceSerializer(serializers.Serializer):
                 {'date': 'Cannot mark attendance for future dates.'}
             )
 
+        if in_closed_term(date, closed_term_ranges()):
+            raise serializers.ValidationError({'date': CLOSED_TERM_MESSAGE})
+
         if not TeacherSubject.objects.filter(
             teacher=teacher,
             subject_id=subject_id,
@@ -51,64 +155,220 @@ class BulkAttendanceSerializer(serializers.Serializer):
                 {'subject': 'You are not assigned to teach this subject in this classroom.'}
             )
 
-        if not attrs.get('records') or len(attrs['records']) == 0:
-            raise serializers.ValidationError(
-                {'records': 'At least one attendance record is required.'}
-            )
+        records = attrs.get('records')
+        students = load_students(
+            record['student'] for record in records) if records else {}
+
+        error = check_session_records(records, classroom_id, students)
+        if error:
+            raise serializers.ValidationError({'records': error})
 
-        for record in attrs['records']:
-            student = record['student']
-            if student.classroom_id != classroom_id:
-                raise serializers.ValidationError(
-                    {'records': f'Student {student.user.name} does not belong to this classroom.'}
-                )
+        for record in records:
+            record['student'] = students[record['student']]
 
         return attrs
 
     def create(self, validated_data):
-        records_data = validated_data.pop('records')
         teacher = self.context['request'].user.teacher_profile
 
         with transaction.atomic():
-            attendance, created = Attendance.objects.get_or_create(
-                date=validated_data['date'],
-                classroom_id=validated_data['classroom'],
-                subject_id=validated_data['subject'],
-                defaults={'teacher': teacher}
+            return mark_attendance_sessions(teacher, [validated_data])[0]
+
+    def to_representation(self, instance):
+        changes = instance['changes']
+        return {
+            'success': True,
+            'message': 'Attendance marked successfully',
+            'attendance_id': instance['attendance_id'],
+            'date': instance['date'],
+            'classroom': instance['classroom'],
+            'subject': instance['subject'],
+            'total_records': changes['created'] + changes['updated'] + changes['unchanged'],
+            'changes': changes
+        }
+
+
+class AttendanceSessionInputSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    classroom = serializers.IntegerField()
+    subject = serializers.IntegerField()
+    records = AttendanceRecordInputSerializer(many=True)
+
+
+class BatchAttendanceSerializer(serializers.Serializer):
+    """
+    Mark many (date, classroom, subject) sessions in one request.
+
+    Validation runs a fixed number of queries for the whole batch and all
+    sessions are written in one transaction. Sessions that already exist
+    are re-marked with the same diff as BulkAttendanceSerializer.
+    """
+    sessions = AttendanceSessionInputSerializer(many=True)
+
+    def validate_sessions(self, sessions):
+        if not sessions:
+            raise serializers.ValidationError(
+                'At least one attendance session is required.'
             )
+        return sessions
 
-            if not created and attendance.teacher != teacher:
-                attendance.teacher = teacher
-                attendance.save()
+    def validate(self, attrs):
+        teacher = self.context['request'].user.teacher_profile
 
-            AttendanceRecord.objects.filter(attendance=attendance).delete()
+        errors = validate_attendance_sessions(teacher, attrs['sessions'])
+        if errors:
+            raise serializers.ValidationError({'sessions': errors})
 
-            attendance_records = [
-                AttendanceRecord(
-                    attendance=attendance,
-                    student=record['student'],
-                    status=record['status']
-                )
-                for record in records_data
-            ]
+        return attrs
 
-            AttendanceRecord.objects.bulk_create(attendance_records)
+    def create(self, validated_data):
+        teacher = self.context['request'].user.teacher_profile
 
-        return attendance
+        with transaction.atomic():
+            return mark_attendance_sessions(teacher, validated_data['sessions'])
 
     def to_representation(self, instance):
         return {
             'success': True,
-            'message': 'Attendance marked successfully',
-            'attendance_id': instance.id,
-            'date': str(instance.date),
-            'classroom': instance.classroom_id,
-            'subject': instance.subject_id,
-            'total_records': instance.records.count()
+            'message': f'Attendance marked for {len(instance)} session(s)',
+            'sessions': instance,
         }
 
 
 
+class AttendanceSyncMarkingSerializer(AttendanceSessionInputSerializer):
+    key = serializers.CharField(
+        max_length=64,
+        help_text="Client-generated idempotency key"
+    )
+    modified_at = serializers.DateTimeField(
+        help_text="When the marking was last edited on the client"
+    )
+
+
+class AttendanceSyncSerializer(serializers.Serializer):
+    """
+    Apply a queue of offline markings as one batched upsert.
+
+    Markings whose key was already seen are acknowledged with their stored
+    outcome and cost a single lookup. For the rest, the newest valid
+    marking of each session wins. It is 'stale' when the session was
+    marked later than its modified_at, by any path, and 'applied'
+    otherwise. Older markings of a session are 'superseded' when the
+    winner was applied and 'stale' when it was not. Invalid markings are
+    'rejected' and not remembered, so they can be corrected and resent
+    under the same key.
+    """
+    markings = AttendanceSyncMarkingSerializer(many=True)
+
+    def create(self, validated_data):
+        teacher = self.context['request'].user.teacher_profile
+        acks = {}
+        errors = {}
+
+        with transaction.atomic():
+            markings = []
+            for marking in validated_data['markings']:
+                if marking['key'] not in acks:
+                    acks[marking['key']] = None
+                    markings.append(marking)
+
+            for key, outcome in AttendanceSyncKey.objects.filter(
+                teacher=teacher,
+                key__in=list(acks)
+            ).values_list('key', 'status'):
+                acks[key] = outcome
+
+            pending = [m for m in markings if acks[m['key']] is None]
+
+            # Validate the newest marking of each session; where it is
+            # rejected, fall back to the next newest. One round almost
+            # always settles every session.
+            winners = {}
+            remaining = pending
+            while remaining:
+                candidates = self.latest_per_session(remaining)
+                for index, error in validate_attendance_sessions(teacher, candidates).items():
+                    acks[candidates[index]['key']] = 'rejected'
+                    errors[candidates[index]['key']] = error
+
+                for marking in candidates:
+                    if acks[marking['key']] is None:
+                        winners[self.session_key(marking)] = marking
+
+                tried = {marking['key'] for marking in candidates}
+                remaining = [
+                    m for m in remaining
+                    if m['key'] not in tried and self.session_key(m) not in winners
+                ]
+
+            latest = list(winners.values())
+            marked_at = {
+                (attendance.date, attendance.classroom_id, attendance.subject_id): attendance.marked_at
+                for attendance in Attendance.objects.select_for_update().filter(
+                    date__in={m['date'] for m in latest},
+                    classroom_id__in={m['classroom'] for m in latest},
+                    subject_id__in={m['subject'] for m in latest}
+                ).only('date', 'classroom_id', 'subject_id', 'marked_at').order_by()
+            } if latest else {}
+
+            to_apply = []
+            for marking in latest:
+                seen_at = marked_at.get(self.session_key(marking))
+                if seen_at and seen_at > marking['modified_at']:
+                    acks[marking['key']] = 'stale'
+                else:
+                    acks[marking['key']] = 'applied'
+                    to_apply.append({**marking, 'marked_at': marking['modified_at']})
+
+            results = mark_attendance_sessions(teacher, to_apply) if to_apply else []
+            attendance_ids = {
+                (result['date'], result['classroom'], result['subject']): result['attendance_id']
+                for result in results
+            }
+
+            for marking in pending:
+                if acks[marking['key']] is None:
+                    winner = winners[self.session_key(marking)]
+                    acks[marking['key']] = (
+                        'superseded' if acks[winner['key']] == 'applied' else 'stale')
+
+            AttendanceSyncKey.objects.bulk_create(
+                [
+                    AttendanceSyncKey(
+                        teacher=teacher,
+                        key=marking['key'],
+                        attendance_id=attendance_ids.get(
+                            (str(marking['date']), marking['classroom'], marking['subject'])
+                        ),
+                        modified_at=marking['modified_at'],
+                        status=acks[marking['key']]
+                    )
+                    for marking in pending
+                    if acks[marking['key']] != 'rejected'
+                ],
+                ignore_conflicts=True
+            )
+
+        return {'acks': acks, 'errors': errors}
+
+    @staticmethod
+    def session_key(marking):
+        return (marking['date'], marking['classroom'], marking['subject'])
+
+    def latest_per_session(self, markings):
+        latest = {}
+        for marking in markings:
+            key = self.session_key(marking)
+            if key not in latest or marking['modified_at'] >= latest[key]['modified_at']:
+                latest[key] = marking
+        return list(latest.values())
+
+    def to_representation(self, instance):
+        return instance
+
+
+
 class AttendanceRecordDetailSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(
         source='student.user.name', read_only=True)
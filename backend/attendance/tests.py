@@ -0,0 +1,307 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from account.testing import make_student, make_user
+from attendance.archive import archive_term, archived_records
+from attendance.models import Attendance, AttendanceRecord, AttendanceSummary, AttendanceTerm
+from attendance.utils import mark_attendance_sessions
+from classroom.models import ClassRoom
+from subject.models import Subject
+from teacher.models import TeacherSubject
+
+
+class AttendanceDataMixin:
+    """Two classrooms of different sizes with one subject each, and their teacher."""
+    class_sizes = (5, 40)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = make_user('teacher', 0).teacher_profile
+
+        cls.classrooms = []
+        cls.subjects = []
+        cls.students = []
+        for section, size in zip('AB', cls.class_sizes):
+            classroom = ClassRoom.objects.create(grade=5, section=section)
+            subject = Subject.objects.create(name='Science', classroom=classroom)
+            TeacherSubject.objects.create(
+                teacher=cls.teacher, classroom=classroom, subject=subject)
+            cls.classrooms.append(classroom)
+            cls.subjects.append(subject)
+
+            for _ in range(size):
+                cls.students.append(make_student(len(cls.students), classroom))
+
+    @classmethod
+    def seed_sessions(cls, days):
+        """Mark every classroom for the last `days` days with mixed statuses."""
+        statuses = 'PPPAL'
+        with transaction.atomic():
+            mark_attendance_sessions(cls.teacher, [
+                {
+                    'date': date.today() - timedelta(days=day),
+                    'classroom': classroom.id,
+                    'subject': subject.id,
+                    'records': [
+                        {'student': student, 'status': statuses[(day + position) % len(statuses)]}
+                        for position, student in enumerate(cls.class_list(cls, classroom))
+                    ],
+                }
+                for day in range(days)
+                for classroom, subject in zip(cls.classrooms, cls.subjects)
+            ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher.user)
+
+    def class_list(self, classroom):
+        return [student for student in self.students if student.classroom_id == classroom.id]
+
+    def mark(self, classroom, subject, students, day=None, status='P', method='post'):
+        return getattr(self.client, method)(
+            '/sms/attendance/mark/',
+            {
+                'date': str(day or date.today()),
+                'classroom': classroom.id,
+                'subject': subject.id,
+                'records': [{'student': student.id, 'status': status} for student in students],
+            },
+            format='json'
+        )
+
+
+class BulkAttendanceQueryTests(AttendanceDataMixin, TestCase):
+    # Marking a session costs the same number of queries however many
+    # students it has: records are validated with one IN query and
+    # written in bulk. Both classes are marked the same way, so they only
+    # differ in size. A first marking re-reads the sessions and summary
+    # rows it inserts, in case a concurrent marking inserted them first.
+    MARK_QUERIES = 16
+    REMARK_QUERIES = 12
+
+    def test_marking_runs_a_constant_number_of_queries(self):
+        for classroom, subject in zip(self.classrooms, self.subjects):
+            with self.assertNumQueries(self.MARK_QUERIES):
+                response = self.mark(classroom, subject, self.class_list(classroom))
+            self.assertEqual(response.status_code, 201, response.data)
+
+        self.assertEqual(AttendanceRecord.objects.count(), sum(self.class_sizes))
+
+    def test_re_marking_runs_a_constant_number_of_queries(self):
+        for classroom, subject in zip(self.classrooms, self.subjects):
+            self.mark(classroom, subject, self.class_list(classroom))
+
+        for classroom, subject in zip(self.classrooms, self.subjects):
+            with self.assertNumQueries(self.REMARK_QUERIES):
+                response = self.mark(
+                    classroom, subject, self.class_list(classroom), status='A', method='put')
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(response.data['changes']['updated'], len(self.class_list(classroom)))
+
+        self.assertEqual(
+            set(AttendanceRecord.objects.values_list('status', flat=True)), {'A'})
+
+    def test_students_of_another_classroom_are_rejected(self):
+        classroom, subject = self.classrooms[0], self.subjects[0]
+        outsider = self.class_list(self.classrooms[1])[0]
+
+        response = self.mark(classroom, subject, self.class_list(classroom)[:3] + [outsider])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attendance.objects.exists())
+
+
+
+class ConcurrentFirstMarkingTests(AttendanceDataMixin, TestCase):
+    """
+    A concurrent marking that inserts the same rows between our lookup and
+    our insert is simulated by inserting them just before bulk_create runs.
+    """
+    def race(self, manager, create_rows):
+        bulk_create = manager.bulk_create
+
+        def insert_first(*args, **kwargs):
+            create_rows()
+            return bulk_create(*args, **kwargs)
+
+        return mock.patch.object(manager, 'bulk_create', side_effect=insert_first)
+
+    def test_session_created_concurrently_is_re_marked(self):
+        classroom, subject = self.classrooms[0], self.subjects[0]
+        students = self.class_list(classroom)
+
+        def other_marking():
+            attendance = Attendance.objects.create(
+                date=date.today(), classroom=classroom, subject=subject, teacher=self.teacher)
+            AttendanceRecord.objects.bulk_create([
+                AttendanceRecord(attendance=attendance, student=student, date=attendance.date, status='P')
+                for student in students
+            ])
+
+        with self.race(Attendance.objects, other_marking):
+            response = self.mark(classroom, subject, students, status='A')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(
+            list(AttendanceRecord.objects.values_list('status', flat=True).distinct()), ['A'])
+
+    def test_summary_created_concurrently_keeps_both_counts(self):
+        classroom, subject = self.classrooms[0], self.subjects[0]
+        students = self.class_list(classroom)
+
+        def other_marking():
+            for student in students:
+                AttendanceSummary.objects.create(
+                    student=student, classroom=classroom, subject=subject,
+                    total_days=1, present_days=1
+                )
+
+        with self.race(AttendanceSummary.objects, other_marking):
+            response = self.mark(classroom, subject, students, status='A')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        self.assertEqual(
+            set(AttendanceSummary.objects.values_list('total_days', 'present_days', 'absent_days')),
+            {(2, 1, 1)}
+        )
+
+
+class AttendanceIndexTests(AttendanceDataMixin, TestCase):
+    """The report filters are answered from the indexes added for them."""
+    days = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.seed_sessions(cls.days)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor == 'postgresql':
+            # The seeded tables are small enough for a sequential scan to
+            # look cheaper; the plan under test is the one for full tables.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_teacher_reports_filter_on_teacher_and_date(self):
+        self.assertUsesIndex(
+            Attendance.objects.filter(
+                teacher=self.teacher,
+                date__gte=date.today() - timedelta(days=7)
+            ),
+            'attendance__teacher_26db48_idx'
+        )
+
+    def test_classroom_reports_filter_on_classroom_subject_and_date(self):
+        self.assertUsesIndex(
+            AttendanceRecord.objects.filter(
+                attendance__classroom=self.classrooms[1],
+                attendance__subject=self.subjects[1],
+                attendance__date__range=(date.today() - timedelta(days=30), date.today())
+            ).values('student_id', 'status'),
+            'attendance__classro_dc1c9a_idx'
+        )
+
+    def test_student_history_filters_on_student_and_status(self):
+        self.assertUsesIndex(
+            AttendanceRecord.objects.filter(student=self.students[0], status='A'),
+            'attendance__student_fb4d40_idx'
+        )
+
+    def test_session_counts_filter_on_attendance_and_status(self):
+        session = Attendance.objects.filter(classroom=self.classrooms[1]).first()
+        self.assertUsesIndex(
+            AttendanceRecord.objects.filter(attendance=session, status='A'),
+            'attendance__attenda_e37222_idx'
+        )
+
+    def test_student_history_pages_read_the_student_date_index(self):
+        history = AttendanceRecord.objects.filter(
+            student=self.students[-1]
+        ).order_by('-date', '-attendance_id')
+
+        for page in (history, history.filter(date__lt=date.today() - timedelta(days=30))):
+            plan = page[:50].explain()
+            self.assertIn('attendance__student_734bca_idx', plan)
+            if connection.vendor == 'sqlite':
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_keyset_pages_read_the_date_id_index(self):
+        self.assertUsesIndex(
+            Attendance.objects.order_by('-date', '-id')[:50],
+            'attendance__date_4f6cf3_idx'
+        )
+
+    def test_records_have_no_implicit_join_ordering(self):
+        sql = str(AttendanceRecord.objects.filter(attendance_id=1).query)
+        self.assertNotIn('JOIN', sql)
+
+
+class AttendanceArchiveTests(AttendanceDataMixin, TestCase):
+    days = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.seed_sessions(cls.days)
+        cls.principal = make_user('principal', 0)
+
+    def export(self):
+        self.client.force_authenticate(self.principal)
+        response = self.client.get('/sms/attendance/export/?output=csv')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def archive(self, days):
+        term = AttendanceTerm.objects.create(
+            name='Term 1',
+            start_date=date.today() - timedelta(days=self.days),
+            end_date=date.today() - timedelta(days=self.days - days)
+        )
+        return archive_term(term)
+
+    def test_export_is_unchanged_by_archiving(self):
+        before = self.export()
+        result = self.archive(5)
+
+        self.assertEqual(result['records'], 5 * sum(self.class_sizes))
+        self.assertEqual(self.export(), before)
+
+    def test_archived_records_follow_the_live_order(self):
+        live = list(
+            AttendanceRecord.objects.order_by('attendance__date', 'attendance_id', 'student_id')
+            .values_list('attendance_id', 'student_id', 'status')[:5 * sum(self.class_sizes)]
+        )
+        self.archive(5)
+
+        archived = [
+            (record.attendance_id, record.student_id, record.status)
+            for record in archived_records()
+        ]
+        self.assertEqual(archived, live)
+        self.assertEqual(
+            [(record.attendance_id, record.student_id, record.status)
+             for record in archived_records(newest_first=True)],
+            live[::-1]
+        )
+
+    def test_date_range_reads_only_the_matching_cells(self):
+        self.archive(5)
+        day = date.today() - timedelta(days=self.days - 2)
+
+        records = list(archived_records(date_from=day, date_to=day))
+        self.assertEqual({record.date for record in records}, {day})
+        self.assertEqual(len(records), sum(self.class_sizes))
@@ -1,8 +1,11 @@
 from django.urls import path
 from attendance.views import (
     AttendanceCreateView,
+    AttendanceBatchCreateView,
+    AttendanceSyncView,
     StudentAttendanceListView,
     AttendanceListView,
+    AttendanceExportView,
 )
 
 from attendance.views import (
@@ -10,7 +13,13 @@ from attendance.views import (
     TeacherStudentAttendancePercentageView,
     StudentAttendanceSummaryView,
     PrincipalDailyAttendanceReportView,
-    PrincipalStudentAttendancePercentageView
+    PrincipalStudentAttendancePercentageView,
+    PrincipalAttendanceMatrixView,
+    TeacherAttendanceTrendView,
+    PrincipalAttendanceTrendView,
+    TeacherAttendanceMatrixView,
+    StudentAttendanceCalendarView,
+    PrincipalAttendanceAnalyticsView,
 )
 
 
@@ -19,6 +28,14 @@ urlpatterns = [
         "mark/", AttendanceCreateView.as_view(),
         name="attendance-mark",
     ),
+    path(
+        "mark/batch/", AttendanceBatchCreateView.as_view(),
+        name="attendance-mark-batch",
+    ),
+    path(
+        "sync/", AttendanceSyncView.as_view(),
+        name="attendance-sync",
+    ),
     path(
         "my/", StudentAttendanceListView.as_view(), name="student-attendance-list",
     ),
@@ -26,17 +43,39 @@ urlpatterns = [
         "all/", AttendanceListView.as_view(),
         name="attendance-list",
     ),
+    path(
+        "export/", AttendanceExportView.as_view(),
+        name="attendance-export",
+    ),
     path(
         "reports/teacher/daily/", TeacherDailyAttendanceReportView.as_view(), name="teacher-daily-attendance-report",
     ),
     path(
         "reports/teacher/percentage/", TeacherStudentAttendancePercentageView.as_view(), name="teacher-student-attendance-percentage",
     ),
+    path(
+        "reports/teacher/trend/", TeacherAttendanceTrendView.as_view(), name="teacher-attendance-trend",
+    ),
+    path(
+        "reports/teacher/matrix/", TeacherAttendanceMatrixView.as_view(), name="teacher-attendance-matrix",
+    ),
+    path(
+        "reports/student/calendar/", StudentAttendanceCalendarView.as_view(), name="student-attendance-calendar",
+    ),
     path(
         "reports/student/summary/", StudentAttendanceSummaryView.as_view(), name="student-attendance-summary",
     ),
     path(
         "reports/principal/daily/", PrincipalDailyAttendanceReportView.as_view(), name="principal-daily-attendance-report",
     ),
+    path(
+        "reports/principal/matrix/", PrincipalAttendanceMatrixView.as_view(), name="principal-attendance-matrix",
+    ),
+    path(
+        "reports/principal/trend/", PrincipalAttendanceTrendView.as_view(), name="principal-attendance-trend",
+    ),
+    path(
+        "reports/principal/analytics/", PrincipalAttendanceAnalyticsView.as_view(), name="principal-attendance-analytics",
+    ),
     path('principal/student-percentages/', PrincipalStudentAttendancePercentageView.as_view(), name='principal-student-percentages'),
 ]
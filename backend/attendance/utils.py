@@ -0,0 +1,525 @@
+import base64
+from collections import defaultdict
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from attendance.models import (
+    Attendance, AttendanceArchive, AttendanceRecord, AttendanceSummary
+)
+from student.risk import refresh_student_risk_after_commit
+
+
+STATUS_SUMMARY_FIELDS = {
+    'P': 'present_days',
+    'A': 'absent_days',
+    'L': 'leave_days',
+}
+
+SUMMARY_COUNTER_FIELDS = ['total_days', 'present_days', 'absent_days', 'leave_days']
+
+
+def update_attendance_summary(changes):
+    """
+    Apply the change between two markings of one or more attendance
+    sessions to AttendanceSummary. Must be called inside the transaction
+    that writes the records.
+
+    Args:
+        changes (list): (classroom_id, subject_id, old_statuses, new_statuses)
+            per session, where the status dicts map student_id -> status
+            before and after the write
+    """
+    transitions = defaultdict(list)
+    for classroom_id, subject_id, old_statuses, new_statuses in changes:
+        for student_id in set(old_statuses) | set(new_statuses):
+            previous = old_statuses.get(student_id)
+            current = new_statuses.get(student_id)
+            if previous != current:
+                transitions[(student_id, classroom_id, subject_id)].append(
+                    (previous, current))
+
+    if not transitions:
+        return
+
+    summaries = lock_summaries(transitions)
+
+    missing = transitions.keys() - summaries.keys()
+    if missing:
+        # A concurrent marking may create the same rows; whichever insert
+        # loses is ignored and both then count on the locked rows.
+        AttendanceSummary.objects.bulk_create(
+            [
+                AttendanceSummary(student_id=student_id, classroom_id=classroom_id, subject_id=subject_id)
+                for student_id, classroom_id, subject_id in missing
+            ],
+            ignore_conflicts=True
+        )
+        summaries.update(lock_summaries(missing))
+
+    now = timezone.now()
+    to_update = []
+
+    for key, steps in transitions.items():
+        summary = summaries[key]
+        summary.updated_at = now
+        to_update.append(summary)
+
+        for previous, current in steps:
+            if previous:
+                summary.total_days = max(summary.total_days - 1, 0)
+                field = STATUS_SUMMARY_FIELDS[previous]
+                setattr(summary, field, max(getattr(summary, field) - 1, 0))
+
+            if current:
+                summary.total_days += 1
+                field = STATUS_SUMMARY_FIELDS[current]
+                setattr(summary, field, getattr(summary, field) + 1)
+
+    emptied = [summary.id for summary in to_update if summary.total_days == 0]
+    to_update = [summary for summary in to_update if summary.total_days > 0]
+
+    if emptied:
+        AttendanceSummary.objects.filter(id__in=emptied).delete()
+
+    if to_update:
+        AttendanceSummary.objects.bulk_update(
+            to_update, SUMMARY_COUNTER_FIELDS + ['updated_at'])
+
+
+def lock_summaries(keys):
+    """Lock the AttendanceSummary rows of (student, classroom, subject) keys."""
+    return {
+        (summary.student_id, summary.classroom_id, summary.subject_id): summary
+        for summary in AttendanceSummary.objects.select_for_update().filter(
+            student_id__in={key[0] for key in keys},
+            classroom_id__in={key[1] for key in keys},
+            subject_id__in={key[2] for key in keys}
+        )
+        if (summary.student_id, summary.classroom_id, summary.subject_id) in keys
+    }
+
+
+def sync_attendance_sessions(sessions):
+    """
+    Bring the records of several attendance sessions in line with the
+    submitted statuses, touching only the rows that actually differ, and
+    keep AttendanceSummary in step. Uses a fixed number of queries however
+    many sessions are passed. Must be called inside a transaction.
+
+    Args:
+        sessions (list): (attendance, statuses) pairs, where statuses maps
+            student_id -> status for the full class list of that session
+
+    Returns:
+        dict: attendance id -> number of records created, updated,
+            deleted and unchanged
+    """
+    existing = defaultdict(dict)
+    for record in AttendanceRecord.objects.filter(
+        attendance_id__in=[attendance.id for attendance, _ in sessions]
+    ).only('id', 'attendance_id', 'student_id', 'status').order_by():
+        existing[record.attendance_id][record.student_id] = record
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    to_delete = []
+    summary_changes = []
+    changed_students = set()
+    results = {}
+
+    for attendance, statuses in sessions:
+        current = existing[attendance.id]
+        old_statuses = {
+            student_id: record.status for student_id, record in current.items()
+        }
+        created = updated = 0
+
+        for student_id, status in statuses.items():
+            record = current.get(student_id)
+            if record is None:
+                to_create.append(
+                    AttendanceRecord(
+                        attendance=attendance,
+                        student_id=student_id,
+                        date=attendance.date,
+                        status=status
+                    )
+                )
+                changed_students.add(student_id)
+                created += 1
+            elif record.status != status:
+                record.status = status
+                record.updated_at = now
+                to_update.append(record)
+                changed_students.add(student_id)
+                updated += 1
+
+        removed = [
+            record.id
+            for student_id, record in current.items()
+            if student_id not in statuses
+        ]
+        to_delete.extend(removed)
+        changed_students.update(
+            student_id for student_id in current if student_id not in statuses)
+
+        summary_changes.append(
+            (attendance.classroom_id, attendance.subject_id, old_statuses, statuses))
+
+        results[attendance.id] = {
+            'created': created,
+            'updated': updated,
+            'deleted': len(removed),
+            'unchanged': len(statuses) - created - updated,
+        }
+
+    if to_delete:
+        AttendanceRecord.objects.filter(id__in=to_delete).delete()
+
+    if to_update:
+        AttendanceRecord.objects.bulk_update(
+            to_update, ['status', 'updated_at'], batch_size=1000)
+
+    if to_create:
+        AttendanceRecord.objects.bulk_create(to_create, batch_size=1000)
+
+    touched = [
+        attendance_id
+        for attendance_id, counts in results.items()
+        if counts['created'] or counts['updated'] or counts['deleted']
+    ]
+    if touched:
+        Attendance.objects.filter(id__in=touched).update(updated_at=now)
+
+    update_attendance_summary(summary_changes)
+
+    if changed_students:
+        transaction.on_commit(partial(refresh_student_risk_after_commit, changed_students))
+
+    return results
+
+
+def lock_sessions(keys):
+    """Lock the Attendance sessions of (date, classroom, subject) keys."""
+    return {
+        (attendance.date, attendance.classroom_id, attendance.subject_id): attendance
+        for attendance in Attendance.objects.select_for_update().filter(
+            date__in={key[0] for key in keys},
+            classroom_id__in={key[1] for key in keys},
+            subject_id__in={key[2] for key in keys}
+        ).order_by()
+        if (attendance.date, attendance.classroom_id, attendance.subject_id) in keys
+    }
+
+
+def mark_attendance_sessions(teacher, sessions):
+    """
+    Create or re-mark several attendance sessions for `teacher` with a
+    fixed number of queries. Must be called inside a transaction.
+
+    Args:
+        teacher (Teacher): Teacher marking the sessions
+        sessions (list): Validated dicts with date, classroom, subject and
+            records (student instances and statuses), and optionally
+            marked_at (when the marking was made; defaults to now)
+
+    Returns:
+        list: One result dict per session, in input order
+    """
+    keys = [
+        (session['date'], session['classroom'], session['subject'])
+        for session in sessions
+    ]
+
+    now = timezone.now()
+    existing = lock_sessions(keys)
+    found = set(existing)
+
+    missing = set(keys) - found
+    if missing:
+        # A concurrent first marking of the same session is ignored here
+        # and re-marked below like any existing session.
+        Attendance.objects.bulk_create(
+            [
+                Attendance(
+                    date=date,
+                    classroom_id=classroom_id,
+                    subject_id=subject_id,
+                    teacher=teacher,
+                    marked_at=session.get('marked_at', now)
+                )
+                for (date, classroom_id, subject_id), session in zip(keys, sessions)
+                if (date, classroom_id, subject_id) in missing
+            ],
+            ignore_conflicts=True
+        )
+        existing.update(lock_sessions(missing))
+
+    remarked = []
+    for key, session in zip(keys, sessions):
+        attendance = existing[key]
+        marked_at = session.get('marked_at', now)
+        if key in found or (attendance.teacher_id, attendance.marked_at) != (teacher.id, marked_at):
+            attendance.teacher = teacher
+            attendance.marked_at = marked_at
+            attendance.updated_at = now
+            remarked.append(attendance)
+
+    if remarked:
+        Attendance.objects.bulk_update(remarked, ['teacher', 'marked_at', 'updated_at'])
+
+    attendances = [existing[key] for key in keys]
+    changes = sync_attendance_sessions([
+        (
+            attendance,
+            {
+                record['student'].id: record['status']
+                for record in session['records']
+            }
+        )
+        for attendance, session in zip(attendances, sessions)
+    ])
+
+    # A session only counts as created when it had no records yet; one
+    # that a concurrent marking created and filled first was re-marked.
+    return [
+        {
+            'attendance_id': attendance.id,
+            'date': str(attendance.date),
+            'classroom': attendance.classroom_id,
+            'subject': attendance.subject_id,
+            'created': key not in found and not (
+                changes[attendance.id]['updated']
+                + changes[attendance.id]['unchanged']
+                + changes[attendance.id]['deleted']
+            ),
+            'changes': changes[attendance.id],
+        }
+        for key, attendance in zip(keys, attendances)
+    ]
+
+
+def aggregate_attendance_records(records):
+    """
+    Group an AttendanceRecord queryset by (student, classroom, subject)
+    with the same counters AttendanceSummary stores.
+    """
+    return (
+        records.values(
+            'student_id',
+            'attendance__classroom_id',
+            'attendance__subject_id'
+        )
+        .annotate(
+            total_days=Count('id'),
+            present_days=Count('id', filter=Q(status='P')),
+            absent_days=Count('id', filter=Q(status='A')),
+            leave_days=Count('id', filter=Q(status='L'))
+        )
+        .order_by()
+    )
+
+
+def rebuild_attendance_summary(classroom_id=None, dry_run=False):
+    """
+    Reconcile AttendanceSummary with the raw AttendanceRecord table plus
+    the counters of archived terms.
+
+    Args:
+        classroom_id (int): Limit the rebuild to one classroom (optional)
+        dry_run (bool): Only report the drift, do not write
+
+    Returns:
+        dict: Number of summary rows created, updated and deleted
+    """
+    records = AttendanceRecord.objects.all()
+    archives = AttendanceArchive.objects.all()
+    summaries = AttendanceSummary.objects.all()
+
+    if classroom_id:
+        records = records.filter(attendance__classroom_id=classroom_id)
+        archives = archives.filter(classroom_id=classroom_id)
+        summaries = summaries.filter(classroom_id=classroom_id)
+
+    expected = {
+        (row['student_id'], row['attendance__classroom_id'], row['attendance__subject_id']): row
+        for row in aggregate_attendance_records(records)
+    }
+
+    archived = (
+        archives.values('student_id', 'classroom_id', 'subject_id')
+        .annotate(**{f'archived_{field}': Sum(field) for field in SUMMARY_COUNTER_FIELDS})
+        .order_by()
+    )
+    for row in archived:
+        key = (row['student_id'], row['classroom_id'], row['subject_id'])
+        counters = expected.setdefault(key, dict.fromkeys(SUMMARY_COUNTER_FIELDS, 0))
+        for field in SUMMARY_COUNTER_FIELDS:
+            counters[field] += row[f'archived_{field}']
+
+    to_update = []
+    stale_ids = []
+
+    for summary in summaries.iterator():
+        key = (summary.student_id, summary.classroom_id, summary.subject_id)
+        row = expected.pop(key, None)
+
+        if row is None:
+            stale_ids.append(summary.id)
+            continue
+
+        if any(getattr(summary, field) != row[field] for field in SUMMARY_COUNTER_FIELDS):
+            for field in SUMMARY_COUNTER_FIELDS:
+                setattr(summary, field, row[field])
+            to_update.append(summary)
+
+    to_create = [
+        AttendanceSummary(
+            student_id=student_id,
+            classroom_id=classroom,
+            subject_id=subject,
+            **{field: row[field] for field in SUMMARY_COUNTER_FIELDS}
+        )
+        for (student_id, classroom, subject), row in expected.items()
+    ]
+
+    if not dry_run:
+        with transaction.atomic():
+            AttendanceSummary.objects.filter(id__in=stale_ids).delete()
+            AttendanceSummary.objects.bulk_update(
+                to_update, SUMMARY_COUNTER_FIELDS, batch_size=1000)
+            AttendanceSummary.objects.bulk_create(to_create, batch_size=1000)
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'deleted': len(stale_ids),
+    }
+
+
+TIME_SERIES_BUCKETS = {
+    'day': lambda field: F(field),
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def attendance_time_series(records, bucket):
+    """
+    Present/absent/leave counts of an AttendanceRecord queryset per day,
+    week (starting Monday) or month, as one GROUP BY query.
+    """
+    truncate = TIME_SERIES_BUCKETS[bucket]
+
+    return (
+        records.annotate(period=truncate('attendance__date'))
+        .values('period')
+        .annotate(
+            sessions=Count('attendance', distinct=True),
+            total=Count('id'),
+            present=Count('id', filter=Q(status='P')),
+            absent=Count('id', filter=Q(status='A')),
+            leave=Count('id', filter=Q(status='L'))
+        )
+        .order_by('period')
+    )
+
+
+MATRIX_ENCODINGS = ('chars', 'packed')
+
+MATRIX_EMPTY = '-'
+
+MATRIX_CODES = {MATRIX_EMPTY: 0, 'P': 1, 'A': 2, 'L': 3}
+
+MATRIX_STATUSES = {code: status for status, code in MATRIX_CODES.items()}
+
+
+def encode_attendance_matrix(cells, row_keys, encoding='chars'):
+    """
+    Encode (row_key, date, status) cells as a compact grid.
+
+    Columns are the distinct dates present in `cells`, sorted. Each row is
+    either a string with one status character per date ('-' when not
+    marked) or, for encoding='packed', a base64 string with 2 bits per
+    date (0 = not marked, 1 = P, 2 = A, 3 = L; four dates per byte, lowest
+    bits first).
+
+    Args:
+        cells (iterable): (row_key, date, status) tuples
+        row_keys (list): Row order; cells for other keys are ignored
+        encoding (str): 'chars' or 'packed'
+
+    Returns:
+        tuple: (sorted dates, list of encoded rows aligned with row_keys)
+    """
+    cells = list(cells)
+    dates = sorted({cell_date for _, cell_date, _ in cells})
+    date_index = {cell_date: index for index, cell_date in enumerate(dates)}
+    row_index = {key: index for index, key in enumerate(row_keys)}
+
+    grid = [[MATRIX_EMPTY] * len(dates) for _ in row_keys]
+    for key, cell_date, status in cells:
+        row = row_index.get(key)
+        if row is not None:
+            grid[row][date_index[cell_date]] = status
+
+    if encoding == 'chars':
+        return dates, [''.join(row) for row in grid]
+
+    return dates, [base64.b64encode(pack_statuses(row)).decode() for row in grid]
+
+
+def pack_statuses(statuses):
+    """
+    Pack status characters 2 bits each using MATRIX_CODES, four per byte,
+    lowest bits first.
+    """
+    packed = bytearray((len(statuses) + 3) // 4)
+    for index, status in enumerate(statuses):
+        packed[index // 4] |= MATRIX_CODES[status] << (2 * (index % 4))
+    return bytes(packed)
+
+
+def unpack_statuses(packed, count):
+    """Inverse of pack_statuses for the first `count` statuses."""
+    packed = bytes(packed)
+    return [unpack_status(packed, index) for index in range(count)]
+
+
+def unpack_status(packed, index):
+    """The status at `index` of bytes packed by pack_statuses."""
+    return MATRIX_STATUSES[(packed[index // 4] >> (2 * (index % 4))) & 3]
+
+
+def filter_attendance_queryset(qs, params, prefix=''):
+    """
+    Apply the classroom/subject/date filters shared by the attendance
+    listing and export views. `date_from`/`date_to` bound an inclusive
+    date range. Pass prefix='attendance__' to filter records.
+    """
+    filters = {
+        'classroom': 'classroom_id',
+        'subject': 'subject_id',
+        'date': 'date',
+        'date_from': 'date__gte',
+        'date_to': 'date__lte',
+    }
+
+    for param, lookup in filters.items():
+        value = params.get(param)
+        if value:
+            qs = qs.filter(**{f'{prefix}{lookup}': value})
+
+    return qs
+
+
+class Echo:
+    """File-like object that hands csv.writer output straight back."""
+
+    def write(self, value):
+        return value
@@ -1,19 +1,50 @@
+import csv
+import heapq
+import json
+from collections import defaultdict
+from itertools import islice
+
 from rest_framework.generics import CreateAPIView, ListAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q, F, FloatField
+from django.db.models import Count, Q, F, Sum, FloatField, Prefetch, Exists, OuterRef
 from django.db.models.functions import Cast
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
 
-from attendance.models import Attendance, AttendanceRecord
+from attendance.models import Attendance, AttendanceRecord, AttendanceSummary
 from attendance.serializers import (
     BulkAttendanceSerializer,
+    BatchAttendanceSerializer,
+    AttendanceSyncSerializer,
     StudentAttendanceListSerializer,
     AttendanceDetailSerializer,
 )
+from attendance.analytics import get_classroom_matrix
+from attendance.archive import (
+    archived_records,
+    archived_time_series,
+    count_statuses,
+    filter_archived_records,
+    merge_time_series,
+)
+from attendance.pagination import DateKeysetPagination
 from attendance.permissions import IsTeacher, IsStudent, IsPrincipalReadOnly, CanViewStudentList
-from teacher.models import TeacherSubject
+from attendance.utils import (
+    MATRIX_ENCODINGS,
+    TIME_SERIES_BUCKETS,
+    Echo,
+    attendance_time_series,
+    encode_attendance_matrix,
+    filter_attendance_queryset,
+)
+from teacher.models import Teacher, TeacherSubject
+from student.models import Student
+from subject.models import Subject
+from classroom.models import ClassRoom
 
 
 class AttendanceCreateView(CreateAPIView):
@@ -48,6 +79,33 @@ class AttendanceCreateView(CreateAPIView):
             )
         return super().create(request, *args, **kwargs)
 
+    def put(self, request, *args, **kwargs):
+        """Re-mark an existing session; only changed records are written."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AttendanceBatchCreateView(CreateAPIView):
+    """Mark several (date, classroom, subject) sessions in one request."""
+    serializer_class = BatchAttendanceSerializer
+    permission_classes = [IsTeacher]
+
+
+class AttendanceSyncView(APIView):
+    """Apply a queue of offline markings and acknowledge each key."""
+    permission_classes = [IsTeacher]
+
+    def post(self, request):
+        serializer = AttendanceSyncSerializer(
+            data=request.data,
+            context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 class TeacherDailyAttendanceReportView(APIView):
     permission_classes = [IsTeacher]
@@ -89,6 +147,17 @@ class TeacherDailyAttendanceReportView(APIView):
             leave=Count('id', filter=Q(status='L')),
         )
 
+        day = parse_date(date)
+        report = count_statuses(
+            archived_records(
+                day, day,
+                teacher_id=teacher.id,
+                classroom_id=classroom_id,
+                subject_id=subject_id
+            ),
+            report
+        )
+
         return Response({
             'date': date,
             'subject_id': subject_id,
@@ -123,22 +192,20 @@ class TeacherStudentAttendancePercentageView(APIView):
             )
 
         qs = (
-            AttendanceRecord.objects.filter(
-                attendance__teacher=teacher,
-                attendance__subject_id=subject_id,
-                attendance__classroom_id=classroom_id
+            AttendanceSummary.objects.filter(
+                subject_id=subject_id,
+                classroom_id=classroom_id,
+                total_days__gt=0
             )
             .values(
                 'student__id',
                 'student__user__email',
                 'student__user__name',
-                'student__registration_id'
-            )
-            .annotate(
-                total_days=Count('id'),
-                present_days=Count('id', filter=Q(status='P')),
-                absent_days=Count('id', filter=Q(status='A')),
-                leave_days=Count('id', filter=Q(status='L'))
+                'student__registration_id',
+                'total_days',
+                'present_days',
+                'absent_days',
+                'leave_days'
             )
             .annotate(
                 attendance_percentage=Cast(
@@ -146,6 +213,7 @@ class TeacherStudentAttendancePercentageView(APIView):
                     FloatField()
                 )
             )
+            .order_by('student__user__name')
         )
 
         return Response(qs)
@@ -153,17 +221,243 @@ class TeacherStudentAttendancePercentageView(APIView):
 
 
 
+class AttendanceRangeMixin:
+    """Parses the inclusive `from`/`to` (YYYY-MM-DD) range of a report."""
+
+    def get_date_range(self, request):
+        try:
+            date_from = parse_date(request.query_params.get('from') or '')
+            date_to = parse_date(request.query_params.get('to') or '')
+        except ValueError:
+            date_from = date_to = None
+
+        if not date_from or not date_to or date_from > date_to:
+            return None, Response(
+                {'detail': 'from and to are required as YYYY-MM-DD, with from <= to.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return (date_from, date_to), None
+
+
+class AttendanceTrendMixin(AttendanceRangeMixin):
+    """
+    Shared parsing for the time-series views: the date range plus
+    `bucket` = day | week | month.
+    """
+
+    def get_trend_params(self, request):
+        date_range, error = self.get_date_range(request)
+        if error:
+            return None, error
+
+        bucket = request.query_params.get('bucket', 'day')
+
+        if bucket not in TIME_SERIES_BUCKETS:
+            return None, Response(
+                {'detail': f'bucket must be one of {list(TIME_SERIES_BUCKETS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return (*date_range, bucket), None
+
+    def trend_response(self, records, archived, date_from, date_to, bucket, **extra):
+        series = attendance_time_series(
+            records.filter(attendance__date__range=(date_from, date_to)),
+            bucket
+        )
+
+        return Response({
+            'from': date_from,
+            'to': date_to,
+            'bucket': bucket,
+            **extra,
+            'series': merge_time_series(
+                series, archived_time_series(archived, bucket)),
+        })
+
+
+class TeacherAttendanceTrendView(AttendanceTrendMixin, APIView):
+    permission_classes = [IsTeacher]
+
+    def get(self, request):
+        subject_id = request.query_params.get('subject')
+        classroom_id = request.query_params.get('classroom')
+
+        if not subject_id or not classroom_id:
+            return Response(
+                {'detail': 'subject and classroom are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        params, error = self.get_trend_params(request)
+        if error:
+            return error
+
+        if not TeacherSubject.objects.filter(
+            teacher=request.user.teacher_profile,
+            subject_id=subject_id,
+            classroom_id=classroom_id
+        ).exists():
+            return Response(
+                {'detail': 'You are not assigned to this subject/classroom.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        records = AttendanceRecord.objects.filter(
+            attendance__subject_id=subject_id,
+            attendance__classroom_id=classroom_id
+        )
+        archived = archived_records(
+            *params[:2],
+            classroom_id=classroom_id,
+            subject_id=subject_id
+        )
+
+        return self.trend_response(
+            records, archived, *params,
+            classroom_id=classroom_id,
+            subject_id=subject_id
+        )
+
+
+class AttendanceMatrixMixin(AttendanceRangeMixin):
+    """
+    Shared handling for the compact status grids: the date range plus
+    `encoding` = chars | packed (see encode_attendance_matrix).
+    """
+
+    def get_matrix_params(self, request):
+        date_range, error = self.get_date_range(request)
+        if error:
+            return None, error
+
+        encoding = request.query_params.get('encoding', 'chars')
+
+        if encoding not in MATRIX_ENCODINGS:
+            return None, Response(
+                {'detail': f'encoding must be one of {list(MATRIX_ENCODINGS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return (*date_range, encoding), None
+
+    def matrix_response(self, cells, row_keys, date_from, date_to, encoding, **extra):
+        dates, rows = encode_attendance_matrix(cells, row_keys, encoding)
+
+        return Response({
+            'from': date_from,
+            'to': date_to,
+            'encoding': encoding,
+            **extra,
+            'dates': [cell_date.isoformat() for cell_date in dates],
+            'rows': rows,
+        })
+
+
+class TeacherAttendanceMatrixView(AttendanceMatrixMixin, APIView):
+    """Student x date status grid for one classroom/subject."""
+    permission_classes = [IsTeacher]
+
+    def get(self, request):
+        subject_id = request.query_params.get('subject')
+        classroom_id = request.query_params.get('classroom')
+
+        if not subject_id or not classroom_id:
+            return Response(
+                {'detail': 'subject and classroom are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        params, error = self.get_matrix_params(request)
+        if error:
+            return error
+
+        if not TeacherSubject.objects.filter(
+            teacher=request.user.teacher_profile,
+            subject_id=subject_id,
+            classroom_id=classroom_id
+        ).exists():
+            return Response(
+                {'detail': 'You are not assigned to this subject/classroom.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        date_from, date_to, _ = params
+        cells = list(
+            AttendanceRecord.objects.filter(
+                attendance__subject_id=subject_id,
+                attendance__classroom_id=classroom_id,
+                attendance__date__range=(date_from, date_to)
+            ).values_list('student_id', 'attendance__date', 'status')
+        )
+        cells.extend(
+            (record.student_id, record.date, record.status)
+            for record in archived_records(
+                date_from, date_to,
+                classroom_id=classroom_id,
+                subject_id=subject_id
+            )
+        )
+
+        students = list(
+            Student.objects.filter(
+                Q(classroom_id=classroom_id)
+                | Q(id__in={student_id for student_id, _, _ in cells})
+            ).values_list('id', 'user__name', 'registration_id').order_by('user__name')
+        )
+
+        return self.matrix_response(
+            cells, [student[0] for student in students], *params,
+            classroom_id=classroom_id,
+            subject_id=subject_id,
+            students=[
+                {'id': student_id, 'name': name, 'registration_id': registration_id}
+                for student_id, name, registration_id in students
+            ]
+        )
+
+
 class StudentAttendanceListView(ListAPIView):
     serializer_class = StudentAttendanceListSerializer
     permission_classes = [IsAuthenticated, CanViewStudentList]
+    pagination_class = DateKeysetPagination
+    # (date, session) is unique per student, in the live and archived rows,
+    # and pages are range scans of the (student, date, attendance) index.
+    cursor_fields = ('date', 'attendance_id')
 
     def get_queryset(self):
         return AttendanceRecord.objects.filter(
             student=self.request.user.student_profile
         ).select_related(
-            'attendance__teacher',
+            'attendance__teacher__user',
             'attendance__subject'
-        ).order_by('-attendance__date')
+        ).order_by('-date', '-attendance_id')
+
+    def get_archived_rows(self, cursor, limit):
+        records = list(islice(
+            archived_records(
+                before=cursor,
+                newest_first=True,
+                student_id=self.request.user.student_profile.id
+            ),
+            limit
+        ))
+
+        sessions = Attendance.objects.select_related(
+            'teacher__user',
+            'subject'
+        ).in_bulk([record.attendance_id for record in records])
+
+        return [
+            AttendanceRecord(
+                attendance=sessions[record.attendance_id],
+                student_id=record.student_id,
+                date=record.date,
+                status=record.status
+            )
+            for record in records
+        ]
 
 
 
@@ -171,26 +465,24 @@ class StudentAttendanceSummaryView(APIView):
     permission_classes = [IsStudent]
 
     def get(self, request):
-        qs = AttendanceRecord.objects.filter(
-            student=request.user.student_profile
-        ).select_related('attendance__subject')
-
-        summary = qs.values(
-            'attendance__subject__id',
-            'attendance__subject__name',
+        summary = AttendanceSummary.objects.filter(
+            student=request.user.student_profile,
+            total_days__gt=0
+        ).values(
+            'subject__id',
+            'subject__name',
             'student__user__name',
             'student__registration_id',
-        ).annotate(
-            total_days=Count('id'),
-            present_days=Count('id', filter=Q(status='P')),
-            absent_days=Count('id', filter=Q(status='A')),
-            leave_days=Count('id', filter=Q(status='L'))
+            'total_days',
+            'present_days',
+            'absent_days',
+            'leave_days'
         )
 
         result = [
             {
-                'subject_id': item['attendance__subject__id'],
-                'subject_name': item['attendance__subject__name'],
+                'subject_id': item['subject__id'],
+                'subject_name': item['subject__name'],
                 'student_name': item['student__user__name'],
                 'student_id': item['student__registration_id'],
                 'total_days': item['total_days'],
@@ -209,30 +501,239 @@ class StudentAttendanceSummaryView(APIView):
 
 
 
+class StudentAttendanceCalendarView(AttendanceMatrixMixin, APIView):
+    """The student's own subject x date status grid."""
+    permission_classes = [IsStudent]
+
+    def get(self, request):
+        params, error = self.get_matrix_params(request)
+        if error:
+            return error
+
+        date_from, date_to, _ = params
+        cells = list(
+            AttendanceRecord.objects.filter(
+                student=request.user.student_profile,
+                attendance__date__range=(date_from, date_to)
+            ).values_list(
+                'attendance__subject_id',
+                'attendance__date',
+                'status',
+                'attendance__subject__name'
+            )
+        )
+
+        archived = list(archived_records(
+            date_from, date_to,
+            student_id=request.user.student_profile.id
+        ))
+        if archived:
+            names = dict(
+                Subject.objects.filter(
+                    id__in={record.subject_id for record in archived}
+                ).values_list('id', 'name')
+            )
+            cells.extend(
+                (record.subject_id, record.date, record.status, names[record.subject_id])
+                for record in archived
+            )
+
+        subjects = sorted(
+            {(subject_id, name) for subject_id, _, _, name in cells},
+            key=lambda subject: subject[1]
+        )
+
+        return self.matrix_response(
+            [cell[:3] for cell in cells],
+            [subject_id for subject_id, _ in subjects],
+            *params,
+            subjects=[
+                {'id': subject_id, 'name': name}
+                for subject_id, name in subjects
+            ]
+        )
+
+
+
 class AttendanceListView(ListAPIView):
     serializer_class = AttendanceDetailSerializer
     permission_classes = [IsPrincipalReadOnly]
+    pagination_class = DateKeysetPagination
+    cursor_fields = ('date', 'id')
 
     def get_queryset(self):
         qs = Attendance.objects.select_related(
-            'teacher',
+            'teacher__user',
             'classroom',
             'subject'
-        ).prefetch_related('records')
-        classroom_id = self.request.query_params.get('classroom')
-        subject_id = self.request.query_params.get('subject')
-        date = self.request.query_params.get('date')
+        ).prefetch_related(
+            Prefetch(
+                'records',
+                queryset=AttendanceRecord.objects.select_related(
+                    'student__user'
+                ).order_by('student__user__name')
+            )
+        )
+        qs = filter_attendance_queryset(qs, self.request.query_params)
 
-        if classroom_id:
-            qs = qs.filter(classroom_id=classroom_id)
+        return qs.order_by('-date', '-id')
 
-        if subject_id:
-            qs = qs.filter(subject_id=subject_id)
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        self.attach_archived_records(page)
+        return page
+
+    def attach_archived_records(self, sessions):
+        """Fill in the records of sessions whose term has been archived."""
+        empty = [session for session in sessions if not session.records.all()]
+        if not empty:
+            return
+
+        records = defaultdict(list)
+        for record in archived_records(
+            min(session.date for session in empty),
+            max(session.date for session in empty),
+            classroom_id__in={session.classroom_id for session in empty},
+            subject_id__in={session.subject_id for session in empty}
+        ):
+            records[record.attendance_id].append(record)
+
+        students = Student.objects.select_related('user').in_bulk(
+            {record.student_id for rows in records.values() for record in rows})
+
+        for session in empty:
+            session._prefetched_objects_cache['records'] = sorted(
+                (
+                    AttendanceRecord(
+                        attendance=session,
+                        student=students[record.student_id],
+                        date=record.date,
+                        status=record.status
+                    )
+                    for record in records.get(session.id, [])
+                ),
+                key=lambda record: record.student.user.name
+            )
+
+
+
+class AttendanceExportView(APIView):
+    """
+    Stream attendance records as CSV or NDJSON (`?output=csv|ndjson`).
+
+    Accepts the same filters as AttendanceListView plus `date_from` and
+    `date_to`. Rows are read with a values() projection through a
+    server-side iterator, so memory stays flat regardless of result size.
+    """
+    permission_classes = [IsPrincipalReadOnly]
+    chunk_size = 2000
+
+    export_fields = {
+        'date': 'attendance__date',
+        'classroom': 'attendance__classroom__name',
+        'subject': 'attendance__subject__name',
+        'teacher': 'attendance__teacher__user__name',
+        'student_registration_id': 'student__registration_id',
+        'student_name': 'student__user__name',
+        'status': 'status',
+    }
+
+    def get(self, request):
+        output = request.query_params.get('output', 'csv')
+
+        if output not in ('csv', 'ndjson'):
+            return Response(
+                {'detail': 'output must be csv or ndjson.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        qs = filter_attendance_queryset(
+            AttendanceRecord.objects.all(),
+            request.query_params,
+            prefix='attendance__'
+        )
+
+        # Rows lead with their (date, attendance_id, student_id) sort key,
+        # which is dropped once live and archived rows are merged.
+        rows = (
+            row[3:] for row in heapq.merge(
+                qs.order_by('attendance__date', 'attendance_id', 'student_id')
+                .values_list(
+                    'attendance__date', 'attendance_id', 'student_id',
+                    *self.export_fields.values()
+                )
+                .iterator(chunk_size=self.chunk_size),
+                self.archived_rows(request.query_params)
+            )
+        )
+
+        if output == 'csv':
+            content = self.stream_csv(rows)
+            content_type = 'text/csv'
+        else:
+            content = self.stream_ndjson(rows)
+            content_type = 'application/x-ndjson'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="attendance.{output}"'
+        return response
+
+    def archived_rows(self, params):
+        """
+        Archived records as export rows led by their sort key, in the same
+        order as live ones, looked up a chunk at a time so memory does not
+        grow with the term.
+        """
+        records = iter(filter_archived_records(params))
+        classrooms, subjects, teachers, students = {}, {}, {}, {}
 
-        if date:
-            qs = qs.filter(date=date)
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                return
 
-        return qs.order_by('-date')
+            self.load_names(classrooms, ClassRoom.objects.all(),
+                            {record.classroom_id for record in chunk}, 'name')
+            self.load_names(subjects, Subject.objects.all(),
+                            {record.subject_id for record in chunk}, 'name')
+            self.load_names(teachers, Teacher.objects.all(),
+                            {record.teacher_id for record in chunk}, 'user__name')
+            self.load_names(students, Student.objects.all(),
+                            {record.student_id for record in chunk},
+                            'registration_id', 'user__name')
+
+            for record in chunk:
+                yield (
+                    record.date,
+                    record.attendance_id,
+                    record.student_id,
+                    record.date,
+                    classrooms[record.classroom_id],
+                    subjects[record.subject_id],
+                    teachers[record.teacher_id],
+                    *students[record.student_id],
+                    record.status,
+                )
+
+    @staticmethod
+    def load_names(names, queryset, ids, *fields):
+        """Add the `fields` of the ids not yet in `names` to it."""
+        missing = ids - names.keys()
+        if not missing:
+            return
+        for row in queryset.filter(id__in=missing).values_list('id', *fields):
+            names[row[0]] = row[1] if len(fields) == 1 else row[1:]
+
+    def stream_csv(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.export_fields.keys())
+        for row in rows:
+            yield writer.writerow(row)
+
+    def stream_ndjson(self, rows):
+        keys = list(self.export_fields.keys())
+        for row in rows:
+            yield json.dumps(dict(zip(keys, row)), cls=DjangoJSONEncoder) + '\n'
 
 
 
@@ -265,6 +766,9 @@ class PrincipalDailyAttendanceReportView(APIView):
             leave=Count('id', filter=Q(status='L')),
         )
 
+        report = count_statuses(
+            filter_archived_records(request.query_params), report)
+
         return Response({
             'date': date,
             'classroom_id': classroom_id,
@@ -274,6 +778,229 @@ class PrincipalDailyAttendanceReportView(APIView):
 
 
 
+class PrincipalAttendanceMatrixView(APIView):
+    """
+    Classroom x subject x status counts for a date (`date`) or an
+    inclusive range (`date_from` + `date_to`), optionally narrowed by
+    classroom/subject, from a single GROUP BY. `unmarked` lists the
+    TeacherSubject slots with no Attendance row in that period, found
+    with an anti-join.
+    """
+    permission_classes = [IsPrincipalReadOnly]
+
+    def get(self, request):
+        params = request.query_params
+
+        if not params.get('date') and not (params.get('date_from') and params.get('date_to')):
+            return Response(
+                {'detail': 'date, or date_from and date_to, are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        records = filter_attendance_queryset(
+            AttendanceRecord.objects.all(), params, prefix='attendance__')
+
+        matrix = list(
+            records.values(
+                classroom_id=F('attendance__classroom_id'),
+                classroom_name=F('attendance__classroom__name'),
+                subject_id=F('attendance__subject_id'),
+                subject_name=F('attendance__subject__name'),
+            )
+            .annotate(
+                sessions=Count('attendance', distinct=True),
+                total=Count('id'),
+                present=Count('id', filter=Q(status='P')),
+                absent=Count('id', filter=Q(status='A')),
+                leave=Count('id', filter=Q(status='L')),
+            )
+            .order_by('classroom_name', 'subject_name')
+        )
+        matrix = self.merge_archived(matrix, filter_archived_records(params))
+
+        sessions = filter_attendance_queryset(
+            Attendance.objects.filter(
+                classroom_id=OuterRef('classroom_id'),
+                subject_id=OuterRef('subject_id')
+            ),
+            params
+        )
+        slots = TeacherSubject.objects.all()
+        if params.get('classroom'):
+            slots = slots.filter(classroom_id=params['classroom'])
+        if params.get('subject'):
+            slots = slots.filter(subject_id=params['subject'])
+
+        unmarked = list(
+            slots.filter(~Exists(sessions))
+            .values(
+                'classroom_id',
+                'subject_id',
+                'teacher_id',
+                classroom_name=F('classroom__name'),
+                subject_name=F('subject__name'),
+                teacher_name=F('teacher__user__name'),
+            )
+            .order_by('classroom_name', 'subject_name')
+        )
+
+        totals = {
+            key: sum(row[key] for row in matrix)
+            for key in ('total', 'present', 'absent', 'leave')
+        }
+
+        return Response({
+            'date': params.get('date'),
+            'date_from': params.get('date_from'),
+            'date_to': params.get('date_to'),
+            'totals': totals,
+            'matrix': matrix,
+            'unmarked': unmarked,
+        })
+
+    def merge_archived(self, matrix, records):
+        """Add archived records to the classroom x subject rows."""
+        groups = defaultdict(list)
+        for record in records:
+            groups[(record.classroom_id, record.subject_id)].append(record)
+        if not groups:
+            return matrix
+
+        rows = {(row['classroom_id'], row['subject_id']): row for row in matrix}
+
+        classrooms = dict(
+            ClassRoom.objects.filter(
+                id__in={classroom_id for classroom_id, _ in groups}
+            ).values_list('id', 'name')
+        )
+        subjects = dict(
+            Subject.objects.filter(
+                id__in={subject_id for _, subject_id in groups}
+            ).values_list('id', 'name')
+        )
+
+        for (classroom_id, subject_id), group in groups.items():
+            row = rows.setdefault((classroom_id, subject_id), {
+                'classroom_id': classroom_id,
+                'classroom_name': classrooms[classroom_id],
+                'subject_id': subject_id,
+                'subject_name': subjects[subject_id],
+                'sessions': 0,
+                'total': 0,
+                'present': 0,
+                'absent': 0,
+                'leave': 0,
+            })
+            row['sessions'] += len({record.attendance_id for record in group})
+            count_statuses(group, row)
+
+        return sorted(
+            rows.values(),
+            key=lambda row: (row['classroom_name'], row['subject_name'])
+        )
+
+
+
+class PrincipalAttendanceTrendView(AttendanceTrendMixin, APIView):
+    permission_classes = [IsPrincipalReadOnly]
+
+    def get(self, request):
+        params, error = self.get_trend_params(request)
+        if error:
+            return error
+
+        classroom_id = request.query_params.get('classroom')
+        subject_id = request.query_params.get('subject')
+
+        records = AttendanceRecord.objects.all()
+
+        if classroom_id:
+            records = records.filter(attendance__classroom_id=classroom_id)
+
+        if subject_id:
+            records = records.filter(attendance__subject_id=subject_id)
+
+        archived = archived_records(
+            *params[:2],
+            classroom_id=classroom_id or None,
+            subject_id=subject_id or None
+        )
+
+        return self.trend_response(
+            records, archived, *params,
+            classroom_id=classroom_id,
+            subject_id=subject_id
+        )
+
+
+
+class PrincipalAttendanceAnalyticsView(APIView):
+    """
+    Per-student percentages and absence streaks, per-subject comparison
+    and day-of-week pattern for a classroom, answered from the cached
+    in-memory matrix in attendance.analytics.
+    """
+    permission_classes = [IsPrincipalReadOnly]
+
+    def get(self, request):
+        classroom_id = request.query_params.get('classroom')
+        subject_id = request.query_params.get('subject')
+
+        if not classroom_id:
+            return Response(
+                {'detail': 'classroom is required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not classroom_id.isdigit() or (subject_id and not subject_id.isdigit()):
+            return Response(
+                {'detail': 'classroom and subject must be numbers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        matrix = get_classroom_matrix(int(classroom_id))
+        percentages = matrix.percentages(subject_id)
+        streaks = matrix.absence_streaks(subject_id)
+
+        names = dict(
+            Student.objects.filter(
+                id__in=matrix.student_ids.tolist()
+            ).values_list('id', 'user__name')
+        )
+        subject_names = dict(
+            Subject.objects.filter(
+                id__in=matrix.session_subjects.tolist()
+            ).values_list('id', 'name')
+        )
+
+        students = [
+            {
+                'student_id': student_id,
+                'student_name': names.get(student_id),
+                'total_days': int(percentages['total_days'][index]),
+                'present_days': int(percentages['present_days'][index]),
+                'absent_days': int(percentages['absent_days'][index]),
+                'leave_days': int(percentages['leave_days'][index]),
+                'attendance_percentage': float(percentages['attendance_percentage'][index]),
+                'longest_absence_streak': int(streaks['longest'][index]),
+                'current_absence_streak': int(streaks['current'][index]),
+            }
+            for index, student_id in enumerate(matrix.student_ids.tolist())
+        ]
+
+        return Response({
+            'classroom_id': classroom_id,
+            'subject_id': subject_id,
+            'students': sorted(students, key=lambda row: row['student_name'] or ''),
+            'subjects': [
+                {**row, 'subject_name': subject_names.get(row['subject_id'])}
+                for row in matrix.subject_comparison()
+            ],
+            'weekdays': matrix.weekday_pattern(subject_id),
+        })
+
+
+
 class PrincipalStudentAttendancePercentageView(APIView):
     permission_classes = [IsPrincipalReadOnly]
 
@@ -287,31 +1014,39 @@ class PrincipalStudentAttendancePercentageView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        qs = AttendanceRecord.objects.filter(
-            attendance__classroom_id=classroom_id)
+        qs = AttendanceSummary.objects.filter(classroom_id=classroom_id)
 
         if subject_id:
-            qs = qs.filter(attendance__subject_id=subject_id)
+            qs = qs.filter(subject_id=subject_id)
 
-        report = (
+        summary = (
             qs.values(
                 'student__id',
                 'student__user__name',
                 'student__registration_id'
             )
             .annotate(
-                total_days=Count('id'),
-                present_days=Count('id', filter=Q(status='P')),
-                absent_days=Count('id', filter=Q(status='A')),
-                leave_days=Count('id', filter=Q(status='L'))
-            )
-            .annotate(
-                attendance_percentage=Cast(
-                    F('present_days') * 100.0 / F('total_days'),
-                    FloatField()
-                )
+                total=Sum('total_days'),
+                present=Sum('present_days'),
+                absent=Sum('absent_days'),
+                leave=Sum('leave_days')
             )
+            .filter(total__gt=0)
             .order_by('student__user__name')
         )
 
+        report = [
+            {
+                'student__id': item['student__id'],
+                'student__user__name': item['student__user__name'],
+                'student__registration_id': item['student__registration_id'],
+                'total_days': item['total'],
+                'present_days': item['present'],
+                'absent_days': item['absent'],
+                'leave_days': item['leave'],
+                'attendance_percentage': item['present'] * 100.0 / item['total'],
+            }
+            for item in summary
+        ]
+
         return Response(report)
@@ -202,6 +202,67 @@ FRONTEND_URL = "https://school-management-system-pi-lac.vercel.app"
 
 GEMINI_API_KEY = config("GEMINI_API_KEY")
 
+# "gemini" for the real API, "stub" for the deterministic local provider
+# used in development, tests and load tests, or the dotted path of a
+# provider class (see assignment.ai_providers).
+AI_FEEDBACK_PROVIDER = config("AI_FEEDBACK_PROVIDER", default="gemini")
+AI_FEEDBACK_MODEL = config("AI_FEEDBACK_MODEL", default="gemini-2.5-flash")
+
+# Every model call: seconds before giving up (retries included), retries
+# of transient errors with jittered backoff starting at BACKOFF seconds,
+# and calls allowed in flight per process.
+AI_PROVIDER_DEADLINE = config("AI_PROVIDER_DEADLINE", default=60, cast=float)
+AI_PROVIDER_MAX_RETRIES = config("AI_PROVIDER_MAX_RETRIES", default=2, cast=int)
+AI_PROVIDER_BACKOFF = config("AI_PROVIDER_BACKOFF", default=0.5, cast=float)
+AI_PROVIDER_MAX_CONCURRENCY = config("AI_PROVIDER_MAX_CONCURRENCY", default=8, cast=int)
+
+# After THRESHOLD failures in a row calls fail fast for RESET seconds.
+AI_PROVIDER_BREAKER_THRESHOLD = config("AI_PROVIDER_BREAKER_THRESHOLD", default=5, cast=int)
+AI_PROVIDER_BREAKER_RESET = config("AI_PROVIDER_BREAKER_RESET", default=30, cast=float)
+
+# Seconds the stub provider takes to answer.
+AI_STUB_LATENCY = config("AI_STUB_LATENCY", default=0, cast=float)
+
+# Feedback jobs still "running" after this many seconds are assumed to
+# belong to a dead worker and are queued again.
+AI_FEEDBACK_JOB_TIMEOUT = config("AI_FEEDBACK_JOB_TIMEOUT", default=300, cast=int)
+AI_FEEDBACK_JOB_MAX_ATTEMPTS = config("AI_FEEDBACK_JOB_MAX_ATTEMPTS", default=3, cast=int)
+
+# Speculative pre-grading (Assignment.ai_pregrade): jobs each teacher may
+# be charged per day, and how many may run at once across all workers.
+AI_PREGRADE_DAILY_BUDGET = config("AI_PREGRADE_DAILY_BUDGET", default=50, cast=int)
+AI_PREGRADE_MAX_CONCURRENT = config("AI_PREGRADE_MAX_CONCURRENT", default=2, cast=int)
+
+# Cached AI feedback older than MAX_AGE seconds is ignored; beyond
+# MAX_BYTES in total the least recently used entries are evicted.
+AI_FEEDBACK_CACHE_MAX_AGE = config("AI_FEEDBACK_CACHE_MAX_AGE", default=30 * 24 * 3600, cast=int)
+AI_FEEDBACK_CACHE_MAX_BYTES = config("AI_FEEDBACK_CACHE_MAX_BYTES", default=50 * 1024 * 1024, cast=int)
+
+# Upper bounds for batch grading of a whole assignment: concurrent model
+# calls, and seconds a single call may take.
+AI_BATCH_MAX_WORKERS = config("AI_BATCH_MAX_WORKERS", default=4, cast=int)
+AI_BATCH_CALL_TIMEOUT = config("AI_BATCH_CALL_TIMEOUT", default=60, cast=int)
+
+# Submission files are streamed to the model pipeline and refused past
+# MAX_BYTES (the upload limit); URL downloads give up after these timeouts.
+AI_FILE_MAX_BYTES = config("AI_FILE_MAX_BYTES", default=5 * 1024 * 1024, cast=int)
+AI_FILE_CONNECT_TIMEOUT = config("AI_FILE_CONNECT_TIMEOUT", default=5, cast=float)
+AI_FILE_READ_TIMEOUT = config("AI_FILE_READ_TIMEOUT", default=30, cast=float)
+
+# Text taken from uploaded code, PDF, DOCX and XLSX files is cut to about
+# this many tokens before it is put in the prompt.
+AI_FILE_TOKEN_BUDGET = config("AI_FILE_TOKEN_BUDGET", default=8000, cast=int)
+
+# DOCX and XLSX parts larger than this once decompressed are refused
+# rather than read, so a small upload cannot expand into gigabytes.
+AI_FILE_MAX_PART_BYTES = config("AI_FILE_MAX_PART_BYTES", default=50 * 1024 * 1024, cast=int)
+
+# Image submissions are sent to the model at most MAX_SIDE pixels on the
+# longer side, re-encoded as JPEG under TARGET_BYTES where possible. The
+# resized copies are kept on the default storage, shared by all workers.
+AI_IMAGE_MAX_SIDE = config("AI_IMAGE_MAX_SIDE", default=1536, cast=int)
+AI_IMAGE_TARGET_BYTES = config("AI_IMAGE_TARGET_BYTES", default=400 * 1024, cast=int)
+
 
 # # AWS Settings
 
@@ -287,6 +348,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'assignment': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': True,
+        },
     },
 }
 
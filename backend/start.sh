@@ -28,4 +28,13 @@ else:
     print("Superuser env vars not set")
 EOF
 
+# AI feedback requests are queued as jobs; this worker answers them.
+# Restart it if it exits so queued jobs are never left waiting.
+(
+  while true; do
+    python manage.py run_ai_feedback_worker
+    sleep 5
+  done
+) &
+
 gunicorn core.wsgi:application --bind 0.0.0.0:8000
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Student
+from .models import Student, StudentRisk
 
 
 @admin.register(Student)
@@ -14,3 +14,12 @@ class StudentAdmin(admin.ModelAdmin):
         ('Student Info', {'fields': ('classroom',)}),
         ('Auto Generated', {'fields': ('registration_id',)}),
     )
+
+
+
+@admin.register(StudentRisk)
+class StudentRiskAdmin(admin.ModelAdmin):
+    list_display = ('student', 'risk_score', 'current_absence_streak',
+                    'attendance_percentage', 'marks_trend', 'updated_at')
+    list_filter = ('has_absence_streak', 'has_low_attendance', 'has_falling_marks')
+    search_fields = ('student__registration_id', 'student__user__email')
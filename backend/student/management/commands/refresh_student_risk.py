@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from student.models import Student
+from student.risk import refresh_student_risk
+
+
+class Command(BaseCommand):
+    help = 'Recompute StudentRisk rows and notify newly raised warnings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--classroom',
+            type=int,
+            help='Only score students of this classroom id.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of students scored per round of queries.'
+        )
+
+    def handle(self, *args, **options):
+        students = Student.objects.order_by('id')
+        if options['classroom']:
+            students = students.filter(classroom_id=options['classroom'])
+
+        student_ids = list(students.values_list('id', flat=True))
+        batch_size = options['batch_size']
+        notified = 0
+
+        for start in range(0, len(student_ids), batch_size):
+            notified += len(refresh_student_risk(student_ids[start:start + batch_size]))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {len(student_ids)} students, {notified} notifications sent'))
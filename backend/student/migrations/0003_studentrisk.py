@@ -0,0 +1,36 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0002_alter_student_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentRisk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_absence_streak', models.PositiveIntegerField(default=0)),
+                ('attendance_percentage', models.FloatField(blank=True, null=True)),
+                ('marks_trend', models.FloatField(blank=True, null=True)),
+                ('has_absence_streak', models.BooleanField(default=False)),
+                ('has_low_attendance', models.BooleanField(default=False)),
+                ('has_falling_marks', models.BooleanField(default=False)),
+                ('risk_score', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='risk', to='student.student')),
+            ],
+            options={
+                'verbose_name': 'Student Risk',
+                'verbose_name_plural': 'Student Risks',
+                'db_table': 'student_risks',
+                'ordering': ['-risk_score'],
+                'indexes': [models.Index(fields=['-risk_score'], name='student_ris_risk_sc_b002b8_idx')],
+            },
+        ),
+    ]
@@ -37,3 +37,36 @@ class Student(models.Model):
             models.Index(fields=['registration_id']),
             models.Index(fields=['classroom']),
         ]
+
+
+
+class StudentRisk(models.Model):
+    """
+    Early-warning state of a student, refreshed by student.risk after
+    every attendance marking and assignment evaluation that touches them.
+    """
+    student = models.OneToOneField(
+        Student, on_delete=models.CASCADE, related_name='risk')
+
+    current_absence_streak = models.PositiveIntegerField(default=0)
+    attendance_percentage = models.FloatField(null=True, blank=True)
+    marks_trend = models.FloatField(null=True, blank=True)
+
+    has_absence_streak = models.BooleanField(default=False)
+    has_low_attendance = models.BooleanField(default=False)
+    has_falling_marks = models.BooleanField(default=False)
+    risk_score = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student} - risk {self.risk_score}"
+
+    class Meta:
+        verbose_name = 'Student Risk'
+        verbose_name_plural = 'Student Risks'
+        ordering = ['-risk_score']
+        db_table = 'student_risks'
+        indexes = [
+            models.Index(fields=['-risk_score']),
+        ]
@@ -0,0 +1,248 @@
+import logging
+from collections import Counter, defaultdict
+
+from django.db.models import (
+    Case, F, FloatField, IntegerField, Sum, Value, When, Window
+)
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Cast, RowNumber
+from django.utils import timezone
+
+from assignment.models.submission import AssignmentSubmission
+from attendance.models import AttendanceRecord, AttendanceSummary
+from notifications.models import Notification
+from principal.models import Principal
+from student.models import Student, StudentRisk
+from teacher.models import TeacherSubject
+
+
+logger = logging.getLogger(__name__)
+
+ABSENCE_STREAK_THRESHOLD = 5
+LOW_ATTENDANCE_THRESHOLD = 75.0
+LOW_ATTENDANCE_MIN_DAYS = 10
+MARKS_WINDOW = 3
+MARKS_DROP_THRESHOLD = 10.0
+
+RISK_WEIGHTS = {
+    'has_absence_streak': 40,
+    'has_low_attendance': 35,
+    'has_falling_marks': 25,
+}
+
+
+def current_absence_streaks(student_ids):
+    """
+    Consecutive absences ending at each student's latest session.
+
+    A running count of non-absent sessions, newest first, is computed with
+    a window function; the rows where it is still zero form the streak.
+    """
+    rows = (
+        AttendanceRecord.objects.filter(student_id__in=student_ids)
+        .annotate(
+            breaks=Window(
+                Sum(Case(
+                    When(status='A', then=Value(0)),
+                    default=Value(1),
+                    output_field=IntegerField()
+                )),
+                partition_by=[F('student_id')],
+                order_by=[F('attendance__date').desc(), F('attendance_id').desc()],
+                frame=RowRange(start=None, end=0),
+            )
+        )
+        .filter(breaks=0)
+        .values_list('student_id', flat=True)
+    )
+    return Counter(rows)
+
+
+def attendance_percentages(student_ids):
+    """Overall present percentage and marked days, read from the rollup."""
+    rows = (
+        AttendanceSummary.objects.filter(student_id__in=student_ids)
+        .values('student_id')
+        .annotate(total=Sum('total_days'), present=Sum('present_days'))
+        .order_by()
+    )
+    return {
+        row['student_id']: (row['present'] * 100.0 / row['total'], row['total'])
+        for row in rows
+        if row['total']
+    }
+
+
+def marks_trends(student_ids):
+    """
+    Average percentage of the latest MARKS_WINDOW evaluated submissions
+    minus that of the MARKS_WINDOW before them. Negative means falling.
+    """
+    rows = (
+        AssignmentSubmission.objects.filter(
+            student_id__in=student_ids,
+            marks_obtained__isnull=False,
+            assignment__max_marks__gt=0
+        )
+        .annotate(
+            score=Cast(F('marks_obtained'), FloatField()) * 100.0 / F('assignment__max_marks'),
+            recency=Window(
+                RowNumber(),
+                partition_by=[F('student_id')],
+                order_by=[F('evaluated_at').desc(nulls_last=True), F('id').desc()],
+            )
+        )
+        .filter(recency__lte=MARKS_WINDOW * 2)
+        .values_list('student_id', 'recency', 'score')
+    )
+
+    scores = defaultdict(lambda: ([], []))
+    for student_id, recency, score in rows:
+        recent, previous = scores[student_id]
+        (recent if recency <= MARKS_WINDOW else previous).append(score)
+
+    return {
+        student_id: sum(recent) / len(recent) - sum(previous) / len(previous)
+        for student_id, (recent, previous) in scores.items()
+        if len(recent) == MARKS_WINDOW and previous
+    }
+
+
+def refresh_student_risk(student_ids):
+    """
+    Re-score the given students, save their StudentRisk rows and notify
+    class teachers and principals of every warning that has just been
+    raised. A warning that stays raised is not notified again.
+
+    Returns:
+        list: Notifications created
+    """
+    student_ids = set(student_ids)
+    if not student_ids:
+        return []
+
+    streaks = current_absence_streaks(student_ids)
+    percentages = attendance_percentages(student_ids)
+    trends = marks_trends(student_ids)
+
+    existing = {
+        risk.student_id: risk
+        for risk in StudentRisk.objects.filter(student_id__in=student_ids)
+    }
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    raised = []
+
+    for student_id in student_ids:
+        risk = existing.get(student_id)
+        if risk is None:
+            risk = StudentRisk(student_id=student_id)
+            to_create.append(risk)
+        else:
+            # bulk_update does not apply auto_now.
+            risk.updated_at = now
+            to_update.append(risk)
+
+        percentage, marked_days = percentages.get(student_id, (None, 0))
+
+        risk.current_absence_streak = streaks.get(student_id, 0)
+        risk.attendance_percentage = percentage
+        risk.marks_trend = trends.get(student_id)
+
+        flags = {
+            'has_absence_streak': risk.current_absence_streak >= ABSENCE_STREAK_THRESHOLD,
+            'has_low_attendance': (
+                percentage is not None
+                and marked_days >= LOW_ATTENDANCE_MIN_DAYS
+                and percentage < LOW_ATTENDANCE_THRESHOLD
+            ),
+            'has_falling_marks': (
+                risk.marks_trend is not None
+                and risk.marks_trend <= -MARKS_DROP_THRESHOLD
+            ),
+        }
+
+        for flag, value in flags.items():
+            if value and not getattr(risk, flag):
+                raised.append((risk, flag))
+            setattr(risk, flag, value)
+
+        risk.risk_score = sum(
+            weight for flag, weight in RISK_WEIGHTS.items() if flags[flag])
+
+    StudentRisk.objects.bulk_create(to_create)
+    StudentRisk.objects.bulk_update(
+        to_update,
+        [
+            'current_absence_streak', 'attendance_percentage', 'marks_trend',
+            'has_absence_streak', 'has_low_attendance', 'has_falling_marks',
+            'risk_score', 'updated_at',
+        ]
+    )
+
+    if raised:
+        return notify_raised_risks(raised)
+    return []
+
+
+def refresh_student_risk_after_commit(student_ids):
+    """
+    refresh_student_risk for transaction.on_commit hooks. The attendance
+    or marks that triggered it are already saved, so a failure here is
+    logged rather than turned into an error response.
+    """
+    try:
+        refresh_student_risk(student_ids)
+    except Exception as e:
+        logger.error(f"Failed to refresh risk for students {sorted(student_ids)}: {e}")
+
+
+def notify_raised_risks(raised):
+    students = {
+        student.id: student
+        for student in Student.objects.filter(
+            id__in={risk.student_id for risk, _ in raised}
+        ).select_related('user')
+    }
+
+    teachers_by_classroom = defaultdict(set)
+    for classroom_id, user_id in TeacherSubject.objects.filter(
+        classroom_id__in={student.classroom_id for student in students.values()}
+    ).values_list('classroom_id', 'teacher__user_id').distinct():
+        teachers_by_classroom[classroom_id].add(user_id)
+
+    principal_user_ids = set(Principal.objects.values_list('user_id', flat=True))
+
+    notifications = []
+    for risk, flag in raised:
+        student = students[risk.student_id]
+        message = risk_message(student, risk, flag)
+        recipients = teachers_by_classroom[student.classroom_id] | principal_user_ids
+
+        notifications.extend(
+            Notification(
+                user_id=user_id,
+                title='Student At Risk',
+                message=message
+            )
+            for user_id in recipients
+        )
+
+    return Notification.objects.bulk_create(notifications)
+
+
+def risk_message(student, risk, flag):
+    name = f"{student.user.name} ({student.registration_id})"
+
+    if flag == 'has_absence_streak':
+        return f"{name} has been absent for {risk.current_absence_streak} sessions in a row."
+
+    if flag == 'has_low_attendance':
+        return f"{name}'s attendance has dropped to {risk.attendance_percentage:.1f}%."
+
+    return (
+        f"{name}'s recent assignment marks have fallen by "
+        f"{abs(risk.marks_trend):.1f} percentage points."
+    )
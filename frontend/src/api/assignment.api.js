@@ -1,4 +1,5 @@
 import api from "./axios";
+import { getAccessToken } from "../utils/token";
 
 
 
@@ -37,5 +38,121 @@ export const getTeacherSubmissionsAPI = () =>
 export const evaluateSubmissionAPI = (submissionId, data) =>
   api.patch(`assignments/submissions/${submissionId}/evaluate/`, data);
 
-export const getAISuggestionAPI = (submissionId) =>
-  api.get(`assignments/ai-suggestion/${submissionId}/`);
+export const getAIFeedbackJobAPI = (jobId) =>
+  api.get(`assignments/ai-suggestion/jobs/${jobId}/`);
+
+const AI_POLL_INTERVAL_MS = 2000;
+// Give up after 3 minutes, e.g. when no worker is picking up jobs.
+const AI_POLL_MAX_ATTEMPTS = 90;
+
+// Queues AI feedback and polls the job until it finishes. Resolves with
+// the finished job response (res.data.suggestion holds the feedback).
+// Cached feedback comes back done straight away unless refresh is set.
+export const getAISuggestionAPI = async (submissionId, { refresh = false } = {}) => {
+  let res = await api.post(
+    `assignments/ai-suggestion/${submissionId}/${refresh ? "?refresh=1" : ""}`
+  );
+
+  let attempts = 0;
+  while (res.data.status === "queued" || res.data.status === "running") {
+    if (attempts >= AI_POLL_MAX_ATTEMPTS) {
+      throw {
+        response: {
+          data: {
+            error: "Failed to generate AI suggestion",
+            detail: "The AI suggestion is taking too long. Please try again later.",
+          },
+        },
+      };
+    }
+    attempts += 1;
+    await new Promise((resolve) => setTimeout(resolve, AI_POLL_INTERVAL_MS));
+    res = await getAIFeedbackJobAPI(res.data.job_id);
+  }
+
+  if (res.data.status === "failed") {
+    throw {
+      response: {
+        data: {
+          error: "Failed to generate AI suggestion",
+          detail: res.data.error,
+        },
+      },
+    };
+  }
+
+  return res;
+};
+
+// Streams AI feedback while it is generated (server-sent events).
+// onChunk(text, suggestionSoFar) runs for every piece of text; resolves
+// with the full suggestion.
+export const streamAISuggestionAPI = async (
+  submissionId,
+  onChunk,
+  { refresh = false } = {}
+) => {
+  const baseURL = api.defaults.baseURL.replace(/\/+$/, "");
+  const response = await fetch(
+    `${baseURL}/assignments/ai-suggestion/${submissionId}/stream/${refresh ? "?refresh=1" : ""}`,
+    {
+      headers: {
+        Accept: "text/event-stream",
+        Authorization: `Bearer ${getAccessToken()}`,
+      },
+    }
+  );
+
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}));
+    throw { response: { status: response.status, data } };
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let suggestion = "";
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split("\n\n");
+    buffer = events.pop();
+
+    for (const raw of events) {
+      const event = raw.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "{}");
+
+      if (event === "chunk") {
+        suggestion += data.text;
+        onChunk?.(data.text, suggestion);
+      } else if (event === "error") {
+        throw {
+          response: {
+            data: {
+              error: "Failed to generate AI suggestion",
+              detail: data.detail,
+            },
+          },
+        };
+      }
+    }
+  }
+
+  return suggestion;
+};
+
+// AI feedback pre-generated for a submission (assignments with
+// ai_pregrade), in the same format as a live suggestion; null if none.
+export const storedAISuggestion = (submission) => {
+  if (!submission.ai_feedback_at) return null;
+
+  return [
+    `Feedback: ${submission.ai_feedback}`,
+    `Score: ${submission.ai_score ?? "-"}`,
+    `Issues: ${submission.ai_issues || "None"}`,
+    `Suggestions: ${submission.ai_suggestions}`,
+  ].join("\n");
+};
@@ -14,6 +14,7 @@ const CreateAssignment = () => {
     subject: "",
     due_date: "",
     max_marks: "",
+    ai_pregrade: false,
   });
   const [loading, setLoading] = useState(false);
 
@@ -34,8 +35,10 @@ const CreateAssignment = () => {
     : subjects;
 
   const handleChange = (e) => {
-    const { name, value } = e.target;
-    if (name === "classroom") {
+    const { name, value, type, checked } = e.target;
+    if (type === "checkbox") {
+      setForm({ ...form, [name]: checked });
+    } else if (name === "classroom") {
       setForm({ ...form, classroom: value, subject: "" });
     } else {
       setForm({ ...form, [name]: value });
@@ -54,6 +57,7 @@ const CreateAssignment = () => {
         subject: Number(form.subject),
         due_date: form.due_date,
         max_marks: Number(form.max_marks),
+        ai_pregrade: form.ai_pregrade,
       });
 
       alert("Assignment created successfully!");
@@ -64,6 +68,7 @@ const CreateAssignment = () => {
         subject: "",
         due_date: "",
         max_marks: "",
+        ai_pregrade: false,
       });
     } catch (error) {
       console.error(error.response?.data || error);
@@ -170,6 +175,16 @@ const CreateAssignment = () => {
             </div>
           </div>
 
+          <label className="flex items-center gap-2 text-sm">
+            <input
+              type="checkbox"
+              name="ai_pregrade"
+              checked={form.ai_pregrade}
+              onChange={handleChange}
+            />
+            Prepare AI feedback as soon as students submit
+          </label>
+
           <button
             type="submit"
             disabled={loading || !form.classroom || !form.subject}
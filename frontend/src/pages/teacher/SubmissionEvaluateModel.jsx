@@ -1,7 +1,8 @@
 import { useState } from "react";
 import {
   evaluateSubmissionAPI,
-  getAISuggestionAPI,
+  streamAISuggestionAPI,
+  storedAISuggestion,
 } from "../../api/assignment.api";
 
 
@@ -12,15 +13,18 @@ const SubmissionEvaluateModal = ({
 }) => {
   const [marks, setMarks] = useState(submission.marks_obtained || "");
   const [feedback, setFeedback] = useState(submission.teacher_feedback || "");
-  const [aiSuggestion, setAiSuggestion] = useState(null);
+  const [aiSuggestion, setAiSuggestion] = useState(
+    storedAISuggestion(submission)
+  );
   const [loadingAI, setLoadingAI] = useState(false);
   const [savingEvaluation, setSavingEvaluation] = useState(false);
 
   const handleGetAI = async () => {
     setLoadingAI(true);
     try {
-      const res = await getAISuggestionAPI(submission.id);
-      setAiSuggestion(res.data.suggestion);
+      await streamAISuggestionAPI(submission.id, (_, suggestion) =>
+        setAiSuggestion(suggestion)
+      );
     } catch (err) {
       console.error("AI Error:", err);
       alert(err.response?.data?.error || "Failed to get AI suggestion");
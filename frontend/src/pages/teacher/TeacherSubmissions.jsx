@@ -3,7 +3,8 @@ import DashboardLayout from "../../layouts/DashboardLayout";
 import {
   getTeacherSubmissionsAPI,
   evaluateSubmissionAPI,
-  getAISuggestionAPI,
+  streamAISuggestionAPI,
+  storedAISuggestion,
 } from "../../api/assignment.api";
 
 const TeacherSubmissions = () => {
@@ -38,9 +39,9 @@ const TeacherSubmissions = () => {
     setAiSuggestion(null);
 
     try {
-      const res = await getAISuggestionAPI(submissionId);
-      console.log("AI Response:", res.data);
-      setAiSuggestion(res.data.suggestion);
+      await streamAISuggestionAPI(submissionId, (_, suggestion) =>
+        setAiSuggestion(suggestion)
+      );
     } catch (err) {
       console.error("AI Error:", err);
       alert(err.response?.data?.detail || "Failed to get AI suggestion");
@@ -80,7 +81,7 @@ const TeacherSubmissions = () => {
     setSelectedSubmission(submission);
     setMarks(submission.marks_obtained || "");
     setFeedback(submission.teacher_feedback || "");
-    setAiSuggestion(null);
+    setAiSuggestion(storedAISuggestion(submission));
   };
 
   if (loading) {